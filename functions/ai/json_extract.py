@@ -0,0 +1,88 @@
+import json
+import re
+
+# Only these characters can change the scanner state, so we jump between them
+# instead of walking the response one character at a time.
+STRUCTURAL_CHARS = re.compile(r'[{}\[\]"\\]')
+CLOSING_FOR = {'{': '}', '[': ']'}
+DECODER = json.JSONDecoder()
+
+
+def iter_json_values(text: str):
+    """
+    Yields (value, start, end) for each complete top-level JSON object/array in `text`,
+    left to right.
+
+    At every top-level '{' or '[' the C decoder tries to parse a value in place
+    (raw_decode stops at the end of the value, so trailing prose costs nothing). When that
+    fails, a bracket-balancing state machine, which tracks string literals and escapes,
+    skips to the end of the broken candidate so its nested brackets are not retried.
+    Text outside candidates (markdown fences, preambles, trailing notes) is ignored.
+    """
+    scan_from = 0
+    while scan_from < len(text):
+        stack = []
+        start = -1
+        in_string = False
+        skip_until = -1
+
+        for match in STRUCTURAL_CHARS.finditer(text, scan_from):
+            pos = match.start()
+            if pos < skip_until:
+                continue
+            char = match.group()
+
+            if in_string:
+                if char == '\\':
+                    skip_until = pos + 2
+                elif char == '"':
+                    in_string = False
+                continue
+
+            if char == '{' or char == '[':
+                if not stack:
+                    try:
+                        value, end = DECODER.raw_decode(text, pos)
+                    except json.JSONDecodeError:
+                        start = pos
+                    else:
+                        yield value, pos, end
+                        skip_until = end
+                        continue
+                stack.append(CLOSING_FOR[char])
+            elif char == '}' or char == ']':
+                if stack and stack.pop() != char:
+                    stack.clear()
+            elif char == '"' and stack:
+                in_string = True
+
+        if not stack:
+            return
+        # A broken candidate never closed (e.g. a stray '{' in prose): everything after it
+        # was swallowed, so rescan from just past its opening bracket.
+        scan_from = start + 1
+
+
+def extract_json(text: str, validate=None):
+    """
+    Returns the first complete JSON object/array in `text` for which validate(value) is
+    true (or simply the first one when `validate` is None).
+
+    Raises json.JSONDecodeError if the text contains no JSON object/array at all, and
+    ValueError if JSON was found but none of it matched the expected structure.
+    """
+    found_json = False
+    for value, _, _ in iter_json_values(text):
+        found_json = True
+        if validate is None or validate(value):
+            return value
+    if found_json:
+        raise ValueError("JSON found in response does not match the expected structure.")
+    raise json.JSONDecodeError("No complete JSON object or array found", text, 0)
+
+
+def find_json_text(text: str):
+    """Returns the source text of the first complete JSON object/array, or None."""
+    for _, start, end in iter_json_values(text):
+        return text[start:end]
+    return None
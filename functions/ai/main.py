@@ -0,0 +1,10 @@
+# AI suggestions codebase: Gemini-backed helpers for the camera onboarding wizard.
+# Firebase discovers functions from this module, so every handler is re-exported here.
+from suggest_apis import (
+    suggest_scene_description,
+    suggest_detection_targets,
+    suggest_alert_events,
+    suggest_camera_setup,
+    suggest_detection_targets_batch,
+    suggest_alert_events_batch,
+)
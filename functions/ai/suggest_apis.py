@@ -0,0 +1,838 @@
+
+from firebase_functions import https_fn, options
+import os
+import json
+import base64
+import time
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from common.instrumentation import instrumented, phase, submit_in_context
+from common.auth_helper import ensure_firebase_app, verify_firebase_token
+from common.cors import allowed_origins_list
+from common.orgs import get_user_org_id
+from common.vss import get_firestore_client
+from common.responses import json_response, error_response
+from common.rate_limit import TokenBucket, SingleFlight, RateLimitTimeout, call_with_backoff
+from json_extract import extract_json, find_json_text
+
+# --- Gemini API Key Configuration ---
+# google.generativeai is heavy to import, so it is loaded and configured on the first
+# model request (see get_genai) instead of at module import.
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+_genai = None
+_genai_lock = threading.Lock()
+
+if not GEMINI_API_KEY:
+    print("SUGGEST_APIS.PY: Warning: GEMINI_API_KEY environment variable not found.")
+
+
+def get_genai():
+    """Imports and configures google.generativeai once per instance."""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                print("SUGGEST_APIS.PY: Gemini API configured successfully.")
+                _genai = genai
+    return _genai
+
+
+# --- CORS Configuration ---
+cors_options_config = options.CorsOptions(
+    cors_origins=allowed_origins_list,
+    cors_methods=["GET", "POST", "OPTIONS"]
+)
+
+
+def get_gemini_model(model_name="gemini-pro-vision"): # Default to vision model
+    GEMINI_MODEL_NAME = os.environ.get('GEMINI_MODEL_NAME', model_name)
+    if not GEMINI_API_KEY:
+        print("SUGGEST_APIS.PY: Gemini API key not configured. Cannot get model.")
+        return None, "Gemini API key not configured."
+    try:
+        print(f"SUGGEST_APIS.PY: Using Gemini model: {GEMINI_MODEL_NAME}")
+        return get_genai().GenerativeModel(GEMINI_MODEL_NAME), None
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Failed to initialize Gemini model {GEMINI_MODEL_NAME}: {e}")
+        return None, f"Failed to initialize Gemini model {GEMINI_MODEL_NAME}: {e}"
+
+
+# --- Gemini call limiting ---
+# Every model call goes through generate_content_limited(): a per-instance token bucket
+# keeps us under the project quota, a semaphore caps in-flight calls, 429/503 responses
+# are retried with jittered backoff, and identical concurrent prompts share one call.
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', '8'))
+GEMINI_REQUESTS_PER_SECOND = float(os.environ.get('GEMINI_REQUESTS_PER_SECOND', '1'))
+GEMINI_BURST = float(os.environ.get('GEMINI_BURST', '5'))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('GEMINI_QUEUE_TIMEOUT_SECONDS', '60'))
+GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES', '4'))
+GEMINI_RETRYABLE_STATUS_CODES = (429, 503)
+
+gemini_semaphore = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+gemini_token_bucket = TokenBucket(GEMINI_REQUESTS_PER_SECOND, GEMINI_BURST)
+gemini_single_flight = SingleFlight()
+
+
+def gemini_status_code(error: Exception):
+    # google.api_core exceptions carry the HTTP status as `code` (e.g. ResourceExhausted -> 429).
+    try:
+        return int(getattr(error, 'code', None))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_gemini_error(error: Exception) -> bool:
+    return gemini_status_code(error) in GEMINI_RETRYABLE_STATUS_CODES
+
+
+def gemini_error_status(error: Exception) -> int:
+    """HTTP status to report for a failed Gemini call: 429 when we ran out of quota, else 500."""
+    if isinstance(error, RateLimitTimeout) or gemini_status_code(error) == 429:
+        return 429
+    return 500
+
+
+def acquire_gemini_slot():
+    if not gemini_token_bucket.acquire(timeout=GEMINI_QUEUE_TIMEOUT_SECONDS):
+        raise RateLimitTimeout("Timed out waiting for Gemini rate limit capacity.")
+    if not gemini_semaphore.acquire(timeout=GEMINI_QUEUE_TIMEOUT_SECONDS):
+        raise RateLimitTimeout("Timed out waiting for a free Gemini concurrency slot.")
+
+
+def gemini_request_key(model, content, kwargs) -> str:
+    digest = hashlib.sha256(getattr(model, 'model_name', '').encode())
+    for part in content if isinstance(content, list) else [content]:
+        if isinstance(part, dict):
+            digest.update(part.get('mime_type', '').encode())
+            digest.update(part.get('data', b''))
+        else:
+            digest.update(str(part).encode())
+    digest.update(repr(sorted(kwargs.items())).encode())
+    return digest.hexdigest()
+
+
+def generate_content_limited(model, content, **kwargs):
+    def attempt():
+        acquire_gemini_slot()
+        try:
+            return model.generate_content(content, **kwargs)
+        finally:
+            gemini_semaphore.release()
+
+    def call():
+        return call_with_backoff(attempt, is_retryable_gemini_error, max_retries=GEMINI_MAX_RETRIES)
+
+    with phase('gemini'):
+        return gemini_single_flight.do(gemini_request_key(model, content, kwargs), call)
+
+
+def stream_content_limited(model, content, **kwargs):
+    """
+    Streaming counterpart of generate_content_limited(). Streams are not coalesced, and
+    only the initial request is retried: once chunks have been relayed a retry would
+    duplicate output. The concurrency slot is held until the stream is exhausted.
+    """
+    def attempt():
+        acquire_gemini_slot()
+        try:
+            return model.generate_content(content, stream=True, **kwargs)
+        except BaseException:
+            gemini_semaphore.release()
+            raise
+
+    response = call_with_backoff(attempt, is_retryable_gemini_error, max_retries=GEMINI_MAX_RETRIES)
+    try:
+        for chunk in response:
+            yield chunk
+    finally:
+        gemini_semaphore.release()
+
+
+def clean_gemini_json_response(response_text: str) -> str:
+    """
+    Returns the text of the first complete JSON object/array in a Gemini response
+    (inside or outside markdown fences), or the stripped original if there is none.
+    Prefer parse_gemini_json() when the parsed value is needed: it avoids a second parse.
+    """
+    json_text = find_json_text(response_text)
+    if json_text is None:
+        print(f"SUGGEST_APIS.PY: No JSON structure found in {len(response_text)}-char response.")
+        return response_text.strip()
+    return json_text
+
+
+def parse_gemini_json(response_text: str, validate=None):
+    """
+    Scans a Gemini response once and returns the first complete JSON object/array that
+    satisfies `validate`. Raises json.JSONDecodeError if there is no JSON at all and
+    ValueError if JSON was found but none of it matched the expected structure.
+    """
+    with phase('parse'):
+        return extract_json(response_text, validate)
+
+
+def build_detection_targets_prompt(camera_scene_context: str, scene_description: str) -> str:
+    return f"""Based on the following camera scene context and scene description, suggest a concise comma-separated list of relevant objects or events that an AI detection system should focus on detecting. Provide only the comma-separated list, with no other text, labels, or formatting. Example: "Person walking, Vehicle, Theft, Animal, Violence".
+
+Camera Scene Context: {camera_scene_context}
+Scene Description (if available): {scene_description if scene_description else 'Not provided.'}
+"""
+
+
+def clean_detection_targets(response_text: str) -> str:
+    return response_text.strip().replace('"', '').replace("'", '')
+
+
+def build_alert_events_prompt(camera_scene_context: str, ai_detection_target: str) -> str:
+    return f"""Considering the following camera scene context and the desired AI detection targets, suggest:
+1. A concise overall 'Alert Name' for a alert configuration (e.g., "Warehouse Zone A Monitoring").
+2. A list of specific, concise 'Event Names' (strings, like 'Fire', 'Person Detected', or 'Vehicle Idling Too Long') that should be included in this alert's event array for the VSS API. These event names should be suitable for direct use in an API that expects an array of event strings like ["Fire", "More than 5 people"].
+
+Format the output as a JSON object with 'suggestedAlertName' (string) and 'suggestedEventNames' (array of strings) keys.
+
+Example Output:
+{{
+  "suggestedAlertName": "Security Breach Alert",
+  "suggestedEventNames": ["Unauthorized Entry", "Forced Door", "Broken Window"]
+}}
+
+Camera Scene Context: {camera_scene_context}
+AI Detection Targets: {ai_detection_target}
+"""
+
+
+ALERT_EVENTS_STRUCTURE_ERROR = "AI model did not return the expected JSON structure (suggestedAlertName: string, suggestedEventNames: array of strings)."
+
+
+def is_valid_alert_events(parsed_response) -> bool:
+    return isinstance(parsed_response, dict) and \
+        isinstance(parsed_response.get('suggestedAlertName'), str) and \
+        isinstance(parsed_response.get('suggestedEventNames'), list) and \
+        all(isinstance(item, str) for item in parsed_response['suggestedEventNames'])
+
+
+SCENE_DESCRIPTION_PROMPT = "Describe the scene in this image in detail, focusing on objects, environment, and potential activities."
+SCENE_DESCRIPTION_FALLBACK = "Could not generate a detailed scene description."
+
+# Streaming formats for suggest_scene_description: server-sent events or newline-delimited JSON.
+STREAM_MIMETYPES = {
+    'sse': 'text/event-stream',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def decode_image_part(image_data_base64: str) -> dict:
+    """Turns a base64 string (optionally a data: URL) into a Gemini inline image part."""
+    if ',' in image_data_base64:
+        header, encoded = image_data_base64.split(",", 1)
+        mime_type = header.split(":")[1].split(";")[0] if header.startswith("data:") else "image/jpeg"
+    else:
+        encoded = image_data_base64
+        mime_type = "image/jpeg"
+    return {"mime_type": mime_type, "data": base64.b64decode(encoded)}
+
+
+# suggest_scene_description can read the image straight from the snapshot bucket
+# ({"gcsObjectName": "snapshots/..."}) instead of receiving it base64-encoded, so a
+# snapshot taken by the snapshot service never has to pass through the browser.
+SNAPSHOT_STORAGE_BUCKET = os.environ.get('SNAPSHOT_STORAGE_BUCKET')
+SNAPSHOT_OBJECT_PREFIX = 'snapshots/'
+
+
+class SnapshotNotFound(Exception):
+    pass
+
+
+class SnapshotForbidden(Exception):
+    pass
+
+
+# Object names written by the snapshot service: snapshots/snap_{uid}_{timestamp}.jpg for
+# /take-snapshot and snapshots/latest/{cameraId}.jpg for the thumbnail refresh.
+_USER_SNAPSHOT_RE = re.compile(r'^snapshots/snap_(?P<uid>.+)_\d+\.jpg$')
+_LATEST_SNAPSHOT_RE = re.compile(r'^snapshots/latest/(?P<camera_id>[^/]+)\.jpg$')
+
+
+def _caller_org_id(decoded_token: dict):
+    return decoded_token.get('orgId') or decoded_token.get('organizationId') or get_user_org_id(decoded_token.get('uid'))
+
+
+def check_snapshot_access(gcs_object_name: str, decoded_token: dict) -> None:
+    """
+    Raises SnapshotForbidden unless the caller (or someone in the caller's organization)
+    took the snapshot, or it is the latest thumbnail of one of the organization's cameras.
+    """
+    uid = decoded_token.get('uid')
+    match = _USER_SNAPSHOT_RE.match(gcs_object_name)
+    if match:
+        owner_uid = match.group('uid')
+        if owner_uid == uid:
+            return
+        org_id = _caller_org_id(decoded_token)
+        if org_id and get_user_org_id(owner_uid) == org_id:
+            return
+        raise SnapshotForbidden("You do not have access to this snapshot")
+    match = _LATEST_SNAPSHOT_RE.match(gcs_object_name)
+    if match:
+        org_id = _caller_org_id(decoded_token)
+        with phase('firestore_read'):
+            camera_doc = get_firestore_client().collection('cameras').document(match.group('camera_id')).get()
+        if org_id and camera_doc.exists and camera_doc.to_dict().get('orgId') == org_id:
+            return
+        raise SnapshotForbidden("You do not have access to this snapshot")
+    raise SnapshotForbidden("gcsObjectName is not a snapshot written by the snapshot service")
+
+
+def load_snapshot_image_part(gcs_object_name: str, decoded_token: dict) -> dict:
+    """
+    Downloads a snapshot JPEG from SNAPSHOT_STORAGE_BUCKET as a Gemini inline image part,
+    after checking that the caller may read it (see check_snapshot_access).
+    """
+    if not gcs_object_name.startswith(SNAPSHOT_OBJECT_PREFIX) or '..' in gcs_object_name:
+        raise ValueError(f"gcsObjectName must be an object under {SNAPSHOT_OBJECT_PREFIX}")
+    check_snapshot_access(gcs_object_name, decoded_token)
+    ensure_firebase_app()
+    from firebase_admin import storage
+    from google.api_core.exceptions import NotFound
+    try:
+        with phase('gcs_read'):
+            data = storage.bucket(SNAPSHOT_STORAGE_BUCKET).blob(gcs_object_name).download_as_bytes()
+    except NotFound:
+        raise SnapshotNotFound(f"Snapshot {gcs_object_name} not found")
+    return {"mime_type": "image/jpeg", "data": data}
+
+
+def get_stream_format(req: https_fn.Request, request_json: dict):
+    """
+    Returns 'sse' or 'ndjson' when the caller asked for a streamed response, otherwise None.
+    Streaming is requested with ?stream=sse|ndjson (or "stream" in the JSON body);
+    a bare truthy value or an 'Accept: text/event-stream' header selects SSE.
+    """
+    requested = req.args.get('stream')
+    if requested is None and request_json:
+        requested = request_json.get('stream')
+    if isinstance(requested, bool):
+        requested = 'sse' if requested else None
+    if requested:
+        requested = str(requested).lower()
+        if requested in STREAM_MIMETYPES:
+            return requested
+        if requested in ('1', 'true', 'yes'):
+            return 'sse'
+        return None
+    if 'text/event-stream' in req.headers.get('Accept', ''):
+        return 'sse'
+    return None
+
+
+def format_stream_event(stream_format: str, event: str, payload: dict) -> str:
+    if stream_format == 'sse':
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({'event': event, **payload}) + "\n"
+
+
+def stream_scene_description(model, content, stream_format: str):
+    """
+    Generator that relays Gemini output chunk by chunk, so the client sees the first
+    tokens as soon as they are produced. Ends with a 'done' event carrying the full
+    sceneDescription (same shape as the non-streaming response) or an 'error' event.
+    """
+    chunks = []
+    try:
+        for chunk in stream_content_limited(model, content):
+            text = chunk.text
+            if not text:
+                continue
+            chunks.append(text)
+            yield format_stream_event(stream_format, 'chunk', {'text': text})
+
+        suggested_description = "".join(chunks).strip() or SCENE_DESCRIPTION_FALLBACK
+        print(f"SUGGEST_APIS.PY: Streamed scene description complete ({len(chunks)} chunks): {suggested_description[:100]}...")
+        yield format_stream_event(stream_format, 'done', {'status': 'success', 'sceneDescription': suggested_description})
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Gemini API error while streaming scene description: {e}")
+        yield format_stream_event(stream_format, 'error', {'status': 'error', 'message': f'Error generating scene description: {e}'})
+
+
+@https_fn.on_request(cors=cors_options_config)
+@instrumented
+def suggest_scene_description(req: https_fn.Request) -> https_fn.Response:
+    print("SUGGEST_APIS.PY: suggest_scene_description invoked.")
+    decoded_token, error_message = verify_firebase_token(req)
+    if error_message:
+        print(f"SUGGEST_APIS.PY: Authentication failed for suggest_scene_description: {error_message}")
+        return error_response(error_message, 401)
+
+    if not GEMINI_API_KEY:
+        print("SUGGEST_APIS.PY: Gemini API key not available for suggest_scene_description.")
+        return error_response('AI service not configured (API Key missing).', 503)
+
+    request_json = req.get_json(silent=True)
+    if request_json is None or ('imageData' not in request_json and 'gcsObjectName' not in request_json):
+        print("SUGGEST_APIS.PY: No image data provided for suggest_scene_description.")
+        return error_response('No image data provided', 400)
+
+    if 'imageData' in request_json:
+        try:
+            image_part = decode_image_part(request_json['imageData'])
+        except Exception as e:
+            print(f"SUGGEST_APIS.PY: Failed to decode image data: {e}")
+            return error_response(f'Failed to decode image data: {e}', 400)
+    else:
+        if not SNAPSHOT_STORAGE_BUCKET:
+            print("SUGGEST_APIS.PY: SNAPSHOT_STORAGE_BUCKET not set; cannot read snapshots by gcsObjectName.")
+            return error_response('Reading snapshots by gcsObjectName is not configured on the server.', 503)
+        try:
+            image_part = load_snapshot_image_part(str(request_json['gcsObjectName']), decoded_token)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        except SnapshotForbidden as e:
+            return error_response(str(e), 403)
+        except SnapshotNotFound as e:
+            return error_response(str(e), 404)
+        except Exception as e:
+            print(f"SUGGEST_APIS.PY: Failed to read snapshot {request_json['gcsObjectName']}: {e}")
+            return error_response(f'Failed to read snapshot: {e}', 502)
+
+    content = [SCENE_DESCRIPTION_PROMPT, image_part]
+    stream_format = get_stream_format(req, request_json)
+
+    try:
+        model, error = get_gemini_model()
+        if error:
+            print(f"SUGGEST_APIS.PY: Error getting Gemini model: {error}")
+            return error_response(error, 500)
+
+        if stream_format:
+            print(f"SUGGEST_APIS.PY: Streaming Gemini scene description as {stream_format}...")
+            return https_fn.Response(
+                stream_scene_description(model, content, stream_format),
+                status=200,
+                mimetype=STREAM_MIMETYPES[stream_format],
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        print("SUGGEST_APIS.PY: Calling Gemini for scene description...")
+        response = generate_content_limited(model, content)
+        suggested_description = response.text.strip()
+        if not suggested_description:
+            suggested_description = SCENE_DESCRIPTION_FALLBACK
+
+        print(f"SUGGEST_APIS.PY: Gemini response for scene description: {suggested_description[:100]}...")
+        return json_response({'status': 'success', 'sceneDescription': suggested_description}, status=200)
+
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Gemini API error for scene description: {e}")
+        return error_response(f'Error generating scene description: {e}', gemini_error_status(e))
+
+
+@https_fn.on_request(cors=cors_options_config)
+@instrumented
+def suggest_detection_targets(req: https_fn.Request) -> https_fn.Response:
+    print("SUGGEST_APIS.PY: suggest_detection_targets invoked.")
+    decoded_token, error_message = verify_firebase_token(req)
+    if error_message:
+        print(f"SUGGEST_APIS.PY: Authentication failed: {error_message}")
+        return error_response(error_message, 401)
+
+    if not GEMINI_API_KEY:
+        print("SUGGEST_APIS.PY: Gemini API key not available.")
+        return error_response('AI service not configured (API Key missing).', 503)
+
+    request_json = req.get_json(silent=True)
+    if request_json is None or 'cameraSceneContext' not in request_json:
+        print("SUGGEST_APIS.PY: Missing cameraSceneContext.")
+        return error_response('Missing cameraSceneContext in request body', 400)
+
+    camera_scene_context = request_json.get('cameraSceneContext', '')
+    scene_description = request_json.get('sceneDescription', '') # This can be empty
+
+    prompt = build_detection_targets_prompt(camera_scene_context, scene_description)
+    try:
+        model, error = get_gemini_model(model_name="gemini-pro") # Text model for this
+        if error:
+            print(f"SUGGEST_APIS.PY: Error getting Gemini model: {error}")
+            return error_response(error, 500)
+
+        print("SUGGEST_APIS.PY: Calling Gemini for detection targets...")
+        response = generate_content_limited(model, prompt)
+        suggested_targets_string = clean_detection_targets(response.text)
+
+        print(f"SUGGEST_APIS.PY: Gemini response for detection targets: {suggested_targets_string}")
+        return json_response({'status': 'success', 'suggestedTargets': suggested_targets_string}, status=200)
+
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Gemini API error for detection targets: {e}")
+        return error_response(f'Error generating detection targets: {e}', gemini_error_status(e))
+
+
+@https_fn.on_request(cors=cors_options_config)
+@instrumented
+def suggest_alert_events(req: https_fn.Request) -> https_fn.Response:
+    print("SUGGEST_APIS.PY: suggest_alert_events invoked.")
+    decoded_token, error_message = verify_firebase_token(req)
+    if error_message:
+        print(f"SUGGEST_APIS.PY: Authentication failed: {error_message}")
+        return error_response(error_message, 401)
+
+    if not GEMINI_API_KEY:
+        print("SUGGEST_APIS.PY: Gemini API key not available.")
+        return error_response('AI service not configured (API Key missing).', 503)
+
+    request_json = req.get_json(silent=True)
+    if request_json is None or 'cameraSceneContext' not in request_json or 'aiDetectionTarget' not in request_json:
+        print("SUGGEST_APIS.PY: Missing required data (cameraSceneContext or aiDetectionTarget).")
+        return error_response('Missing required data (cameraSceneContext or aiDetectionTarget) in request body', 400)
+
+    camera_scene_context = request_json.get('cameraSceneContext', '')
+    ai_detection_target = request_json.get('aiDetectionTarget', '')
+
+    prompt = build_alert_events_prompt(camera_scene_context, ai_detection_target)
+    try:
+        model, error = get_gemini_model(model_name="gemini-pro") # Text model
+        if error:
+            print(f"SUGGEST_APIS.PY: Error getting Gemini model: {error}")
+            return error_response(error, 500)
+
+        print("SUGGEST_APIS.PY: Calling Gemini for alert events (VSS format)...")
+        response = generate_content_limited(model, prompt)
+        raw_response_text = response.text.strip()
+
+        try:
+            parsed_response = parse_gemini_json(raw_response_text, validate=is_valid_alert_events)
+            print(f"SUGGEST_APIS.PY: Gemini response for alert events (parsed): {parsed_response}")
+            return json_response({'status': 'success', **parsed_response}, status=200)
+
+        except json.JSONDecodeError as e:
+            print(f"SUGGEST_APIS.PY: Warning: Gemini response was not valid JSON for alert events. Error: {e}")
+            # Try to provide a more helpful error message if parsing fails
+            error_message = f"AI model did not return valid JSON. Raw output: '{raw_response_text[:200]}...'"
+            return error_response(error_message, 500)
+        except ValueError as e: # JSON was found but did not match the expected structure
+             print(f"SUGGEST_APIS.PY: Error validating Gemini response structure: {e}")
+             return error_response(ALERT_EVENTS_STRUCTURE_ERROR, 500)
+
+
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Gemini API error for alert events: {e}")
+        return error_response(f'Error generating alert events: {e}', gemini_error_status(e))
+
+
+def build_camera_setup_prompt(camera_scene_context: str, scene_description: str, has_image: bool) -> str:
+    if has_image:
+        description_instruction = "First describe the scene in the attached image in detail, focusing on objects, environment, and potential activities."
+    else:
+        description_instruction = "Use the scene description below as-is for 'sceneDescription'."
+    return f"""You are configuring an AI video monitoring camera. {description_instruction}
+Then, based on the camera scene context and the scene description, suggest:
+1. 'suggestedTargets': a concise comma-separated list of relevant objects or events that an AI detection system should focus on detecting (e.g., "Person walking, Vehicle, Theft, Animal, Violence").
+2. 'suggestedAlertName': a concise overall 'Alert Name' for an alert configuration (e.g., "Warehouse Zone A Monitoring").
+3. 'suggestedEventNames': a list of specific, concise 'Event Names' (strings, like 'Fire', 'Person Detected', or 'Vehicle Idling Too Long') suitable for direct use in an API that expects an array of event strings like ["Fire", "More than 5 people"].
+
+Format the output as a single JSON object with 'sceneDescription' (string), 'suggestedTargets' (string), 'suggestedAlertName' (string) and 'suggestedEventNames' (array of strings) keys, with no other text.
+
+Camera Scene Context: {camera_scene_context}
+Scene Description (if available): {scene_description if scene_description else 'Not provided.'}
+"""
+
+
+def elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def is_valid_camera_setup(parsed_response) -> bool:
+    return is_valid_alert_events(parsed_response) and \
+        isinstance(parsed_response.get('sceneDescription'), str) and \
+        isinstance(parsed_response.get('suggestedTargets'), str)
+
+
+def parse_camera_setup_response(raw_response_text: str):
+    """Returns the parsed combined suggestion, or None if the model did not follow the JSON contract."""
+    try:
+        return parse_gemini_json(raw_response_text, validate=is_valid_camera_setup)
+    except ValueError: # Includes json.JSONDecodeError
+        return None
+
+
+def run_chained_camera_setup(camera_scene_context: str, scene_description: str, image_part, timings: dict) -> dict:
+    """
+    Runs the three wizard stages back to back on the server, feeding each stage's output
+    into the next. Used when the single combined call does not return usable JSON.
+    Raises on Gemini errors or when the alert events stage returns an invalid structure.
+    """
+    if image_part is not None and not scene_description:
+        stage_start = time.perf_counter()
+        vision_model, error = get_gemini_model()
+        if error:
+            raise RuntimeError(error)
+        scene_description = generate_content_limited(vision_model, [SCENE_DESCRIPTION_PROMPT, image_part]).text.strip() or SCENE_DESCRIPTION_FALLBACK
+        timings['sceneDescription'] = elapsed_ms(stage_start)
+
+    text_model, error = get_gemini_model(model_name="gemini-pro")
+    if error:
+        raise RuntimeError(error)
+
+    stage_start = time.perf_counter()
+    targets_response = generate_content_limited(text_model, build_detection_targets_prompt(camera_scene_context, scene_description))
+    suggested_targets = clean_detection_targets(targets_response.text)
+    timings['detectionTargets'] = elapsed_ms(stage_start)
+
+    stage_start = time.perf_counter()
+    alerts_response = generate_content_limited(text_model, build_alert_events_prompt(camera_scene_context, suggested_targets))
+    try:
+        alert_events = parse_gemini_json(alerts_response.text, validate=is_valid_alert_events)
+    except json.JSONDecodeError:
+        raise
+    except ValueError:
+        raise ValueError(ALERT_EVENTS_STRUCTURE_ERROR)
+    timings['alertEvents'] = elapsed_ms(stage_start)
+
+    return {
+        'sceneDescription': scene_description or '',
+        'suggestedTargets': suggested_targets,
+        'suggestedAlertName': alert_events['suggestedAlertName'],
+        'suggestedEventNames': alert_events['suggestedEventNames'],
+    }
+
+
+@https_fn.on_request(cors=cors_options_config)
+@instrumented
+def suggest_camera_setup(req: https_fn.Request) -> https_fn.Response:
+    """
+    One-shot camera onboarding suggestions: scene description, detection targets, alert
+    name and alert events in a single authenticated call.
+    Tries one combined structured Gemini call first and falls back to chaining the
+    individual stages server-side. Per-stage timings are returned in 'timingsMs'.
+    """
+    print("SUGGEST_APIS.PY: suggest_camera_setup invoked.")
+    request_start = time.perf_counter()
+    decoded_token, error_message = verify_firebase_token(req)
+    if error_message:
+        print(f"SUGGEST_APIS.PY: Authentication failed for suggest_camera_setup: {error_message}")
+        return error_response(error_message, 401)
+
+    if not GEMINI_API_KEY:
+        print("SUGGEST_APIS.PY: Gemini API key not available for suggest_camera_setup.")
+        return error_response('AI service not configured (API Key missing).', 503)
+
+    request_json = req.get_json(silent=True)
+    if request_json is None or 'cameraSceneContext' not in request_json:
+        print("SUGGEST_APIS.PY: Missing cameraSceneContext for suggest_camera_setup.")
+        return error_response('Missing cameraSceneContext in request body', 400)
+
+    camera_scene_context = request_json.get('cameraSceneContext', '')
+    scene_description = request_json.get('sceneDescription', '')
+    timings = {}
+
+    image_part = None
+    if request_json.get('imageData'):
+        stage_start = time.perf_counter()
+        try:
+            image_part = decode_image_part(request_json['imageData'])
+        except Exception as e:
+            print(f"SUGGEST_APIS.PY: Failed to decode image data: {e}")
+            return error_response(f'Failed to decode image data: {e}', 400)
+        timings['decodeImage'] = elapsed_ms(stage_start)
+
+    describe_image = image_part is not None and not scene_description
+    try:
+        model, error = get_gemini_model() if describe_image else get_gemini_model(model_name="gemini-pro")
+        if error:
+            print(f"SUGGEST_APIS.PY: Error getting Gemini model: {error}")
+            return error_response(error, 500)
+
+        prompt = build_camera_setup_prompt(camera_scene_context, scene_description, describe_image)
+        content = [prompt, image_part] if describe_image else prompt
+
+        print("SUGGEST_APIS.PY: Calling Gemini for combined camera setup suggestions...")
+        stage_start = time.perf_counter()
+        response = generate_content_limited(model, content)
+        suggestions = parse_camera_setup_response(response.text.strip())
+        timings['combined'] = elapsed_ms(stage_start)
+        mode = 'combined'
+
+        if suggestions is None:
+            print("SUGGEST_APIS.PY: Combined response did not match the expected structure, chaining individual stages.")
+            suggestions = run_chained_camera_setup(camera_scene_context, scene_description, image_part, timings)
+            mode = 'chained'
+        elif not describe_image:
+            suggestions['sceneDescription'] = scene_description
+
+    except json.JSONDecodeError as e:
+        print(f"SUGGEST_APIS.PY: Warning: Gemini response was not valid JSON for camera setup alert events. Error: {e}")
+        return error_response(f'AI model did not return valid JSON: {e}', 500)
+    except ValueError as e:
+        print(f"SUGGEST_APIS.PY: Error validating Gemini response structure for camera setup: {e}")
+        return error_response(str(e), 500)
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Gemini API error for camera setup: {e}")
+        return error_response(f'Error generating camera setup suggestions: {e}', gemini_error_status(e))
+
+    timings['total'] = elapsed_ms(request_start)
+    print(f"SUGGEST_APIS.PY: Camera setup suggestions ready ({mode}), timings: {timings}")
+    return json_response({
+        'status': 'success',
+        'sceneDescription': suggestions['sceneDescription'],
+        'suggestedTargets': suggestions['suggestedTargets'],
+        'suggestedAlertName': suggestions['suggestedAlertName'],
+        'suggestedEventNames': suggestions['suggestedEventNames'],
+        'mode': mode,
+        'timingsMs': timings,
+    }, status=200)
+
+
+# --- Batch suggestions for bulk camera configuration ---
+# Several cameras are packed into one prompt until the estimated prompt size reaches
+# GEMINI_BATCH_TOKEN_BUDGET (or GEMINI_BATCH_MAX_ITEMS cameras); the model answers with
+# one JSON object keyed by cameraId. Chunks run concurrently through the Gemini limiter.
+GEMINI_BATCH_TOKEN_BUDGET = int(os.environ.get('GEMINI_BATCH_TOKEN_BUDGET', '6000'))
+GEMINI_BATCH_MAX_ITEMS = int(os.environ.get('GEMINI_BATCH_MAX_ITEMS', '25'))
+BATCH_MAX_CAMERAS = int(os.environ.get('BATCH_MAX_CAMERAS', '500'))
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(items: list, base_prompt: str) -> list:
+    """Greedily groups items so each prompt stays within the token budget."""
+    base_tokens = estimate_tokens(base_prompt)
+    batches, current, current_tokens = [], [], base_tokens
+    for item in items:
+        item_tokens = estimate_tokens(json.dumps(item))
+        if current and (current_tokens + item_tokens > GEMINI_BATCH_TOKEN_BUDGET or len(current) >= GEMINI_BATCH_MAX_ITEMS):
+            batches.append(current)
+            current, current_tokens = [], base_tokens
+        current.append(item)
+        current_tokens += item_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+BATCH_DETECTION_TARGETS_PROMPT = """For each camera in the JSON array below, use its camera scene context and scene description to suggest a concise comma-separated list of relevant objects or events that an AI detection system should focus on detecting (e.g., "Person walking, Vehicle, Theft, Animal, Violence").
+
+Format the output as a single JSON object keyed by cameraId, where each value is an object with a 'suggestedTargets' (string) key. Include every cameraId exactly once and no other text.
+
+Example Output:
+{"cam-1": {"suggestedTargets": "Person walking, Vehicle, Theft"}}
+
+Cameras:
+"""
+
+BATCH_ALERT_EVENTS_PROMPT = """For each camera in the JSON array below, use its camera scene context and AI detection targets to suggest:
+1. A concise overall 'Alert Name' for an alert configuration (e.g., "Warehouse Zone A Monitoring").
+2. A list of specific, concise 'Event Names' (strings, like 'Fire', 'Person Detected', or 'Vehicle Idling Too Long') suitable for direct use in an API that expects an array of event strings like ["Fire", "More than 5 people"].
+
+Format the output as a single JSON object keyed by cameraId, where each value is an object with 'suggestedAlertName' (string) and 'suggestedEventNames' (array of strings) keys. Include every cameraId exactly once and no other text.
+
+Example Output:
+{"cam-1": {"suggestedAlertName": "Security Breach Alert", "suggestedEventNames": ["Unauthorized Entry", "Forced Door"]}}
+
+Cameras:
+"""
+
+
+def is_valid_detection_targets(item_result) -> bool:
+    return isinstance(item_result, dict) and isinstance(item_result.get('suggestedTargets'), str)
+
+
+def run_suggestion_batch(model, base_prompt: str, batch: list, validate_item, results: dict, errors: dict):
+    camera_ids = [item['cameraId'] for item in batch]
+    try:
+        response = generate_content_limited(model, base_prompt + json.dumps(batch))
+        parsed_response = parse_gemini_json(response.text, validate=lambda value: isinstance(value, dict))
+    except Exception as e:
+        print(f"SUGGEST_APIS.PY: Batch of {len(batch)} cameras failed: {e}")
+        for camera_id in camera_ids:
+            errors[camera_id] = f'Error generating suggestions: {e}'
+        return
+
+    for camera_id in camera_ids:
+        item_result = parsed_response.get(camera_id)
+        if not validate_item(item_result):
+            errors[camera_id] = "AI model did not return the expected structure for this camera."
+        else:
+            results[camera_id] = item_result
+
+
+def handle_batch_suggestion_request(req: https_fn.Request, handler_name: str, required_keys: tuple, optional_keys: tuple, base_prompt: str, validate_item, normalize_item) -> https_fn.Response:
+    print(f"SUGGEST_APIS.PY: {handler_name} invoked.")
+    decoded_token, error_message = verify_firebase_token(req)
+    if error_message:
+        print(f"SUGGEST_APIS.PY: Authentication failed for {handler_name}: {error_message}")
+        return error_response(error_message, 401)
+
+    if not GEMINI_API_KEY:
+        print(f"SUGGEST_APIS.PY: Gemini API key not available for {handler_name}.")
+        return error_response('AI service not configured (API Key missing).', 503)
+
+    request_json = req.get_json(silent=True)
+    cameras = request_json.get('cameras') if isinstance(request_json, dict) else None
+    if not isinstance(cameras, list) or not cameras:
+        return error_response("'cameras' must be a non-empty array", 400)
+    if len(cameras) > BATCH_MAX_CAMERAS:
+        return error_response(f'At most {BATCH_MAX_CAMERAS} cameras can be submitted per request', 400)
+
+    items, seen_ids = [], set()
+    for camera in cameras:
+        if not isinstance(camera, dict) or not camera.get('cameraId') or any(key not in camera for key in required_keys):
+            return error_response(f"Each camera requires cameraId and {', '.join(required_keys)}", 400)
+        camera_id = str(camera['cameraId'])
+        if camera_id in seen_ids:
+            return error_response(f'Duplicate cameraId: {camera_id}', 400)
+        seen_ids.add(camera_id)
+        items.append({'cameraId': camera_id, **{key: camera.get(key) or '' for key in required_keys + optional_keys}})
+
+    model, error = get_gemini_model(model_name="gemini-pro")
+    if error:
+        print(f"SUGGEST_APIS.PY: Error getting Gemini model: {error}")
+        return error_response(error, 500)
+
+    batches = pack_batches(items, base_prompt)
+    print(f"SUGGEST_APIS.PY: {handler_name} packing {len(items)} cameras into {len(batches)} Gemini calls.")
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=min(len(batches), GEMINI_MAX_CONCURRENCY)) as executor:
+        for batch in batches:
+            submit_in_context(executor, run_suggestion_batch, model, base_prompt, batch, validate_item, results, errors)
+
+    results = {camera_id: normalize_item(item_result) for camera_id, item_result in results.items()}
+
+    if not results:
+        return json_response({'status': 'error', 'message': 'No suggestions could be generated', 'errors': errors}, status=500)
+    return json_response({'status': 'success', 'results': results, 'errors': errors, 'batches': len(batches)}, status=200)
+
+
+@https_fn.on_request(cors=cors_options_config)
+@instrumented
+def suggest_detection_targets_batch(req: https_fn.Request) -> https_fn.Response:
+    """
+    Batch variant of suggest_detection_targets.
+    Body: {"cameras": [{"cameraId", "cameraSceneContext", "sceneDescription"?}, ...]}
+    Returns {"results": {cameraId: {"suggestedTargets"}}, "errors": {cameraId: message}}.
+    """
+    return handle_batch_suggestion_request(
+        req, 'suggest_detection_targets_batch', ('cameraSceneContext',), ('sceneDescription',),
+        BATCH_DETECTION_TARGETS_PROMPT, is_valid_detection_targets,
+        normalize_item=lambda item: {'suggestedTargets': clean_detection_targets(item['suggestedTargets'])}
+    )
+
+
+@https_fn.on_request(cors=cors_options_config)
+@instrumented
+def suggest_alert_events_batch(req: https_fn.Request) -> https_fn.Response:
+    """
+    Batch variant of suggest_alert_events.
+    Body: {"cameras": [{"cameraId", "cameraSceneContext", "aiDetectionTarget"}, ...]}
+    Returns {"results": {cameraId: {"suggestedAlertName", "suggestedEventNames"}}, "errors": {...}}.
+    """
+    return handle_batch_suggestion_request(
+        req, 'suggest_alert_events_batch', ('cameraSceneContext', 'aiDetectionTarget'), (),
+        BATCH_ALERT_EVENTS_PROMPT, is_valid_alert_events,
+        normalize_item=lambda item: {'suggestedAlertName': item['suggestedAlertName'], 'suggestedEventNames': item['suggestedEventNames']}
+    )
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for Gemini JSON extraction.
+
+Compares the previous regex + find/rfind approach (re-implemented here without its
+logging) against json_extract.extract_json() on every sample in gemini_outputs.json.
+
+Usage (from functions/):
+    python benchmarks/bench_json_extract.py [--number 2000]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai'))
+
+from json_extract import extract_json  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gemini_outputs.json')
+
+
+def legacy_parse(response_text: str):
+    match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", response_text, re.DOTALL)
+    if match:
+        json_text = match.group(1).strip()
+    else:
+        first_bracket = last_bracket = -1
+        if '{' in response_text and '}' in response_text:
+            first_bracket, last_bracket = response_text.find('{'), response_text.rfind('}')
+        elif '[' in response_text and ']' in response_text:
+            first_bracket, last_bracket = response_text.find('['), response_text.rfind(']')
+        if first_bracket != -1 and first_bracket < last_bracket:
+            json_text = response_text[first_bracket:last_bracket + 1].strip()
+        else:
+            json_text = response_text.strip()
+    return json.loads(json_text)
+
+
+def new_parse(response_text: str):
+    return extract_json(response_text)
+
+
+def outcome(parse, text):
+    try:
+        return 'ok', parse(text)
+    except ValueError as e:  # Includes json.JSONDecodeError
+        return type(e).__name__, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help='iterations per sample')
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+
+    print(f"{'sample':<28} {'chars':>6} {'legacy us':>10} {'new us':>8} {'speedup':>8}  legacy/new outcome")
+    legacy_total = new_total = 0.0
+    for sample in corpus:
+        text = sample['text']
+        legacy_us = timeit.timeit(lambda: outcome(legacy_parse, text), number=args.number) / args.number * 1e6
+        new_us = timeit.timeit(lambda: outcome(new_parse, text), number=args.number) / args.number * 1e6
+        legacy_total += legacy_us
+        new_total += new_us
+        legacy_result, new_result = outcome(legacy_parse, text)[0], outcome(new_parse, text)[0]
+        print(f"{sample['name']:<28} {len(text):>6} {legacy_us:>10.2f} {new_us:>8.2f} {legacy_us / new_us:>7.2f}x  {legacy_result}/{new_result}")
+    print(f"{'total':<28} {'':>6} {legacy_total:>10.2f} {new_total:>8.2f} {legacy_total / new_total:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold-start import benchmark for the function entry points.
+
+Imports each entry module in a fresh interpreter with `python -X importtime` and reports
+the cumulative import time of the module itself plus its heaviest dependencies. Entries
+are given as codebase:module and imported from that codebase directory. Run it in the
+codebase's virtualenv, after sync_common.py, so the numbers reflect the deployed set.
+
+Usage (from functions/):
+    python benchmarks/cold_start.py [--runs 5] [--top 8] [codebase:module ...]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ['core:main', 'vss_proxy:main', 'vss_proxy:metrics', 'ai:main']
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_profile(entry: str) -> dict:
+    """Returns {module_name: cumulative_us} for top-level imports seen while importing `entry`."""
+    codebase, _, module = entry.rpartition(':')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.join(FUNCTIONS_DIR, codebase), capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative_us, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+            if indent <= 1:  # Only direct children of the interpreter, i.e. top-level packages.
+                profile[name] = cumulative_us
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per module (median is reported)')
+    parser.add_argument('--top', type=int, default=8, help='heaviest top-level imports to list per module')
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            profiles = [import_profile(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module}: {e}\n")
+            continue
+        totals = [sum(profile.values()) for profile in profiles]
+        print(f"{module}: median {statistics.median(totals) / 1000:.1f} ms total import time over {args.runs} runs")
+        names = set().union(*profiles)
+        medians = {name: statistics.median(profile.get(name, 0) for profile in profiles) for name in names}
+        for name, cumulative_us in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Fuzz check for json_extract against the Gemini output corpus.
+
+Each corpus sample is mutated (truncation, prose and stray brackets around it, fence
+variations, random byte flips). For every mutation the extractor must either return a
+value or raise ValueError/json.JSONDecodeError, and whenever a known-good JSON payload is
+embedded intact it must be the value returned.
+
+Usage (from functions/):
+    python benchmarks/fuzz_json_extract.py [--iterations 20000] [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai'))
+
+from json_extract import extract_json, find_json_text  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gemini_outputs.json')
+NOISE = ['', 'Sure!', 'Here you go:', 'Note: values are (approximate).', 'see [1]', '}', ']', '"', '\\', '```', '```json', '{oops', 'a "quoted" word']
+
+
+def embedded_payload_cases(rng, payload_text):
+    """
+    Mutations that keep the payload intact, so it must be what gets returned. The prefix
+    holds no JSON and opens no bracket: an unclosed prefix bracket would make the payload
+    part of a larger (invalid) candidate, which the extractor deliberately skips as a unit.
+    """
+    prefix = rng.choice([n for n in NOISE if find_json_text(n) is None and '{' not in n and '[' not in n])
+    suffix = rng.choice(NOISE)
+    fence = rng.choice([('', ''), ('```json\n', '\n```'), ('```\n', '\n```')])
+    return f"{prefix}\n{fence[0]}{payload_text}{fence[1]}\n{suffix}"
+
+
+def random_mutation(rng, text):
+    choice = rng.randrange(4)
+    if choice == 0 and text:
+        return text[:rng.randrange(len(text))]
+    if choice == 1 and text:
+        pos = rng.randrange(len(text))
+        return text[:pos] + rng.choice('{}[]"\\,:') + text[pos + 1:]
+    if choice == 2:
+        return rng.choice(NOISE) + text + rng.choice(NOISE)
+    return text.replace('```json', '```').replace('\n', rng.choice(['\n', ' ', '\r\n']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+
+    payloads = []
+    for sample in corpus:
+        try:
+            payloads.append(extract_json(sample['text']))
+        except ValueError:
+            pass
+
+    failures = 0
+    for _ in range(args.iterations):
+        if rng.random() < 0.5:
+            payload = rng.choice(payloads)
+            text = embedded_payload_cases(rng, json.dumps(payload, indent=rng.choice([None, 2])))
+            result = extract_json(text)
+            if result != payload:
+                failures += 1
+                print(f"MISMATCH: expected {payload!r}\n  got {result!r}\n  from {text!r}")
+        else:
+            text = random_mutation(rng, rng.choice(corpus)['text'])
+            try:
+                extract_json(text)
+            except ValueError:  # Includes json.JSONDecodeError
+                pass
+            except Exception as e:
+                failures += 1
+                print(f"CRASH: {type(e).__name__}: {e} on {text!r}")
+
+    print(f"{args.iterations} iterations, {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+# Helpers shared by every functions codebase (core, vss_proxy, ai).
+# This directory is the source of truth; sync_common.py copies it into each codebase
+# before deploy because Firebase only uploads a codebase's own source directory.
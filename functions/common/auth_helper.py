@@ -0,0 +1,76 @@
+import os
+import threading
+from firebase_functions import https_fn
+from common.instrumentation import phase
+
+# firebase_admin (and the google-auth/grpc stack behind it) is imported on first use so
+# that modules which never verify a token or touch Firestore don't pay for it at cold start.
+_firebase_init_lock = threading.Lock()
+# A verified token is remembered on the request, so wrappers that need the uid before the
+# handler runs (e.g. common/idempotency.py) don't verify it twice.
+DECODED_TOKEN_ENVIRON_KEY = 'octavision.decoded_token'
+
+
+def ensure_firebase_app():
+    """Initializes the Firebase Admin SDK once per instance and returns the firebase_admin module."""
+    import firebase_admin
+    if firebase_admin._apps:
+        return firebase_admin
+    from firebase_admin import credentials
+    with _firebase_init_lock:
+        if firebase_admin._apps:
+            return firebase_admin
+        try:
+            # For local development, GOOGLE_APPLICATION_CREDENTIALS can be set in functions/.env
+            # When deployed to Cloud Functions, it uses Application Default Credentials.
+            cred_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+            if cred_path:
+                print(f"AUTH_HELPER.PY: Initializing Firebase Admin SDK with explicit credentials from: {cred_path}")
+                cred = credentials.Certificate(cred_path)
+            else:
+                print("AUTH_HELPER.PY: Initializing Firebase Admin SDK with Application Default Credentials.")
+                cred = credentials.ApplicationDefault()
+            firebase_admin.initialize_app(cred)
+        except ValueError:
+            print("AUTH_HELPER.PY: Firebase Admin SDK already initialized or error during initialization.")
+    return firebase_admin
+
+
+def verify_firebase_token(req: https_fn.Request):
+    cached_token = req.environ.get(DECODED_TOKEN_ENVIRON_KEY)
+    if cached_token is not None:
+        return cached_token, None
+
+    auth_header = req.headers.get('Authorization')
+    if not auth_header:
+        return None, "Authorization header missing"
+
+    id_token_parts = auth_header.split('Bearer ')
+    if len(id_token_parts) < 2 or not id_token_parts[1]:
+        return None, "Bearer token not found or malformed in Authorization header"
+
+    id_token = id_token_parts[1]
+
+    ensure_firebase_app()
+    from firebase_admin import auth
+
+    try:
+        with phase('auth'):
+            decoded_token = auth.verify_id_token(id_token)
+        req.environ[DECODED_TOKEN_ENVIRON_KEY] = decoded_token
+        return decoded_token, None
+    except auth.InvalidIdTokenError as e:
+        print(f"Invalid ID token: {e}")
+        return None, f"Invalid ID token: {e}"
+    except auth.ExpiredIdTokenError as e:
+        print(f"Expired ID token: {e}")
+        return None, f"Expired ID token: {e}"
+    except auth.RevokedIdTokenError as e:
+        print(f"Revoked ID token: {e}")
+        return None, f"Revoked ID token: {e}"
+    except auth.UserDisabledError as e:
+        print(f"User disabled: {e}")
+        return None, f"User account has been disabled: {e}"
+    except Exception as e:
+        print(f"Token verification failed: {e}")
+        return None, f"Token verification failed: {e}"
@@ -0,0 +1,15 @@
+import os
+
+# Read allowed origins from environment variable for CORS
+# Fallback to a restrictive default if not set.
+CORS_ALLOWED_ORIGINS_STR = os.environ.get(
+    'CORS_ALLOWED_ORIGINS',
+    # Default for local development, ensure this is appropriate for production
+    "http://localhost:9002,https://6000-idx-studio-1745601753440.cluster-iesosxm5fzdewqvhlwn5qivgry.cloudworkstations.dev"
+)
+if CORS_ALLOWED_ORIGINS_STR:
+    allowed_origins_list = [origin.strip() for origin in CORS_ALLOWED_ORIGINS_STR.split(',')]
+    print(f"CORS.PY: CORS allowed origins: {allowed_origins_list}")
+else:
+    print("CORS.PY: Warning: CORS_ALLOWED_ORIGINS environment variable not set or empty. CORS might be restrictive.")
+    allowed_origins_list = []
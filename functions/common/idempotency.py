@@ -0,0 +1,251 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from firebase_functions import https_fn
+from common.auth_helper import verify_firebase_token
+from common.instrumentation import annotate, phase
+from common.responses import decompress_body, error_response, make_response
+
+# Idempotency-Key support for handlers that create things in VSS (streams, files,
+# summarization jobs). A client that retries with the same key gets the first attempt's
+# response back instead of a second VSS call:
+#
+# * Keys are scoped per user and operation. The first request claims the key (state
+#   'in_progress'); once it finishes, its status, content type and body are stored
+#   ('completed') and replayed with an `Idempotent-Replayed: true` header.
+# * A concurrent request with the same key waits for the first one (on an in-process
+#   event on the same instance, by polling the record otherwise) for up to
+#   IDEMPOTENCY_WAIT_SECONDS, then gets 409 with Retry-After.
+# * 5xx, 408, 409 and 429 responses are not stored, so the client can retry them. A
+#   claim whose owner died is taken over after IDEMPOTENCY_LOCK_SECONDS.
+# * Reusing a key for a different request body gets 422. Multipart bodies (file uploads)
+#   are compared by length only, so an upload is never read just to fingerprint it.
+#
+# Records live in the Firestore collection IDEMPOTENCY_COLLECTION with an `expireAt`
+# field (add a TTL policy on it). IDEMPOTENCY_STORE=memory keeps them in process
+# memory instead, for the emulator and local runs.
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_STORE = os.environ.get('IDEMPOTENCY_STORE', 'firestore')
+IDEMPOTENCY_COLLECTION = 'idempotencyKeys'
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', '600'))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '60'))
+IDEMPOTENCY_POLL_SECONDS = 0.5
+IDEMPOTENCY_MAX_KEY_LENGTH = 255
+# Firestore documents are limited to 1 MiB; larger responses are not stored.
+IDEMPOTENCY_MAX_BODY_BYTES = 512 * 1024
+NOT_STORED_STATUSES = (408, 409, 429)
+
+
+class MemoryIdempotencyStore:
+    """Per-instance record store with the same interface as the Firestore one."""
+
+    def __init__(self):
+        self.records = {}
+        self.lock = threading.Lock()
+
+    def claim(self, record_id: str, fingerprint: str, meta: dict):
+        """Returns (True, None) if the caller now owns the key, else (False, existing record)."""
+        now = time.time()
+        with self.lock:
+            record = self.records.get(record_id)
+            if record is not None and record['expiresAt'] < now:
+                record = None
+            if record is None or (record['state'] == 'in_progress' and record['lockedUntil'] < now):
+                self.records[record_id] = {
+                    **meta, 'state': 'in_progress', 'fingerprint': fingerprint,
+                    'lockedUntil': now + IDEMPOTENCY_LOCK_SECONDS, 'expiresAt': now + IDEMPOTENCY_TTL_SECONDS,
+                }
+                return True, None
+            return False, dict(record)
+
+    def get(self, record_id: str):
+        with self.lock:
+            record = self.records.get(record_id)
+            return dict(record) if record is not None else None
+
+    def complete(self, record_id: str, result: dict) -> None:
+        with self.lock:
+            if record_id in self.records:
+                self.records[record_id].update(result, state='completed')
+
+    def release(self, record_id: str) -> None:
+        with self.lock:
+            self.records.pop(record_id, None)
+
+
+class FirestoreIdempotencyStore:
+    """Records in Firestore, shared by all instances."""
+
+    def _ref(self, record_id: str):
+        from common.vss import get_firestore_client
+        return get_firestore_client().collection(IDEMPOTENCY_COLLECTION).document(record_id)
+
+    def claim(self, record_id: str, fingerprint: str, meta: dict):
+        from google.api_core.exceptions import AlreadyExists, FailedPrecondition
+        from common.vss import get_firestore_client
+        ref = self._ref(record_id)
+        now = time.time()
+        claim = {
+            **meta, 'state': 'in_progress', 'fingerprint': fingerprint,
+            'lockedUntil': now + IDEMPOTENCY_LOCK_SECONDS,
+            'expireAt': datetime.fromtimestamp(now + IDEMPOTENCY_TTL_SECONDS, timezone.utc),
+        }
+        try:
+            ref.create(claim)
+            return True, None
+        except AlreadyExists:
+            pass
+        snapshot = ref.get()
+        record = snapshot.to_dict() if snapshot.exists else None
+        if record is None:
+            # Deleted (released) between create() and get(); claim it again.
+            return self.claim(record_id, fingerprint, meta)
+        expired = record.get('expireAt') is not None and record['expireAt'].timestamp() < now
+        if expired or (record.get('state') == 'in_progress' and record.get('lockedUntil', 0) < now):
+            # Take over only if nobody else changed the record since we read it.
+            try:
+                ref.set(claim, option=get_firestore_client().write_option(last_update_time=snapshot.update_time))
+                return True, None
+            except FailedPrecondition:
+                snapshot = ref.get()
+                record = snapshot.to_dict() if snapshot.exists else record
+        return False, record
+
+    def get(self, record_id: str):
+        snapshot = self._ref(record_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def complete(self, record_id: str, result: dict) -> None:
+        self._ref(record_id).update({**result, 'state': 'completed'})
+
+    def release(self, record_id: str) -> None:
+        self._ref(record_id).delete()
+
+
+idempotency_store = MemoryIdempotencyStore() if IDEMPOTENCY_STORE == 'memory' else FirestoreIdempotencyStore()
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def request_fingerprint(req: https_fn.Request) -> str:
+    digest = hashlib.sha256(f"{req.method} {req.path}?{req.query_string.decode('latin-1')}\n".encode())
+    if req.mimetype.startswith('multipart/'):
+        digest.update(f"multipart:{req.content_length}".encode())
+    else:
+        digest.update(req.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def replay_response(record: dict) -> https_fn.Response:
+    annotate(idempotentReplay=True)
+    # Bodies are stored uncompressed and compressed again for whoever is asking now.
+    return make_response(record.get('body') or b'', status=record['status'], mimetype=record.get('mimetype'),
+                         headers={'Idempotent-Replayed': 'true'})
+
+
+def _wait_for_completion(record_id: str, fingerprint: str, meta: dict, record: dict):
+    """
+    Polls a record another request is working on. Returns (claimed, record) like claim():
+    claimed is True if the other request gave up the key and this one now owns it.
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while record is not None and record.get('state') != 'completed' and time.monotonic() < deadline:
+        time.sleep(IDEMPOTENCY_POLL_SECONDS)
+        record = idempotency_store.get(record_id)
+    if record is None or record.get('lockedUntil', float('inf')) < time.time():
+        return idempotency_store.claim(record_id, fingerprint, meta)
+    return False, record
+
+
+def _store_result(record_id: str, response: https_fn.Response) -> None:
+    body = None if response.is_streamed else decompress_body(response.get_data(), response.headers.get('Content-Encoding'))
+    if response.status_code >= 500 or response.status_code in NOT_STORED_STATUSES \
+            or body is None or len(body) > IDEMPOTENCY_MAX_BODY_BYTES:
+        idempotency_store.release(record_id)
+        return
+    idempotency_store.complete(record_id, {'status': response.status_code, 'mimetype': response.mimetype, 'body': body})
+
+
+def _release_quietly(record_id: str) -> None:
+    try:
+        idempotency_store.release(record_id)
+    except Exception as e:
+        print(f"IDEMPOTENCY.PY: Could not release idempotency record {record_id}: {e}")
+
+
+def run_idempotent(record_id: str, fingerprint: str, meta: dict, run):
+    """Runs `run()` at most once per record_id (see the module comment) and returns its response."""
+    with _inflight_lock:
+        event = _inflight.get(record_id)
+        owner = event is None
+        if owner:
+            event = _inflight[record_id] = threading.Event()
+    if not owner:
+        # Same key already running on this instance: wait for it without polling the store.
+        event.wait(IDEMPOTENCY_WAIT_SECONDS)
+        return run_idempotent(record_id, fingerprint, meta, run) if event.is_set() \
+            else error_response("A request with this Idempotency-Key is still in progress", 409, headers={'Retry-After': '5'})
+
+    try:
+        try:
+            with phase('idempotency'):
+                claimed, record = idempotency_store.claim(record_id, fingerprint, meta)
+                if not claimed and record.get('fingerprint') == fingerprint and record.get('state') != 'completed':
+                    claimed, record = _wait_for_completion(record_id, fingerprint, meta, record)
+        except Exception as e:
+            # A record store outage must not fail the request; run it without the guarantee.
+            print(f"IDEMPOTENCY.PY: Idempotency store error for {meta['operation']}, running without it: {e}")
+            return run()
+        if not claimed:
+            if record.get('fingerprint') != fingerprint:
+                return error_response("Idempotency-Key was already used for a different request", 422)
+            if record.get('state') != 'completed':
+                return error_response("A request with this Idempotency-Key is still in progress", 409, headers={'Retry-After': '5'})
+            return replay_response(record)
+
+        try:
+            response = run()
+        except BaseException:
+            _release_quietly(record_id)
+            raise
+        try:
+            with phase('idempotency'):
+                _store_result(record_id, response)
+        except Exception as e:
+            print(f"IDEMPOTENCY.PY: Could not store the response for {meta['operation']}: {e}")
+            _release_quietly(record_id)
+        return response
+    finally:
+        with _inflight_lock:
+            _inflight.pop(record_id, None)
+        event.set()
+
+
+def idempotent(operation: str):
+    """
+    Decorator (placed under @instrumented) that honours the Idempotency-Key header.
+    Requests without the header, or that fail authentication, go straight to the handler.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(req, *args, **kwargs):
+            key = req.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return handler(req, *args, **kwargs)
+            if len(key) > IDEMPOTENCY_MAX_KEY_LENGTH:
+                return error_response(f"{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_MAX_KEY_LENGTH} characters", 400)
+            decoded_token, error = verify_firebase_token(req)
+            if error:
+                return handler(req, *args, **kwargs)
+
+            uid = decoded_token['uid']
+            record_id = hashlib.sha256(f"{uid}\0{operation}\0{key}".encode()).hexdigest()
+            meta = {'uid': uid, 'operation': operation}
+            return run_idempotent(record_id, request_fingerprint(req), meta, lambda: handler(req, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,197 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-request latency instrumentation for the HTTP handlers.
+#
+#   @https_fn.on_request()
+#   @instrumented
+#   def list_files(req): ...
+#
+# Each request emits one structured JSON log line (picked up by Cloud Logging as a
+# jsonPayload) with the handler name, status, total and per-phase durations in ms,
+# request/response sizes, any attributes added with annotate() (cache hits, ...), and
+# coldStart=true for the first request an instance serves. Shared helpers time
+# themselves with phase('auth'), phase('vss_call'), ...; outside an instrumented
+# request phase() and annotate() do nothing.
+#
+# Streamed responses (SSE/NDJSON) are logged when the body has been sent, and phases
+# timed while it streams count too. Work handed to a thread pool only shows up if it is
+# submitted with submit_in_context(), which carries the request's context along.
+#
+# If opentelemetry is installed the request and every phase also become spans; it is
+# optional and not in requirements.txt. INSTRUMENTATION_ENABLED=false turns it all off.
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() != 'false'
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+    _tracer = otel_trace.get_tracer('octavision.functions')
+except ImportError:
+    _tracer = None
+
+_current = contextvars.ContextVar('request_trace', default=None)
+_cold_start = True
+
+
+class RequestTrace:
+    __slots__ = ('name', 'started', 'phases', 'attributes', 'span', 'span_token', 'lock')
+
+    def __init__(self, name: str, span=None, span_token=None):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.attributes = {}
+        self.span = span
+        self.span_token = span_token
+        # Phases may be timed from worker threads (see submit_in_context).
+        self.lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str):
+    """Times a block as a phase of the current request; repeated phases accumulate."""
+    request_trace = _current.get()
+    if request_trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        if request_trace.span is not None:
+            with _tracer.start_as_current_span(name):
+                yield
+        else:
+            yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with request_trace.lock:
+            request_trace.phases[name] = request_trace.phases.get(name, 0.0) + elapsed_ms
+
+
+def annotate(**attributes) -> None:
+    """Adds attributes (cacheHit=True, vssBytes=1234, ...) to the current request's log line."""
+    request_trace = _current.get()
+    if request_trace is None:
+        return
+    with request_trace.lock:
+        request_trace.attributes.update(attributes)
+    if request_trace.span is not None:
+        for key, value in attributes.items():
+            if isinstance(value, (bool, int, float, str)):
+                request_trace.span.set_attribute(key, value)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit() that runs `fn` in a copy of the caller's context, so its phases
+    and annotations count towards the current request."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _iterate_in_context(context, iterable):
+    """Yields from `iterable`, running each step inside `context`."""
+    iterator = iter(iterable)
+    try:
+        while True:
+            try:
+                chunk = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            context.run(close)
+
+
+def _response_size(response):
+    if getattr(response, 'is_streamed', False):
+        return None
+    try:
+        return response.calculate_content_length()
+    except Exception:
+        return None
+
+
+def emit_request_log(request_trace: RequestTrace, status: int, cold_start: bool, request_bytes, response_bytes) -> None:
+    total_ms = (time.perf_counter() - request_trace.started) * 1000
+    entry = {
+        'severity': 'ERROR' if status >= 500 else 'INFO',
+        'message': f"{request_trace.name} {status} {total_ms:.1f}ms",
+        'handler': request_trace.name,
+        'status': status,
+        'durationMs': round(total_ms, 2),
+        'phasesMs': {name: round(ms, 2) for name, ms in request_trace.phases.items()},
+        'requestBytes': request_bytes,
+        'responseBytes': response_bytes,
+        'coldStart': cold_start,
+    }
+    entry.update(request_trace.attributes)
+    print(json.dumps(entry, default=str))
+
+
+def start_request(name: str):
+    """Starts a trace for the current request. Returns (request_trace, token, cold_start)."""
+    global _cold_start
+    cold_start, _cold_start = _cold_start, False
+    span = span_token = None
+    if _tracer is not None:
+        span = _tracer.start_span(name)
+        span.set_attribute('coldStart', cold_start)
+        span_token = otel_context.attach(otel_trace.set_span_in_context(span))
+    request_trace = RequestTrace(name, span, span_token)
+    return request_trace, _current.set(request_trace), cold_start
+
+
+def detach_request(request_trace: RequestTrace, token) -> None:
+    """Restores the caller's context; must run in the context start_request() set."""
+    _current.reset(token)
+    if request_trace.span_token is not None:
+        otel_context.detach(request_trace.span_token)
+
+
+def end_request(request_trace: RequestTrace, status: int, cold_start: bool, request_bytes, response_bytes) -> None:
+    """Ends the span and writes the log line; may run anywhere once the response is done."""
+    if request_trace.span is not None:
+        request_trace.span.set_attribute('http.status_code', status)
+        request_trace.span.end()
+    emit_request_log(request_trace, status, cold_start, request_bytes, response_bytes)
+
+
+def finish_request(request_trace: RequestTrace, token, status: int, cold_start: bool, request_bytes, response_bytes) -> None:
+    detach_request(request_trace, token)
+    end_request(request_trace, status, cold_start, request_bytes, response_bytes)
+
+
+def instrumented(handler):
+    """Decorator for HTTP handlers taking a single Flask-style request argument."""
+    if not INSTRUMENTATION_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(req, *args, **kwargs):
+        request_trace, token, cold_start = start_request(handler.__name__)
+        status = 500
+        response = None
+        deferred = False
+        try:
+            response = handler(req, *args, **kwargs)
+            status = getattr(response, 'status_code', 200)
+            if getattr(response, 'is_streamed', False) and hasattr(response, 'call_on_close'):
+                # The body is produced after we return: time it in the request's context
+                # and log once it has been sent (or the client went away).
+                response.response = _iterate_in_context(contextvars.copy_context(), response.response)
+                response.call_on_close(lambda: end_request(request_trace, status, cold_start, req.content_length, None))
+                deferred = True
+            return response
+        finally:
+            if deferred:
+                detach_request(request_trace, token)
+            else:
+                finish_request(request_trace, token, status, cold_start,
+                               req.content_length, _response_size(response) if response is not None else None)
+
+    return wrapper
@@ -0,0 +1,30 @@
+import threading
+import time
+from common.vss import get_firestore_client
+
+# Maps Firebase uids to their organization (users/{uid}.organizationId).
+# Cached per instance; a user's organization practically never changes.
+ORG_CACHE_TTL_SECONDS = 600
+
+_org_cache = {}
+_org_cache_lock = threading.Lock()
+
+
+def get_user_org_id(uid: str):
+    """Returns the organization id for `uid`, or None if the user has no organization."""
+    if not uid:
+        return None
+    now = time.time()
+    with _org_cache_lock:
+        cached = _org_cache.get(uid)
+        if cached and now < cached[1]:
+            return cached[0]
+
+    user_doc = get_firestore_client().collection('users').document(uid).get()
+    org_id = user_doc.to_dict().get('organizationId') if user_doc.exists else None
+    if org_id is None:
+        print(f"ORGS.PY: User {uid} has no organizationId.")
+        return None
+    with _org_cache_lock:
+        _org_cache[uid] = (org_id, now + ORG_CACHE_TTL_SECONDS)
+    return org_id
@@ -0,0 +1,166 @@
+import gzip
+import json
+import os
+from firebase_functions import https_fn
+from flask import has_request_context, request
+from common.instrumentation import annotate, phase
+
+# orjson serializes several times faster than the stdlib and returns bytes directly;
+# it is optional so a codebase without it still works.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response compression. JSON bodies of at least COMPRESSION_MIN_BYTES are compressed
+# with brotli (if the `brotli` package is installed) or gzip, whichever the client's
+# Accept-Encoding allows, preferring brotli. Listings are repetitive JSON and usually
+# shrink 5-10x. Smaller bodies are not worth the CPU and are sent as is.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+JSON_MIMETYPE = 'application/json'
+SUCCESS_ENVELOPE_PREFIX = b'{"status":"success","data":'
+SUCCESS_ENVELOPE_SUFFIX = b'}'
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def accepted_encodings(req) -> dict:
+    """Parses Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for item in req.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def accepts_encoding(req, coding: str) -> bool:
+    accepted = accepted_encodings(req)
+    return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+
+def choose_encoding(req):
+    """Returns 'br', 'gzip' or None for the current client."""
+    for coding in (('br',) if brotli is not None else ()) + ('gzip',):
+        if accepts_encoding(req, coding):
+            return coding
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.decompress(body)
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    return body
+
+
+def make_response(body: bytes, status: int = 200, mimetype: str = JSON_MIMETYPE, headers: dict = None) -> https_fn.Response:
+    """Builds the response, compressing `body` when it is large enough and the client accepts it."""
+    if len(body) >= COMPRESSION_MIN_BYTES and has_request_context():
+        headers = dict(headers or {})
+        headers['Vary'] = 'Accept-Encoding'
+        encoding = choose_encoding(request)
+        if encoding is not None:
+            with phase('compress'):
+                compressed = compress_body(body, encoding)
+            if len(compressed) < len(body):
+                annotate(contentEncoding=encoding, uncompressedBytes=len(body))
+                headers['Content-Encoding'] = encoding
+                body = compressed
+    return https_fn.Response(body, status=status, mimetype=mimetype, headers=headers)
+
+
+def json_response(payload, status: int = 200, headers: dict = None) -> https_fn.Response:
+    """Serializes `payload` once, straight into the response body."""
+    with phase('serialize'):
+        body = dumps(payload)
+    return make_response(body, status=status, headers=headers)
+
+
+def error_response(message: str, status: int, headers: dict = None) -> https_fn.Response:
+    return json_response({"status": "error", "message": message}, status=status, headers=headers)
+
+
+def is_json_body(vss_api_response) -> bool:
+    content_type = vss_api_response.headers.get('Content-Type', '')
+    return 'json' in content_type.lower() and bool(vss_api_response.content.strip())
+
+
+def vss_success_response(vss_api_response, fallback_data=None, status: int = 200) -> https_fn.Response:
+    """
+    Wraps a VSS response body as {"status": "success", "data": <body>}.
+
+    JSON bodies are spliced into the envelope as raw bytes without being parsed or
+    re-encoded. Bodies that are empty or not JSON are replaced by `fallback_data`
+    (or, without a fallback, parsed leniently as the old handlers did).
+    """
+    if is_json_body(vss_api_response):
+        return make_response(SUCCESS_ENVELOPE_PREFIX + vss_api_response.content + SUCCESS_ENVELOPE_SUFFIX, status=status)
+    if fallback_data is not None:
+        data = fallback_data
+    else:
+        data = vss_api_response.json()
+    return json_response({"status": "success", "data": data}, status=status)
+
+
+# Headers copied from a VSS response by vss_passthrough_response. Hop-by-hop headers
+# (Connection, Transfer-Encoding) and Content-Length of a decoded body must not be.
+PASSTHROUGH_HEADERS = ('Content-Type', 'Content-Disposition', 'Content-Range', 'Accept-Ranges',
+                       'ETag', 'Last-Modified', 'Cache-Control')
+PASSTHROUGH_CHUNK_BYTES = 64 * 1024
+
+
+def vss_passthrough_response(vss_api_response) -> https_fn.Response:
+    """
+    Streams a VSS response (requested with stream=True) to the client unchanged. A body
+    VSS sent compressed is forwarded still compressed, with its Content-Encoding, if the
+    client accepts that encoding; otherwise it is decoded on the way through.
+    """
+    headers = {name: vss_api_response.headers[name] for name in PASSTHROUGH_HEADERS if name in vss_api_response.headers}
+    encoding = vss_api_response.headers.get('Content-Encoding')
+    passthrough = not encoding or (has_request_context() and accepts_encoding(request, encoding.lower()))
+    if passthrough:
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        if 'Content-Length' in vss_api_response.headers:
+            headers['Content-Length'] = vss_api_response.headers['Content-Length']
+    if encoding:
+        headers['Vary'] = 'Accept-Encoding'
+
+    def body():
+        try:
+            yield from vss_api_response.raw.stream(PASSTHROUGH_CHUNK_BYTES, decode_content=not passthrough)
+        finally:
+            vss_api_response.close()
+
+    response = https_fn.Response(body(), status=vss_api_response.status_code, headers=headers)
+    # The generator's finally only runs once it has started; close the VSS response (and
+    # free its scheduler slot) even if the client goes away before the first chunk.
+    response.call_on_close(vss_api_response.close)
+    return response
@@ -0,0 +1,68 @@
+import os
+import time # Import time for time.time()
+from common.auth_helper import ensure_firebase_app
+from common.instrumentation import annotate, phase
+
+# Shared VSS server lookup for all codebases. The default server comes from the
+# Firestore 'servers' collection and is cached per instance for CACHE_TTL_SECONDS.
+
+VSS_API_BASE_URL_CACHE = None
+VSS_API_BASE_URL_CACHE_EXPIRY = None
+CACHE_TTL_SECONDS = 300
+
+def get_firestore_client():
+    """Returns a Firestore client instance, initializing the Firebase app on first use."""
+    ensure_firebase_app()
+    from firebase_admin import firestore
+    return firestore.client()
+
+def get_default_vss_base_url():
+    global VSS_API_BASE_URL_CACHE, VSS_API_BASE_URL_CACHE_EXPIRY
+    current_time = time.time()
+
+    if VSS_API_BASE_URL_CACHE and VSS_API_BASE_URL_CACHE_EXPIRY and current_time < VSS_API_BASE_URL_CACHE_EXPIRY:
+        annotate(vssUrlCacheHit=True)
+        return VSS_API_BASE_URL_CACHE
+
+    annotate(vssUrlCacheHit=False)
+    with phase('vss_url'):
+        try:
+            db = get_firestore_client() 
+            servers_ref = db.collection('servers')
+            query_ref = servers_ref.where('isSystemDefault', '==', True).limit(1)
+            results = query_ref.stream()
+
+            default_server_data = None
+            for server_doc in results:
+                default_server_data = server_doc.to_dict()
+                break
+
+            if default_server_data and 'ipAddressWithPort' in default_server_data and 'protocol' in default_server_data:
+                protocol = default_server_data['protocol']
+                ip_with_port = default_server_data['ipAddressWithPort']
+                base_url = f"{protocol}://{ip_with_port}"
+
+                VSS_API_BASE_URL_CACHE = base_url
+                VSS_API_BASE_URL_CACHE_EXPIRY = current_time + CACHE_TTL_SECONDS
+                print(f"VSS.PY: Fetched system default VSS URL from Firestore: {base_url}")
+                return base_url
+            else:
+                print("VSS.PY: Error: No system default VSS server found in Firestore or key fields missing.")
+                env_url = os.environ.get('VSS_API_BASE_URL') 
+                if env_url:
+                    print(f"VSS.PY: Warning: System default VSS server not found/incomplete in Firestore, using VSS_API_BASE_URL from environment: {env_url}")
+                    if not env_url.startswith(('http://', 'https://')):
+                        env_url = f"http://{env_url}" 
+                    return env_url
+                raise ValueError("System default VSS server IP/protocol not configured in Firestore and no VSS_API_BASE_URL in env.")
+        except Exception as e:
+            print(f"VSS.PY: Error fetching system default VSS server URL from Firestore: {e}")
+            VSS_API_BASE_URL_CACHE = None
+            VSS_API_BASE_URL_CACHE_EXPIRY = None
+            env_url = os.environ.get('VSS_API_BASE_URL')
+            if env_url:
+                print(f"VSS.PY: Warning: Error fetching from Firestore, using VSS_API_BASE_URL from environment: {env_url}")
+                if not env_url.startswith(('http://', 'https://')):
+                    env_url = f"http://{env_url}"
+                return env_url
+            raise ValueError(f"Could not retrieve system default VSS server URL: {e}")
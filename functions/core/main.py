@@ -0,0 +1,15 @@
+from firebase_functions import https_fn, options
+from common.instrumentation import instrumented
+from common.cors import allowed_origins_list
+
+# Core codebase: functions that need neither the VSS proxy stack nor Gemini.
+# Firebase Admin SDK is initialized lazily by common.auth_helper.ensure_firebase_app().
+
+
+# HTTP function definition for helloworld
+# Note: 2nd Gen functions set CORS per function.
+@https_fn.on_request(cors=options.CorsOptions(cors_origins=allowed_origins_list, cors_methods=["get", "post", "options"]))
+@instrumented
+def helloworld(req: https_fn.Request) -> https_fn.Response:
+    print("MAIN.PY: HelloWorld function invoked")
+    return https_fn.Response("Hello, OctaVision world from a 2nd gen Cloud Function in main.py!")
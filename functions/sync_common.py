@@ -0,0 +1,40 @@
+"""
+Copies the shared `common` package into each functions codebase.
+
+Firebase deploys every codebase from its own source directory, so shared helpers must
+physically live inside it. firebase.json runs this as a predeploy hook for each codebase;
+run it by hand before starting the emulators or running a codebase locally.
+
+Usage:
+    python functions/sync_common.py                 # all codebases
+    python functions/sync_common.py functions/ai    # a single codebase directory
+"""
+import os
+import shutil
+import sys
+
+FUNCTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+COMMON_DIR = os.path.join(FUNCTIONS_DIR, 'common')
+CODEBASES = ['core', 'vss_proxy', 'ai']
+
+
+def sync(codebase_dir: str):
+    target = os.path.join(codebase_dir, 'common')
+    if os.path.islink(target):
+        os.unlink(target)
+    elif os.path.isdir(target):
+        shutil.rmtree(target)
+    shutil.copytree(COMMON_DIR, target, ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
+    print(f"SYNC_COMMON.PY: Copied common/ into {os.path.relpath(target)}")
+
+
+def main():
+    targets = sys.argv[1:] or [os.path.join(FUNCTIONS_DIR, name) for name in CODEBASES]
+    for codebase_dir in targets:
+        if not os.path.isfile(os.path.join(codebase_dir, 'main.py')):
+            sys.exit(f"SYNC_COMMON.PY: {codebase_dir} is not a functions codebase (no main.py)")
+        sync(os.path.abspath(codebase_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Tests import modules the way the deployed codebases do: `common.*` from
+# functions/common (the source, not the synced copies) and codebase modules such as
+# `scheduler` or `json_extract` by their bare names. functions/tests is outside every
+# codebase directory, so it is never deployed.
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (os.path.join(FUNCTIONS_DIR, 'ai'), os.path.join(FUNCTIONS_DIR, 'vss_proxy'), FUNCTIONS_DIR):
+    if path in sys.path:
+        sys.path.remove(path)
+    sys.path.insert(0, path)
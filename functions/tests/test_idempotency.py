@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+from firebase_functions import https_fn
+
+from common import idempotency
+from common.idempotency import MemoryIdempotencyStore, run_idempotent
+
+META = {'uid': 'user-1', 'operation': 'create_stream'}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryIdempotencyStore()
+    monkeypatch.setattr(idempotency, 'idempotency_store', store)
+    return store
+
+
+class Handler:
+    """Counts calls and answers with the given status."""
+
+    def __init__(self, status=201):
+        self.status = status
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return https_fn.Response(f'{{"call": {self.calls}}}', status=self.status, mimetype='application/json')
+
+
+def test_retry_replays_the_first_response(store):
+    handler = Handler()
+    first = run_idempotent('key', 'fp', META, handler)
+    second = run_idempotent('key', 'fp', META, handler)
+
+    assert handler.calls == 1
+    assert second.status_code == 201
+    assert second.get_data() == first.get_data() == b'{"call": 1}'
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+
+
+def test_key_reused_for_a_different_request_is_rejected(store):
+    handler = Handler()
+    run_idempotent('key', 'fp', META, handler)
+    assert run_idempotent('key', 'other-fp', META, handler).status_code == 422
+    assert handler.calls == 1
+
+
+@pytest.mark.parametrize('status', [500, 503, 409, 429])
+def test_retryable_responses_are_not_stored(store, status):
+    handler = Handler(status)
+    run_idempotent('key', 'fp', META, handler)
+    run_idempotent('key', 'fp', META, handler)
+    assert handler.calls == 2
+    assert store.get('key') is None
+
+
+def test_handler_exception_releases_the_key(store):
+    def fail():
+        raise RuntimeError("VSS down")
+
+    with pytest.raises(RuntimeError):
+        run_idempotent('key', 'fp', META, fail)
+    assert store.get('key') is None
+    assert run_idempotent('key', 'fp', META, Handler()).status_code == 201
+
+
+def test_store_outage_runs_the_handler_anyway(monkeypatch):
+    class BrokenStore:
+        def claim(self, *args):
+            raise ConnectionError("firestore unavailable")
+
+    monkeypatch.setattr(idempotency, 'idempotency_store', BrokenStore())
+    handler = Handler()
+    assert run_idempotent('key', 'fp', META, handler).status_code == 201
+    assert handler.calls == 1
+
+
+def test_concurrent_request_on_the_same_instance_waits_for_the_first(store):
+    started, finish = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        finish.wait(2)
+        return https_fn.Response('done', status=201)
+
+    results = {}
+    first = threading.Thread(target=lambda: results.setdefault('first', run_idempotent('key', 'fp', META, slow)))
+    first.start()
+    assert started.wait(2)
+    second = threading.Thread(target=lambda: results.setdefault('second', run_idempotent('key', 'fp', META, slow)))
+    second.start()
+    finish.set()
+    first.join(2)
+    second.join(2)
+
+    assert len(calls) == 1
+    assert results['second'].get_data() == b'done'
+    assert results['second'].headers['Idempotent-Replayed'] == 'true'
+
+
+def test_expired_claim_is_taken_over(store, monkeypatch):
+    monkeypatch.setattr(idempotency, 'IDEMPOTENCY_LOCK_SECONDS', -1)
+    claimed, _ = store.claim('key', 'fp', META)
+    assert claimed
+    claimed, record = store.claim('key', 'fp', META)
+    assert claimed and record is None
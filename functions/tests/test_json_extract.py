@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from json_extract import extract_json, find_json_text, iter_json_values
+from suggest_apis import is_valid_alert_events, is_valid_camera_setup, is_valid_detection_targets, parse_gemini_json
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'gemini_outputs.json')
+
+with open(CORPUS_PATH) as f:
+    CORPUS = {sample['name']: sample for sample in json.load(f)}
+
+
+def is_batch_response(value) -> bool:
+    # What run_suggestion_batch passes; each camera's entry is validated afterwards.
+    return isinstance(value, dict)
+
+
+# The validator each handler passes for a sample's kind.
+VALIDATORS = {
+    'alert_events': is_valid_alert_events,
+    'camera_setup': is_valid_camera_setup,
+    'batch': is_batch_response,
+    'any': None,
+}
+
+
+def parse(name: str):
+    sample = CORPUS[name]
+    return extract_json(sample['text'], VALIDATORS[sample['kind']])
+
+
+@pytest.mark.parametrize('name, alert_name', [
+    ('fenced_alert_events', "Loading Dock Monitoring"),
+    ('bare_alert_events', "Parking Lot Security"),
+    ('preamble_and_fence', "Retail Floor Watch"),
+    ('trailing_note_with_braces', "Warehouse Zone A Monitoring"),
+    ('braces_inside_strings', "Gate {North} Access"),
+    ('prose_brackets_before_json', "Perimeter Night Watch"),
+    ('two_objects_first_invalid', "Construction Site Safety"),
+])
+def test_alert_events(name, alert_name):
+    parsed = parse(name)
+    assert is_valid_alert_events(parsed)
+    assert parsed['suggestedAlertName'] == alert_name
+
+
+def test_string_contents_are_kept_verbatim():
+    assert parse('braces_inside_strings')['suggestedEventNames'] == ['Badge [invalid]', 'Tailgating "piggyback"', 'Forced Entry']
+
+
+@pytest.mark.parametrize('name, alert_name', [
+    ('combined_setup', "Checkout Area Monitoring"),
+    ('long_combined_setup', "Loading Bay Safety"),
+])
+def test_camera_setup(name, alert_name):
+    parsed = parse(name)
+    assert is_valid_camera_setup(parsed)
+    assert parsed['suggestedAlertName'] == alert_name
+    assert parsed['suggestedTargets']
+
+
+def test_batch_response_entries_validate_per_camera():
+    parsed = parse('batch_keyed')
+    assert sorted(parsed) == ['cam-1', 'cam-2', 'cam-3']
+    assert all(is_valid_detection_targets(parsed[camera_id]) for camera_id in parsed)
+    assert not is_valid_detection_targets(parsed.get('cam-4'))
+
+
+def test_array_answer_without_validation():
+    assert parse('array_answer') == ['Person', 'Vehicle', 'Bicycle']
+
+
+def test_json_of_the_wrong_structure_is_a_value_error():
+    with pytest.raises(ValueError) as excinfo:
+        parse('wrong_structure')
+    assert not isinstance(excinfo.value, json.JSONDecodeError)
+    # Alert events alone are not a complete camera setup.
+    with pytest.raises(ValueError):
+        extract_json(CORPUS['fenced_alert_events']['text'], is_valid_camera_setup)
+
+
+@pytest.mark.parametrize('name', ['truncated', 'no_json'])
+def test_no_complete_json_is_a_decode_error(name):
+    with pytest.raises(json.JSONDecodeError):
+        parse(name)
+
+
+def test_handlers_parse_through_parse_gemini_json():
+    text = CORPUS['two_objects_first_invalid']['text']
+    assert parse_gemini_json(text, validate=is_valid_alert_events) == extract_json(text, is_valid_alert_events)
+
+
+def test_iter_json_values_yields_each_top_level_value_once():
+    text = CORPUS['two_objects_first_invalid']['text']
+    values = list(iter_json_values(text))
+    assert [value for value, _, _ in values] == [{'name': 'x'}, parse('two_objects_first_invalid')]
+    assert all(json.loads(text[start:end]) == value for value, start, end in values)
+
+
+def test_find_json_text():
+    text = CORPUS['preamble_and_fence']['text']
+    assert json.loads(find_json_text(text)) == parse('preamble_and_fence')
+    assert find_json_text(CORPUS['no_json']['text']) is None
@@ -0,0 +1,163 @@
+import base64
+import json
+
+import pytest
+
+import listing
+from listing import decode_cursor, encode_cursor, is_proxy_cursor, list_vss_resource, parse_listing_params, project, split_listing
+
+URL = 'http://vss/files'
+
+
+class FakeRequest:
+    def __init__(self, **args):
+        self.args = args
+
+
+class FakeVssResponse:
+    def __init__(self, body):
+        self.body = body
+        self.status_code = 200
+        self.headers = {'Content-Type': 'application/json'}
+        self.content = json.dumps(body).encode()
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def vss(monkeypatch):
+    """Records VSS listing calls; answers with `vss.respond(params)`."""
+    class Vss:
+        calls = []
+        respond = None
+
+    def fake_vss_request(org_key, operation, method, url, **kwargs):
+        Vss.calls.append(kwargs.get('params'))
+        return FakeVssResponse(Vss.respond(kwargs.get('params')))
+
+    monkeypatch.setattr(listing, 'vss_request', fake_vss_request)
+    monkeypatch.setattr(listing, '_unpaginated_urls', {})
+    listing.invalidate_listing(URL)
+    yield Vss
+    listing.invalidate_listing(URL)
+
+
+def payload(response):
+    return json.loads(response.get_data())
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(150, 1700000000.5)
+    assert is_proxy_cursor(cursor)
+    assert decode_cursor(cursor) == (150, 1700000000.5)
+
+
+@pytest.mark.parametrize('cursor', [raw_cursor({'o': -5}), raw_cursor({'o': 'x'}), raw_cursor({'v': 1}), 'not-base64!', ''])
+def test_decode_cursor_rejects_bad_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_vss_cursors_are_not_proxy_cursors():
+    assert not is_proxy_cursor('abc123')
+    assert not is_proxy_cursor(raw_cursor(['o']))
+
+
+def test_parse_listing_params():
+    assert parse_listing_params(FakeRequest()) == (None, None)
+    params, error = parse_listing_params(FakeRequest(limit='10', fields='id, filename,'))
+    assert error is None
+    assert params == {'limit': 10, 'cursor': None, 'fields': ['id', 'filename']}
+    assert parse_listing_params(FakeRequest(limit='0'))[1]
+    assert parse_listing_params(FakeRequest(limit='ten'))[1]
+
+
+def test_split_listing_and_project():
+    items, rebuild = split_listing({'files': [{'id': 1, 'name': 'a'}], 'total': 1})
+    assert rebuild(project(items, ['id'])) == {'files': [{'id': 1}], 'total': 1}
+    assert split_listing({'nothing': 1}) == (None, None)
+
+
+def test_pages_through_a_listing_vss_does_not_paginate(vss):
+    vss.respond = lambda params: {'data': [{'id': i} for i in range(5)]}
+    first = payload(list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': None}, 'org', 'list_files'))
+    assert first['data']['data'] == [{'id': 0}, {'id': 1}]
+    assert first['pagination']['total'] == 5
+
+    second = payload(list_vss_resource(URL, {'limit': 2, 'cursor': first['pagination']['nextCursor'], 'fields': None}, 'org', 'list_files'))
+    assert second['data']['data'] == [{'id': 2}, {'id': 3}]
+    assert second['pagination']['cacheHit'] is True
+    assert len(vss.calls) == 1
+
+
+def test_refetches_full_listing_when_vss_truncated_without_cursor(vss):
+    full = [{'id': i} for i in range(5)]
+    vss.respond = lambda params: {'data': full[:params['limit']] if params else full}
+    first = payload(list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': None}, 'org', 'list_files'))
+    assert vss.calls == [{'limit': 2}, None]
+    assert first['pagination']['total'] == 5
+    assert first['pagination']['nextCursor'] is not None
+
+
+def test_first_page_is_served_from_a_warm_cache(vss):
+    vss.respond = lambda params: {'data': [{'id': i} for i in range(5)]}
+    list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': None}, 'org', 'list_files')
+    vss.calls.clear()
+
+    page = payload(list_vss_resource(URL, {'limit': 3, 'cursor': None, 'fields': ['id']}, 'org', 'list_files'))
+    assert vss.calls == []
+    assert page['data']['data'] == [{'id': 0}, {'id': 1}, {'id': 2}]
+    assert page['pagination']['cacheHit'] is True
+
+
+def test_unpaginated_url_skips_the_paginated_call_on_a_cache_miss(vss):
+    full = [{'id': i, 'name': f'file-{i}'} for i in range(5)]
+    vss.respond = lambda params: {'data': full[:params['limit']] if params else full}
+    list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': ['id']}, 'org', 'list_files')
+    assert vss.calls == [{'limit': 2, 'fields': 'id'}, None]
+
+    listing.invalidate_listing(URL)
+    vss.calls.clear()
+    page = payload(list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': ['id']}, 'org', 'list_files'))
+    assert vss.calls == [None]
+    assert page['data']['data'] == [{'id': 0}, {'id': 1}]
+
+
+def test_native_pagination_is_asked_again_once_the_memory_expires(vss, monkeypatch):
+    vss.respond = lambda params: {'data': [{'id': 1}]}
+    list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': None}, 'org', 'list_files')
+    listing.invalidate_listing(URL)
+    monkeypatch.setattr(listing, 'LISTING_UNPAGINATED_MEMORY_SECONDS', 0)
+    vss.calls.clear()
+    list_vss_resource(URL, {'limit': 2, 'cursor': None, 'fields': None}, 'org', 'list_files')
+    assert vss.calls == [{'limit': 2}]
+
+
+def test_proxy_cursor_is_never_forwarded_to_vss(vss):
+    vss.respond = lambda params: {'data': [{'id': i} for i in range(5)]}
+    page = payload(list_vss_resource(URL, {'limit': 2, 'cursor': encode_cursor(4, 0), 'fields': None}, 'org', 'list_files'))
+    assert vss.calls == [None]
+    assert page['data']['data'] == [{'id': 4}]
+    assert page['pagination']['nextCursor'] is None
+
+
+def test_negative_offset_is_rejected_before_calling_vss(vss):
+    with pytest.raises(ValueError):
+        list_vss_resource(URL, {'limit': 2, 'cursor': raw_cursor({'o': -5}), 'fields': None}, 'org', 'list_files')
+    assert vss.calls == []
+
+
+def test_native_vss_pagination_is_passed_through(vss):
+    vss.respond = lambda params: {'data': [{'id': 1, 'name': 'a'}], 'next_cursor': 'vss-2'}
+    page = payload(list_vss_resource(URL, {'limit': 1, 'cursor': 'vss-1', 'fields': ['id']}, 'org', 'list_files'))
+    assert vss.calls == [{'limit': 1, 'cursor': 'vss-1', 'fields': 'id'}]
+    assert page['data']['data'] == [{'id': 1}]
+    assert page['pagination']['nextCursor'] == 'vss-2'
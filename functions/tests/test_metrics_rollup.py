@@ -0,0 +1,59 @@
+import metrics_rollup
+from metrics_rollup import extract_series
+
+
+def prometheus(text: str) -> dict:
+    return extract_series(text.encode(), 'text/plain; version=0.0.4')
+
+
+def test_prometheus_samples_with_and_without_timestamps():
+    series = prometheus(
+        '# HELP vss_requests_total Requests served.\n'
+        '# TYPE vss_requests_total counter\n'
+        'vss_requests_total{method="GET",code="200"} 1027 1395066363000\n'
+        'vss_requests_total{method="POST",code="500"} 3\n'
+        'vss_gpu_utilization 0.75 1395066363000\n'
+        'vss_queue_depth 4\n'
+    )
+    assert series == {
+        'vss_requests_total{method="GET",code="200"}': 1027.0,
+        'vss_requests_total{method="POST",code="500"}': 3.0,
+        'vss_gpu_utilization': 0.75,
+        'vss_queue_depth': 4.0,
+    }
+
+
+def test_label_values_may_contain_spaces_and_braces():
+    series = prometheus(
+        'vss_stream_fps{name="Front gate camera",note="a } b \\" c"} 29.97 1395066363000\n'
+        'vss_model_latency_seconds{model="vila 1_5"} 1.5e-1\n'
+    )
+    assert series == {
+        'vss_stream_fps{name="Front gate camera",note="a } b \\" c"}': 29.97,
+        'vss_model_latency_seconds{model="vila 1_5"}': 0.15,
+    }
+
+
+def test_malformed_and_non_finite_samples_are_skipped():
+    series = prometheus(
+        'vss_broken{name="never closed 1\n'
+        'vss_no_value\n'
+        'vss_text_value{a="b"} high\n'
+        'vss_nan NaN\n'
+        'vss_inf +Inf\n'
+        'vss_ok 1\n'
+    )
+    assert series == {'vss_ok': 1.0}
+
+
+def test_series_are_capped_in_name_order(monkeypatch):
+    monkeypatch.setattr(metrics_rollup, 'ROLLUP_MAX_SERIES', 2)
+    forward = prometheus('vss_c 3\nvss_a 1\nvss_b 2\n')
+    backward = prometheus('vss_b 2\nvss_a 1\nvss_c 3\n')
+    assert forward == backward == {'vss_a': 1.0, 'vss_b': 2.0}
+
+
+def test_json_bodies_are_flattened():
+    series = extract_series(b'{"gpu": {"utilization": 0.5, "healthy": true}, "streams": [2, 3], "version": "1.2"}',
+                            'application/json')
+    assert series == {'gpu__utilization': 0.5, 'streams__0': 2.0, 'streams__1': 3.0}
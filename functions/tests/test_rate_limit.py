@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from common import rate_limit
+from common.rate_limit import SingleFlight, TokenBucket, call_with_backoff
+
+
+def test_bucket_allows_a_burst_up_to_capacity():
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.try_acquire()
+    assert 0.9 < wait <= 1.0
+
+
+def test_bucket_refills_over_time():
+    bucket = TokenBucket(rate=100, capacity=1)
+    assert bucket.acquire()
+    started = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert time.monotonic() - started < 0.5
+
+
+def test_acquire_gives_up_when_the_wait_exceeds_the_timeout():
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    bucket.acquire()
+    started = time.monotonic()
+    assert bucket.acquire(timeout=0.5) is False
+    assert time.monotonic() - started < 0.1
+    assert TokenBucket(rate=0, capacity=0).try_acquire() == float('inf')
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started, finish = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        finish.wait(2)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+    leader.start()
+    assert started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    time.sleep(0.05)
+    assert flight.in_flight() == 1
+    finish.set()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert calls == [1]
+    assert results == ['result'] * 4
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_shares_the_error_and_caches_nothing():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'fresh') == 'fresh'
+
+
+def test_backoff_retries_retryable_errors(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(rate_limit.time, 'sleep', sleeps.append)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("429")
+        return 'ok'
+
+    assert call_with_backoff(flaky, lambda e: isinstance(e, ConnectionError), base_delay=1, max_delay=1.5) == 'ok'
+    assert len(attempts) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= 1.5 for delay in sleeps)
+
+
+def test_backoff_gives_up(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, 'sleep', lambda delay: None)
+    attempts = []
+
+    def always_fails():
+        attempts.append(1)
+        raise ConnectionError("429")
+
+    with pytest.raises(ConnectionError):
+        call_with_backoff(always_fails, lambda e: True, max_retries=2)
+    assert len(attempts) == 3
+
+
+
+def test_backoff_does_not_retry_other_errors(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, 'sleep', lambda delay: None)
+    attempts = []
+
+    def bad_request():
+        attempts.append(1)
+        raise ValueError("invalid prompt")
+
+    with pytest.raises(ValueError):
+        call_with_backoff(bad_request, lambda e: isinstance(e, ConnectionError))
+    assert len(attempts) == 1
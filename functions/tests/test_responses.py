@@ -0,0 +1,126 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from common import responses
+from common.responses import (accepted_encodings, choose_encoding, compress_body, decompress_body, make_response,
+                              vss_passthrough_response, vss_success_response)
+
+app = Flask(__name__)
+LARGE_BODY = json.dumps([{'id': i, 'name': 'stream'} for i in range(200)]).encode()
+
+
+def client_request(accept_encoding=''):
+    return app.test_request_context(headers={'Accept-Encoding': accept_encoding})
+
+
+class FakeRaw:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.decode_content = None
+
+    def stream(self, chunk_size, decode_content):
+        self.decode_content = decode_content
+        yield from self.chunks
+
+
+class FakeVssResponse:
+    def __init__(self, content=b'', headers=None, status_code=200, chunks=()):
+        self.content = content
+        self.headers = headers or {}
+        self.status_code = status_code
+        self.raw = FakeRaw(list(chunks))
+        self.closed = 0
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        self.closed += 1
+
+
+def test_accepted_encodings():
+    with client_request('gzip;q=0.5, br, identity;q=0, deflate;q=bad') as ctx:
+        assert accepted_encodings(ctx.request) == {'gzip': 0.5, 'br': 1.0, 'identity': 0.0, 'deflate': 0.0}
+
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(responses, 'brotli', None)
+    with client_request('br, gzip') as ctx:
+        assert choose_encoding(ctx.request) == 'gzip'
+    with client_request('gzip;q=0') as ctx:
+        assert choose_encoding(ctx.request) is None
+    with client_request('*') as ctx:
+        assert choose_encoding(ctx.request) == 'gzip'
+
+
+@pytest.mark.parametrize('encoding', ['gzip', pytest.param('br', marks=pytest.mark.skipif(responses.brotli is None, reason="brotli not installed"))])
+def test_compress_round_trip(encoding):
+    assert decompress_body(compress_body(LARGE_BODY, encoding), encoding) == LARGE_BODY
+    assert decompress_body(LARGE_BODY, None) == LARGE_BODY
+
+
+def test_large_body_is_compressed_for_clients_that_accept_it(monkeypatch):
+    monkeypatch.setattr(responses, 'brotli', None)
+    with client_request('gzip'):
+        response = make_response(LARGE_BODY)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(response.get_data()) == LARGE_BODY
+
+
+def test_small_body_and_other_clients_get_it_uncompressed():
+    with client_request('gzip'):
+        small = make_response(b'{"ok":true}')
+    with client_request(''):
+        identity = make_response(LARGE_BODY)
+    assert 'Content-Encoding' not in small.headers
+    assert 'Content-Encoding' not in identity.headers
+    assert identity.headers['Vary'] == 'Accept-Encoding'
+    assert identity.get_data() == LARGE_BODY
+
+
+def test_vss_json_body_is_spliced_into_the_envelope_unchanged():
+    vss = FakeVssResponse(b'{"id": "s1",  "url": "rtsp://x"}', {'Content-Type': 'application/json'})
+    response = vss_success_response(vss)
+    assert response.get_data() == b'{"status":"success","data":{"id": "s1",  "url": "rtsp://x"}}'
+    assert json.loads(response.get_data()) == {'status': 'success', 'data': {'id': 's1', 'url': 'rtsp://x'}}
+
+
+def test_empty_vss_body_uses_the_fallback():
+    response = vss_success_response(FakeVssResponse(b'', {'Content-Type': 'application/json'}), fallback_data={'deleted': True})
+    assert json.loads(response.get_data()) == {'status': 'success', 'data': {'deleted': True}}
+
+
+def test_passthrough_forwards_compressed_body_to_clients_that_accept_it():
+    vss = FakeVssResponse(headers={'Content-Type': 'video/mp4', 'Content-Encoding': 'gzip', 'Content-Length': '6',
+                                   'Transfer-Encoding': 'chunked'}, status_code=206, chunks=[b'abc', b'def'])
+    with client_request('gzip'):
+        response = vss_passthrough_response(vss)
+    assert response.status_code == 206
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Length'] == '6'
+    assert 'Transfer-Encoding' not in response.headers
+    assert b''.join(response.response) == b'abcdef'
+    assert vss.raw.decode_content is False
+    assert vss.closed >= 1
+
+
+def test_passthrough_decodes_for_clients_that_do_not_accept_the_encoding():
+    vss = FakeVssResponse(headers={'Content-Type': 'text/plain', 'Content-Encoding': 'br', 'Content-Length': '3'}, chunks=[b'plain'])
+    with client_request('gzip'):
+        response = vss_passthrough_response(vss)
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers.get('Content-Length') != '3'
+    assert b''.join(response.response) == b'plain'
+    assert vss.raw.decode_content is True
+
+
+def test_passthrough_closes_vss_response_when_the_body_is_never_read():
+    vss = FakeVssResponse(headers={'Content-Type': 'video/mp4'}, chunks=[b'x'])
+    with client_request():
+        response = vss_passthrough_response(vss)
+    response.close()
+    assert vss.closed == 1
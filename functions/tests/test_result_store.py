@@ -0,0 +1,39 @@
+import gzip
+import io
+import json
+
+from flask import Flask
+
+from common.responses import vss_passthrough_response
+from result_store import StoredResultBody
+
+app = Flask(__name__)
+RESULT = {'job_id': 'job-1', 'summary': 'A truck arrived at the gate. ' * 5000}
+
+
+class FakeBlob:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.opened_with = None
+        self.reader = None
+
+    def open(self, mode, **kwargs):
+        self.opened_with = (mode, kwargs)
+        self.reader = io.BytesIO(self.data)
+        return self.reader
+
+
+def test_stored_result_is_streamed_in_the_success_envelope():
+    blob = FakeBlob(gzip.compress(json.dumps(RESULT).encode()))
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = vss_passthrough_response(StoredResultBody(blob))
+
+    assert blob.opened_with[1]['raw_download'] is True
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert 'Content-Encoding' not in response.headers
+    chunks = list(response.response)
+    assert len(chunks) > 3
+    assert json.loads(b''.join(chunks)) == {'status': 'success', 'data': RESULT}
+    response.close()
+    assert blob.reader.closed
@@ -0,0 +1,50 @@
+import pytest
+from flask import Flask
+
+from router import resolve_route
+from routing import ROUTE_PATH_ID_KEY, endpoint_name, path_id
+
+app = Flask(__name__)
+
+
+@pytest.mark.parametrize('path, endpoint, route_path_id', [
+    ('/api/list-streams', 'list_streams', None),
+    ('/api/list_streams/', 'list_streams', None),
+    ('/list-streams', 'list_streams', None),
+    ('/api/get-stream-details/abc', 'get_stream_details', 'abc'),
+    # An ID that happens to be another endpoint's name is still an ID.
+    ('/api/get-stream-details/list-streams', 'get_stream_details', 'list-streams'),
+    ('/api/delete_stream/a/b', 'delete_stream', 'a/b'),
+])
+def test_resolve_route(path, endpoint, route_path_id):
+    handler, resolved_id = resolve_route(path)
+    assert handler.__name__ == endpoint
+    assert resolved_id == route_path_id
+
+
+@pytest.mark.parametrize('path', ['/', '/api', '/api/nope', '/api/abc/get-stream-details'])
+def test_unknown_endpoints(path):
+    assert resolve_route(path)[0] is None
+
+
+def test_endpoint_name():
+    assert endpoint_name('get-model-details') == endpoint_name('get_model_details') == 'get_model_details'
+
+
+def test_path_id_prefers_the_routed_id():
+    with app.test_request_context('/api/get-stream-details/abc') as ctx:
+        ctx.request.environ[ROUTE_PATH_ID_KEY] = None
+        assert path_id(ctx.request, 'get_stream_details') is None
+        ctx.request.environ[ROUTE_PATH_ID_KEY] = 'abc'
+        assert path_id(ctx.request, 'get_stream_details') == 'abc'
+
+
+def test_path_id_for_standalone_functions():
+    with app.test_request_context('/get_stream_details') as ctx:
+        assert path_id(ctx.request, 'get_stream_details') is None
+    with app.test_request_context('/get-stream-details') as ctx:
+        assert path_id(ctx.request, 'get_stream_details') is None
+    with app.test_request_context('/abc') as ctx:
+        assert path_id(ctx.request, 'get_stream_details') == 'abc'
+    with app.test_request_context('/') as ctx:
+        assert path_id(ctx.request, 'get_stream_details') is None
@@ -0,0 +1,105 @@
+import gc
+import threading
+import time
+
+import pytest
+
+import accounting
+from scheduler import VssQueueTimeout, VssScheduler, operation_class
+
+
+def make_scheduler(max_concurrency=4, interactive=4, summarization=1, bulk=1):
+    return VssScheduler(max_concurrency, {'interactive': interactive, 'summarization': summarization, 'bulk': bulk})
+
+
+def wait_for_queue(scheduler, queued: int, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with scheduler.condition:
+            if len(scheduler.waiting) == queued:
+                return
+        time.sleep(0.005)
+    raise AssertionError(f"expected {queued} queued calls")
+
+
+def test_operation_class():
+    assert operation_class('ingest_file') == 'bulk'
+    assert operation_class('create_summarization_job') == 'summarization'
+    assert operation_class('list_streams') == 'interactive'
+
+
+def test_class_limit_caps_bulk_but_not_interactive():
+    scheduler = make_scheduler(bulk=1)
+    scheduler.acquire('bulk')
+    with pytest.raises(VssQueueTimeout):
+        scheduler.acquire('bulk', timeout=0.05)
+    scheduler.acquire('interactive', timeout=0.05)
+
+    stats = scheduler.stats()['classes']
+    assert stats['bulk']['active'] == 1
+    assert stats['bulk']['timeouts'] == 1
+    assert stats['interactive']['active'] == 1
+
+
+def test_free_slot_goes_to_highest_priority_waiter():
+    scheduler = make_scheduler(max_concurrency=1, interactive=1, bulk=1)
+    scheduler.acquire('interactive')
+    order = []
+
+    def worker(traffic_class):
+        scheduler.acquire(traffic_class, timeout=2)
+        order.append(traffic_class)
+        scheduler.release(traffic_class)
+
+    bulk = threading.Thread(target=worker, args=('bulk',))
+    bulk.start()
+    wait_for_queue(scheduler, 1)
+    interactive = threading.Thread(target=worker, args=('interactive',))
+    interactive.start()
+    wait_for_queue(scheduler, 2)
+
+    scheduler.release('interactive')
+    bulk.join(2)
+    interactive.join(2)
+    assert order == ['interactive', 'bulk']
+    assert scheduler.stats()['classes']['interactive']['completed'] == 2
+
+
+def test_slot_context_manager_releases_on_error():
+    scheduler = make_scheduler()
+    with pytest.raises(RuntimeError):
+        with scheduler.slot('summarization'):
+            raise RuntimeError("boom")
+    assert scheduler.stats()['classes']['summarization']['active'] == 0
+
+
+class FakeResponse:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+def test_streamed_response_holds_slot_until_closed(monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(accounting, 'vss_scheduler', scheduler)
+    scheduler.acquire('interactive')
+    response = FakeResponse()
+    accounting.hold_slot_until_closed(response, 'interactive')
+    assert scheduler.stats()['classes']['interactive']['active'] == 1
+
+    response.close()
+    response.close()
+    assert response.closed == 2
+    assert scheduler.stats()['classes']['interactive']['active'] == 0
+    assert scheduler.stats()['classes']['interactive']['completed'] == 1
+
+
+def test_streamed_response_releases_slot_when_collected(monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(accounting, 'vss_scheduler', scheduler)
+    scheduler.acquire('bulk')
+    accounting.hold_slot_until_closed(FakeResponse(), 'bulk')
+    gc.collect()
+    assert scheduler.stats()['classes']['bulk']['active'] == 0
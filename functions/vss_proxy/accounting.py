@@ -0,0 +1,191 @@
+import math
+import os
+import random
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from common.orgs import get_user_org_id
+from common.rate_limit import TokenBucket
+from common.responses import error_response
+from common.instrumentation import annotate, phase
+from common.vss import get_firestore_client
+from scheduler import operation_class, vss_scheduler
+
+# Per-organization VSS accounting and quotas.
+#
+# Every proxied call is attributed to the caller's organization (orgId/organizationId
+# custom claim, else users/{uid}.organizationId; users without an organization are
+# accounted as "user:<uid>"). Before the VSS call the organization's token bucket must
+# cover the operation's cost, otherwise the proxy answers 429 with Retry-After. Buckets
+# are per instance, so the effective limit scales with the number of instances.
+#
+# Request counts and bytes are aggregated in memory and flushed at most every
+# USAGE_FLUSH_INTERVAL_SECONDS into sharded Firestore counters:
+#   vssUsage/{org}/days/{YYYY-MM-DD}/shards/{0..USAGE_COUNTER_SHARDS-1}
+# Sum the shards of a day to get its totals. Usage not yet flushed when an instance
+# shuts down is lost.
+ORG_REQUESTS_PER_SECOND = float(os.environ.get('VSS_ORG_REQUESTS_PER_SECOND', '5'))
+ORG_BURST = float(os.environ.get('VSS_ORG_BURST', '20'))
+OPERATION_COSTS = {
+    'ingest_file': 10,
+    'create_summarization_job': 10,
+    'create_stream': 5,
+}
+USAGE_COUNTER_SHARDS = int(os.environ.get('VSS_USAGE_COUNTER_SHARDS', '10'))
+USAGE_FLUSH_INTERVAL_SECONDS = float(os.environ.get('VSS_USAGE_FLUSH_INTERVAL_SECONDS', '10'))
+VSS_POOL_SIZE = int(os.environ.get('VSS_POOL_SIZE', '32'))
+
+# One keep-alive connection pool to VSS per instance instead of a new TCP/TLS
+# handshake for every proxied call.
+vss_session = requests.Session()
+vss_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=VSS_POOL_SIZE))
+vss_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=VSS_POOL_SIZE))
+
+_org_buckets = {}
+_org_buckets_lock = threading.Lock()
+_pending_usage = {}
+_usage_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def resolve_org_key(decoded_token: dict) -> str:
+    org_id = decoded_token.get('orgId') or decoded_token.get('organizationId')
+    if not org_id:
+        try:
+            org_id = get_user_org_id(decoded_token.get('uid'))
+        except Exception as e:
+            print(f"ACCOUNTING.PY: Could not resolve organization for {decoded_token.get('uid')}: {e}")
+    return org_id or f"user:{decoded_token.get('uid')}"
+
+
+def _org_bucket(org_key: str) -> TokenBucket:
+    with _org_buckets_lock:
+        bucket = _org_buckets.get(org_key)
+        if bucket is None:
+            bucket = _org_buckets[org_key] = TokenBucket(ORG_REQUESTS_PER_SECOND, ORG_BURST)
+        return bucket
+
+
+def enforce_org_quota(decoded_token: dict, operation: str):
+    """
+    Attributes the call to an organization and charges its quota.
+    Returns (org_key, error). error is a ready 429 response when the quota is exhausted.
+    """
+    with phase('quota'):
+        org_key = resolve_org_key(decoded_token)
+        cost = min(OPERATION_COSTS.get(operation, 1), ORG_BURST)
+        wait = _org_bucket(org_key).try_acquire(cost)
+    if wait == 0.0:
+        return org_key, None
+    retry_after = max(1, math.ceil(wait))
+    print(f"ACCOUNTING.PY: VSS quota exceeded for {org_key} on {operation}; retry after {retry_after}s.")
+    return org_key, error_response(
+        "VSS quota exceeded for your organization, please retry later",
+        429,
+        headers={'Retry-After': str(retry_after)}
+    )
+
+
+def vss_request(org_key, operation: str, method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Sends a request to VSS over the pooled session, once the scheduler grants the
+    operation's traffic class a slot, and records it against org_key.
+    Raises scheduler.VssQueueTimeout if no slot frees up in time.
+    """
+    traffic_class = operation_class(operation)
+    with phase('vss_queue'):
+        vss_scheduler.acquire(traffic_class)
+    try:
+        with phase('vss_call'):
+            vss_api_response = vss_session.request(method, url, **kwargs)
+    except BaseException:
+        vss_scheduler.release(traffic_class)
+        raise
+    if kwargs.get('stream'):
+        hold_slot_until_closed(vss_api_response, traffic_class)
+    else:
+        vss_scheduler.release(traffic_class)
+    body = vss_api_response.request.body
+    bytes_sent = len(body) if isinstance(body, (bytes, str)) else 0
+    if kwargs.get('stream'):
+        bytes_received = int(vss_api_response.headers.get('Content-Length') or 0)
+    else:
+        bytes_received = len(vss_api_response.content)
+    annotate(vssStatus=vss_api_response.status_code, vssBytesSent=bytes_sent, vssBytesReceived=bytes_received)
+    if org_key:
+        record_usage(org_key, operation, bytes_sent, bytes_received)
+    return vss_api_response
+
+
+def hold_slot_until_closed(vss_api_response: requests.Response, traffic_class: str) -> None:
+    """
+    Keeps the scheduler slot of a streamed VSS response until its body has been read and
+    the response closed, so long downloads count against the concurrency limits. The slot
+    is also released if the response is garbage-collected without being closed.
+    """
+    once = threading.Lock()
+
+    def release():
+        if once.acquire(blocking=False):
+            vss_scheduler.release(traffic_class)
+
+    close = vss_api_response.close
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            release()
+
+    vss_api_response.close = close_and_release
+    weakref.finalize(vss_api_response, release)
+
+
+def record_usage(org_key: str, operation: str, bytes_sent: int, bytes_received: int) -> None:
+    day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    with _usage_lock:
+        usage = _pending_usage.setdefault((org_key, day), {'requests': 0, 'bytesSent': 0, 'bytesReceived': 0, 'operations': {}})
+        usage['requests'] += 1
+        usage['bytesSent'] += bytes_sent
+        usage['bytesReceived'] += bytes_received
+        usage['operations'][operation] = usage['operations'].get(operation, 0) + 1
+    flush_usage()
+
+
+def flush_usage(force: bool = False) -> None:
+    """Writes the aggregated usage to Firestore if the flush interval has passed (or force)."""
+    global _pending_usage, _last_flush
+    with _usage_lock:
+        if not _pending_usage or (not force and time.monotonic() - _last_flush < USAGE_FLUSH_INTERVAL_SECONDS):
+            return
+        pending, _pending_usage = _pending_usage, {}
+        _last_flush = time.monotonic()
+
+    try:
+        from firebase_admin import firestore
+        db = get_firestore_client()
+        batch = db.batch()
+        for (org_key, day), usage in pending.items():
+            shard_ref = (db.collection('vssUsage').document(org_key)
+                         .collection('days').document(day)
+                         .collection('shards').document(str(random.randrange(USAGE_COUNTER_SHARDS))))
+            batch.set(shard_ref, {
+                'requests': firestore.Increment(usage['requests']),
+                'bytesSent': firestore.Increment(usage['bytesSent']),
+                'bytesReceived': firestore.Increment(usage['bytesReceived']),
+                'operations': {op: firestore.Increment(count) for op, count in usage['operations'].items()},
+            }, merge=True)
+        batch.commit()
+    except Exception as e:
+        print(f"ACCOUNTING.PY: Error flushing VSS usage, will retry on the next flush: {e}")
+        with _usage_lock:
+            for key, usage in pending.items():
+                current = _pending_usage.setdefault(key, {'requests': 0, 'bytesSent': 0, 'bytesReceived': 0, 'operations': {}})
+                current['requests'] += usage['requests']
+                current['bytesSent'] += usage['bytesSent']
+                current['bytesReceived'] += usage['bytesReceived']
+                for op, count in usage['operations'].items():
+                    current['operations'][op] = current['operations'].get(op, 0) + count
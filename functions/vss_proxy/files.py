@@ -0,0 +1,229 @@
+import requests
+import os
+from common.instrumentation import instrumented
+from common.auth_helper import verify_firebase_token
+from common.idempotency import idempotent
+from common.vss import get_default_vss_base_url
+from common.responses import error_response, is_json_body, vss_passthrough_response, vss_success_response
+from accounting import enforce_org_quota, vss_request
+from scheduler import VssQueueTimeout
+from common.orgs import get_user_org_id
+from listing import invalidate_listing, list_vss_resource, parse_listing_params
+from metadata_index import index_ingested_file, list_from_index, parse_index_query, remove_file_from_index
+from firebase_functions import https_fn
+
+
+
+# SERVICE_ACCOUNT_EMAIL is typically set during deployment configuration
+# and not directly used in the decorator in 2nd gen functions.
+# Keep this if it's used within the function logic, but remove from decorator.
+SERVICE_ACCOUNT_EMAIL = os.environ.get("SERVICE_ACCOUNT_EMAIL")
+
+# Firebase Admin SDK is initialized lazily (see auth_helper.ensure_firebase_app).
+
+
+@https_fn.on_request(timeout_sec=540) # Increase timeout for potentially long ingest operations
+@instrumented
+@idempotent('ingest_file')
+def ingest_file(req: https_fn.Request) -> https_fn.Response: # Explicit type hints
+    """
+        Cloud function to ingest a file by uploading it to the VSS API.
+        Requires Firebase authentication.
+        Refactored for Firebase Functions 2nd gen.
+    """
+    # Use the verify_firebase_token helper function which should now accept https_fn.Request
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'ingest_file')
+    if quota_error:
+        return quota_error
+
+    # Access files and form data using req.files and req.form
+    if 'file' not in req.files:
+        return error_response("No file part in the request", 400)
+
+    request_data = req.form
+    file = req.files['file']
+    # Use req.form for form data
+    filename = request_data.get('filename')
+    purpose = request_data.get('purpose')
+    media_type = request_data.get('media_type')
+    if not filename or not purpose or not media_type:
+        return error_response("Missing form data: filename, purpose, or media_type", 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url() # Assuming this returns a string URL
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    # req.files['file'] provides a FileStorage object similar to Flask
+    files_payload = {'file': (filename, file.stream, file.content_type)}
+    data_payload = {'filename': filename, 'purpose': purpose, 'media_type': media_type}
+
+    vss_api_url = f"{vss_api_base_url}/files"
+    try:
+        vss_api_response = vss_request(org_key, 'ingest_file', 'POST', vss_api_url, files=files_payload, data=data_payload)
+        vss_api_response.raise_for_status()
+        invalidate_listing(vss_api_url)
+        if is_json_body(vss_api_response):
+            index_ingested_file(vss_api_response.json(), decoded_token['uid'], request_data)
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(f"Error calling VSS API: {e}", 500)
+
+@https_fn.on_request() # Use on_request for 2nd gen HTTP functions
+@instrumented
+def list_files(req: https_fn.Request) -> https_fn.Response:
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'list_files')
+    if quota_error:
+        return quota_error
+
+    listing_params, params_error = parse_listing_params(req)
+    if params_error:
+        return error_response(params_error, 400)
+
+    index_filters, filters_error = parse_index_query(req)
+    if filters_error:
+        return error_response(filters_error, 400)
+    if index_filters is not None:
+        org_id = get_user_org_id(decoded_token['uid'])
+        if not org_id:
+            return error_response("User does not belong to an organization", 403)
+        try:
+            return list_from_index('videos', org_id, index_filters, listing_params)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/files"
+    try:
+        return list_vss_resource(vss_api_url, listing_params, org_key, 'list_files')
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to list files: {e}")
+        return error_response(f"Error calling VSS API to list files: {e}", 500)
+
+@https_fn.on_request() # Use on_request for 2nd gen HTTP functions
+@instrumented
+def get_file_details(req: https_fn.Request) -> https_fn.Response:
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'get_file_details')
+    if quota_error:
+        return quota_error
+
+    # Extract file_id from the request URL or parameters as appropriate
+    # In Firebase Functions 2nd gen, URL parameters are typically not automatically parsed like in Flask routes.
+    file_id = req.args.get('file_id') # Assuming file_id is passed as a query parameter or accessible via req.url
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}") # Keep this print for logging
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/files/{file_id}"
+    try:
+        vss_api_response = vss_request(org_key, 'get_file_details', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get file details for {file_id}: {e}")
+        return error_response(f"Error calling VSS API to get file details for {file_id}: {e}", 500)
+
+@https_fn.on_request()
+@instrumented
+def delete_file(req: https_fn.Request) -> https_fn.Response:
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'delete_file')
+    if quota_error:
+        return quota_error
+
+    # Extract file_id from the request URL or parameters as appropriate
+    file_id = req.args.get('file_id') # Use req.args to get query parameters
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+    
+    vss_api_url = f"{vss_api_base_url}/files/{file_id}"
+    try:
+        vss_api_response = vss_request(org_key, 'delete_file', 'DELETE', vss_api_url)
+        vss_api_response.raise_for_status()
+        invalidate_listing(f"{vss_api_base_url}/files")
+        remove_file_from_index(file_id)
+        return vss_success_response(vss_api_response, fallback_data={"message": "File deleted successfully"})
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to delete file {file_id}: {e}")
+        return error_response(f"Error calling VSS API to delete file {file_id}: {e}", 500)
+
+@https_fn.on_request()
+@instrumented
+def get_file_content(req: https_fn.Request) -> https_fn.Response:
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'get_file_content')
+    if quota_error:
+        return quota_error
+    
+    # Extract file_id from the request URL or parameters as appropriate
+    file_id = req.args.get('file_id') # Assuming file_id is passed as a query parameter
+    if not file_id:
+        return error_response("File ID is required", 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+    
+    vss_api_url = f"{vss_api_base_url}/files/{file_id}/content"
+    try:
+        vss_api_response = vss_request(org_key, 'get_file_content', 'GET', vss_api_url, stream=True)
+        if not vss_api_response.ok:
+            # Frees the connection and the scheduler slot held for the streamed body.
+            vss_api_response.close()
+        vss_api_response.raise_for_status()
+
+        return vss_passthrough_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get file content for {file_id}: {e}")
+        return error_response(f"Error calling VSS API to get file content for {file_id}: {e}", 500)
\ No newline at end of file
@@ -0,0 +1,48 @@
+# cloud_functions/health.py
+
+import requests
+from firebase_functions import https_fn
+from common.instrumentation import instrumented
+from common.auth_helper import verify_firebase_token
+from common.vss import get_default_vss_base_url
+from common.responses import error_response, vss_success_response
+from accounting import enforce_org_quota, vss_request
+from scheduler import VssQueueTimeout
+
+
+@https_fn.on_request()
+@instrumented
+def check_health(req: https_fn.Request) -> https_fn.Response:
+    """
+    Cloud function to check the health of the VSS API.
+    Requires Firebase authentication.
+    Refactored for Firebase Functions 2nd gen to directly return https_fn.Response.
+    """
+    if req.method != 'GET':
+        return error_response("Method Not Allowed", 405)
+
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'check_health')
+    if quota_error:
+        return quota_error
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/health"
+    try:
+        vss_api_response = vss_request(org_key, 'check_health', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API health check: {e}")
+        return error_response(f"Error calling VSS API health check: {e}", 500)
\ No newline at end of file
@@ -0,0 +1,225 @@
+import base64
+import binascii
+import json
+import os
+import threading
+import time
+from common.responses import json_response, vss_success_response
+from common.instrumentation import annotate
+from accounting import vss_request
+
+# Pagination (?limit=&cursor=) and field projection (?fields=a,b) for VSS listings.
+# The parameters are forwarded to VSS; if VSS answers with a 'next_cursor' it paginates
+# natively and its cursor is handed back unchanged. Otherwise the full listing (read
+# without limit or fields) is cached per instance for LISTING_CACHE_TTL_SECONDS and
+# sliced here, with an opaque offset cursor that is never forwarded to VSS. First pages
+# are served from that cache too, and a URL VSS did not paginate is remembered for
+# LISTING_UNPAGINATED_MEMORY_SECONDS, so its next cache miss reads the full listing in
+# one call instead of trying the paginated request first.
+DEFAULT_PAGE_LIMIT = int(os.environ.get('LISTING_DEFAULT_LIMIT', '50'))
+MAX_PAGE_LIMIT = int(os.environ.get('LISTING_MAX_LIMIT', '500'))
+LISTING_CACHE_TTL_SECONDS = float(os.environ.get('LISTING_CACHE_TTL_SECONDS', '30'))
+LISTING_UNPAGINATED_MEMORY_SECONDS = float(os.environ.get('LISTING_UNPAGINATED_MEMORY_SECONDS', '600'))
+ITEM_CONTAINER_KEYS = ('data', 'items', 'files', 'streams')
+
+_listing_cache = {}
+_listing_cache_lock = threading.Lock()
+# vss_api_url -> time VSS last answered it without native pagination.
+_unpaginated_urls = {}
+
+
+def parse_listing_params(req):
+    """
+    Returns (params, error). params is None when the caller asked for neither pagination
+    nor projection, in which case the listing is passed through untouched.
+    """
+    limit_arg = req.args.get('limit')
+    cursor = req.args.get('cursor') or None
+    fields_arg = req.args.get('fields')
+    if limit_arg is None and cursor is None and not fields_arg:
+        return None, None
+
+    limit = DEFAULT_PAGE_LIMIT
+    if limit_arg is not None:
+        try:
+            limit = int(limit_arg)
+        except ValueError:
+            return None, "limit must be an integer"
+        if limit < 1 or limit > MAX_PAGE_LIMIT:
+            return None, f"limit must be between 1 and {MAX_PAGE_LIMIT}"
+
+    fields = [field.strip() for field in fields_arg.split(',') if field.strip()] if fields_arg else None
+    return {'limit': limit, 'cursor': cursor, 'fields': fields}, None
+
+
+def encode_cursor(offset: int, version: float) -> str:
+    raw = json.dumps({'o': offset, 'v': version}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _cursor_payload(cursor: str):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    return decoded if isinstance(decoded, dict) and 'o' in decoded else None
+
+
+def is_proxy_cursor(cursor: str) -> bool:
+    """Whether `cursor` was produced by encode_cursor() (as opposed to a native VSS cursor)."""
+    return _cursor_payload(cursor) is not None
+
+
+def decode_cursor(cursor: str):
+    """Returns (offset, version) for a cursor produced by encode_cursor()."""
+    decoded = _cursor_payload(cursor)
+    try:
+        offset = int(decoded['o'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset, decoded.get('v')
+
+
+def split_listing(body):
+    """
+    Returns (items, rebuild) where rebuild(page) puts a page back into the original shape,
+    or (None, None) if the body has no recognizable item array.
+    """
+    if isinstance(body, list):
+        return body, lambda page: page
+    if isinstance(body, dict):
+        for key in ITEM_CONTAINER_KEYS:
+            if isinstance(body.get(key), list):
+                return body[key], lambda page, key=key: {**body, key: page}
+    return None, None
+
+
+def project(items: list, fields):
+    if not fields:
+        return items
+    return [{field: item[field] for field in fields if field in item} if isinstance(item, dict) else item for item in items]
+
+
+def get_cached_listing(vss_api_url: str):
+    with _listing_cache_lock:
+        entry = _listing_cache.get(vss_api_url)
+        if entry and time.time() - entry['version'] < LISTING_CACHE_TTL_SECONDS:
+            return entry
+        _listing_cache.pop(vss_api_url, None)
+        return None
+
+
+def cache_listing(vss_api_url: str, body):
+    entry = {'body': body, 'version': time.time()}
+    with _listing_cache_lock:
+        _listing_cache[vss_api_url] = entry
+    return entry
+
+
+def invalidate_listing(vss_api_url: str):
+    """Drops the cached listing so the next page request re-reads VSS (call after writes)."""
+    with _listing_cache_lock:
+        _listing_cache.pop(vss_api_url, None)
+
+
+def remember_pagination(vss_api_url: str, native: bool) -> None:
+    with _listing_cache_lock:
+        if native:
+            _unpaginated_urls.pop(vss_api_url, None)
+        else:
+            _unpaginated_urls[vss_api_url] = time.time()
+
+
+def known_unpaginated(vss_api_url: str) -> bool:
+    """Whether VSS recently answered a paginated request for this URL without paginating."""
+    with _listing_cache_lock:
+        seen_at = _unpaginated_urls.get(vss_api_url)
+        return seen_at is not None and time.time() - seen_at < LISTING_UNPAGINATED_MEMORY_SECONDS
+
+
+def local_page_response(entry: dict, params: dict, cache_hit: bool):
+    annotate(listingCacheHit=cache_hit)
+    items, rebuild = split_listing(entry['body'])
+    if items is None:
+        print("LISTING.PY: VSS listing has no item array; returning it unpaginated.")
+        return json_response({'status': 'success', 'data': entry['body'], 'pagination': None})
+    offset = 0
+    if params['cursor']:
+        offset, version = decode_cursor(params['cursor'])
+        if version != entry['version']:
+            print(f"LISTING.PY: Cursor refers to an older listing snapshot; continuing at offset {offset}.")
+    page = items[offset:offset + params['limit']]
+    next_offset = offset + len(page)
+    next_cursor = encode_cursor(next_offset, entry['version']) if next_offset < len(items) else None
+    return json_response({
+        'status': 'success',
+        'data': rebuild(project(page, params['fields'])),
+        'pagination': {'limit': params['limit'], 'nextCursor': next_cursor, 'total': len(items), 'cacheHit': cache_hit},
+    })
+
+
+def list_vss_resource(vss_api_url: str, params, org_key, operation: str):
+    """
+    Fetches a VSS listing and returns the proxy response. Raises
+    requests.exceptions.RequestException on VSS errors and ValueError on a bad cursor.
+    """
+    if params is None:
+        vss_api_response = vss_request(org_key, operation, 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+
+    if params['cursor'] and is_proxy_cursor(params['cursor']):
+        # One of our offset cursors: VSS never sees it. Reject a tampered one before any call.
+        decode_cursor(params['cursor'])
+        cached = get_cached_listing(vss_api_url)
+        if cached is not None:
+            return local_page_response(cached, params, cache_hit=True)
+        return local_page_response(fetch_full_listing(vss_api_url, org_key, operation), params, cache_hit=False)
+
+    if not params['cursor']:
+        # A cached listing only exists for URLs VSS does not paginate, so it can serve the
+        # first page as well.
+        cached = get_cached_listing(vss_api_url)
+        if cached is not None:
+            return local_page_response(cached, params, cache_hit=True)
+        if known_unpaginated(vss_api_url):
+            return local_page_response(fetch_full_listing(vss_api_url, org_key, operation), params, cache_hit=False)
+
+    vss_query = {'limit': params['limit']}
+    if params['cursor']:
+        vss_query['cursor'] = params['cursor']
+    if params['fields']:
+        vss_query['fields'] = ','.join(params['fields'])
+    vss_api_response = vss_request(org_key, operation, 'GET', vss_api_url, params=vss_query)
+    vss_api_response.raise_for_status()
+    body = vss_api_response.json()
+
+    items, rebuild = split_listing(body)
+    if items is not None and isinstance(body, dict) and 'next_cursor' in body:
+        # VSS paginated natively; only make sure the projection was applied.
+        remember_pagination(vss_api_url, native=True)
+        return json_response({
+            'status': 'success',
+            'data': rebuild(project(items, params['fields'])),
+            'pagination': {'limit': params['limit'], 'nextCursor': body['next_cursor'], 'total': body.get('total'), 'cacheHit': False},
+        })
+    if params['cursor']:
+        # Neither ours nor accepted by VSS as a native cursor.
+        raise ValueError("Invalid cursor")
+
+    remember_pagination(vss_api_url, native=False)
+    if params['fields'] or (items is not None and len(items) == params['limit']):
+        # VSS may have applied the limit or projection without paginating, so this body
+        # cannot stand in for the full listing; read the whole listing before caching.
+        return local_page_response(fetch_full_listing(vss_api_url, org_key, operation), params, cache_hit=False)
+    return local_page_response(cache_listing(vss_api_url, body), params, cache_hit=False)
+
+
+def fetch_full_listing(vss_api_url: str, org_key, operation: str) -> dict:
+    """Reads the listing without limit, cursor or fields and caches it."""
+    vss_api_response = vss_request(org_key, operation, 'GET', vss_api_url)
+    vss_api_response.raise_for_status()
+    return cache_listing(vss_api_url, vss_api_response.json())
@@ -0,0 +1,17 @@
+# VSS proxy codebase: authenticated pass-through functions in front of the VSS server.
+# Firebase discovers functions from this module, so every handler is re-exported here.
+#
+# VSS_PROXY_ROUTER_ONLY=true (in the codebase's .env, read at deploy time) deploys only
+# `api` and the scheduled sampler. Every endpoint then shares the same instances and
+# their VSS scheduler; existing per-endpoint URLs stop working, so move callers first.
+import os
+from metrics import sample_vss_metrics
+from router import api
+
+if os.environ.get('VSS_PROXY_ROUTER_ONLY', '').lower() != 'true':
+    from files import ingest_file, list_files, get_file_details, delete_file, get_file_content
+    from streams import create_stream, list_streams, get_stream_details, delete_stream
+    from health import check_health
+    from metrics import get_metrics, get_vss_queue_stats
+    from models import list_models, get_model_details
+    from summarization import create_summarization_job, get_summarization_job_status, get_summarization_job_result
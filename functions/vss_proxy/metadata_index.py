@@ -0,0 +1,180 @@
+from datetime import datetime
+from common.orgs import get_user_org_id
+from common.vss import get_firestore_client
+from common.instrumentation import phase
+from common.responses import json_response
+from listing import DEFAULT_PAGE_LIMIT, project
+
+# Firestore mirror of VSS file and stream metadata, so recordings can be listed by
+# organization, camera and time range without calling VSS.
+#   videos/{vssFileId}   one document per ingested file (orgId, userId, cameraId, createdAt, ...)
+#   cameras/{cameraId}   gains vssStreamId/vssStreamName/vssStreamCreatedAt when a stream is
+#                        created for it (the camera document itself is owned by the frontend)
+# Mirroring happens after VSS has accepted the call; failures are logged and never fail
+# the proxied request. The matching composite indexes are in firestore.indexes.json.
+
+
+def _server_timestamp():
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
+
+
+def _camera_in_org(camera_id: str, org_id: str):
+    """Returns the camera's DocumentReference if it exists and belongs to org_id, else None."""
+    camera_ref = get_firestore_client().collection('cameras').document(str(camera_id))
+    camera_doc = camera_ref.get()
+    if not camera_doc.exists or camera_doc.to_dict().get('orgId') != org_id:
+        return None
+    return camera_ref
+
+
+def index_ingested_file(vss_body, uid: str, form) -> None:
+    file_id = vss_body.get('id') if isinstance(vss_body, dict) else None
+    if not file_id:
+        print("METADATA_INDEX.PY: Ingested file not indexed (VSS returned no file id).")
+        return
+    try:
+        org_id = get_user_org_id(uid)
+        if not org_id:
+            print(f"METADATA_INDEX.PY: File {file_id} not indexed; user {uid} has no organization.")
+            return
+        camera_id = form.get('camera_id')
+        if camera_id and _camera_in_org(camera_id, org_id) is None:
+            # The file still belongs to the organization, just not to a camera it cannot see.
+            print(f"METADATA_INDEX.PY: Camera {camera_id} not found in organization {org_id}; file {file_id} indexed without it.")
+            camera_id = None
+        get_firestore_client().collection('videos').document(str(file_id)).set({
+            'vssFileId': str(file_id),
+            'orgId': org_id,
+            'userId': uid,
+            'cameraId': camera_id,
+            'filename': form.get('filename'),
+            'purpose': form.get('purpose'),
+            'mediaType': form.get('media_type'),
+            'bytes': vss_body.get('bytes'),
+            'createdAt': _server_timestamp(),
+        }, merge=True)
+    except Exception as e:
+        print(f"METADATA_INDEX.PY: Error indexing file {file_id}: {e}")
+
+
+def remove_file_from_index(file_id: str) -> None:
+    try:
+        get_firestore_client().collection('videos').document(str(file_id)).delete()
+    except Exception as e:
+        print(f"METADATA_INDEX.PY: Error removing file {file_id} from index: {e}")
+
+
+def index_created_stream(vss_body, uid: str, camera_id: str, name: str) -> None:
+    stream_id = vss_body.get('id') if isinstance(vss_body, dict) else None
+    if not stream_id:
+        print("METADATA_INDEX.PY: Stream not indexed (VSS returned no stream id).")
+        return
+    try:
+        org_id = get_user_org_id(uid)
+        camera_ref = _camera_in_org(camera_id, org_id) if org_id else None
+        if camera_ref is None:
+            print(f"METADATA_INDEX.PY: Camera {camera_id} not found in organization {org_id}; stream {stream_id} not indexed.")
+            return
+        camera_ref.update({
+            'vssStreamId': str(stream_id),
+            'vssStreamName': name,
+            'vssStreamCreatedAt': _server_timestamp(),
+            'hasVssStream': True,
+        })
+    except Exception as e:
+        print(f"METADATA_INDEX.PY: Error indexing stream {stream_id}: {e}")
+
+
+def remove_stream_from_index(stream_id: str) -> None:
+    try:
+        from firebase_admin import firestore
+        cameras = get_firestore_client().collection('cameras').where('vssStreamId', '==', str(stream_id)).stream()
+        for camera_doc in cameras:
+            camera_doc.reference.update({
+                'vssStreamId': firestore.DELETE_FIELD,
+                'vssStreamName': firestore.DELETE_FIELD,
+                'vssStreamCreatedAt': firestore.DELETE_FIELD,
+                'hasVssStream': False,
+            })
+    except Exception as e:
+        print(f"METADATA_INDEX.PY: Error removing stream {stream_id} from index: {e}")
+
+
+def parse_index_query(req):
+    """
+    Returns (filters, error). filters is None unless the caller asked for the index
+    (?source=index, or any of camera_id / created_after / created_before).
+    Times are ISO 8601, e.g. 2024-05-01T00:00:00Z.
+    """
+    camera_id = req.args.get('camera_id')
+    created_after = req.args.get('created_after')
+    created_before = req.args.get('created_before')
+    if req.args.get('source') != 'index' and not (camera_id or created_after or created_before):
+        return None, None
+    filters = {'camera_id': camera_id, 'created_after': None, 'created_before': None}
+    for key, value in (('created_after', created_after), ('created_before', created_before)):
+        if value:
+            try:
+                filters[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None, f"{key} must be an ISO 8601 timestamp"
+    return filters, None
+
+
+def _serialize(doc):
+    item = {'id': doc.id}
+    for key, value in doc.to_dict().items():
+        item[key] = value.isoformat() if isinstance(value, datetime) else value
+    return item
+
+
+def list_from_index(collection: str, org_id: str, filters: dict, listing_params):
+    """
+    Serves a listing of `collection` ('videos' or 'cameras') from Firestore.
+    listing_params comes from listing.parse_listing_params(); the cursor is the id of
+    the last document of the previous page.
+    """
+    db = get_firestore_client()
+    time_field = 'createdAt' if collection == 'videos' else 'vssStreamCreatedAt'
+    query = db.collection(collection).where('orgId', '==', org_id)
+    if collection == 'cameras':
+        query = query.where('hasVssStream', '==', True)
+    if filters['camera_id']:
+        if collection == 'cameras':
+            # A camera has at most one stream; read its document directly.
+            camera_doc = db.collection('cameras').document(filters['camera_id']).get()
+            camera = camera_doc.to_dict() if camera_doc.exists else {}
+            docs = [camera_doc] if camera.get('orgId') == org_id and camera.get('hasVssStream') else []
+            return json_response({
+                'status': 'success',
+                'data': project([_serialize(doc) for doc in docs], listing_params['fields'] if listing_params else None),
+                'pagination': None,
+                'source': 'index',
+            })
+        query = query.where('cameraId', '==', filters['camera_id'])
+    if filters['created_after']:
+        query = query.where(time_field, '>=', filters['created_after'])
+    if filters['created_before']:
+        query = query.where(time_field, '<', filters['created_before'])
+    query = query.order_by(time_field, direction='DESCENDING')
+
+    limit = listing_params['limit'] if listing_params else DEFAULT_PAGE_LIMIT
+    fields = listing_params['fields'] if listing_params else None
+    cursor = listing_params['cursor'] if listing_params else None
+    if cursor:
+        cursor_doc = db.collection(collection).document(cursor).get()
+        if not cursor_doc.exists:
+            raise ValueError("Invalid cursor")
+        query = query.start_after(cursor_doc)
+    query = query.limit(limit)
+
+    with phase('firestore_index'):
+        docs = list(query.stream())
+    next_cursor = docs[-1].id if len(docs) == limit else None
+    return json_response({
+        'status': 'success',
+        'data': project([_serialize(doc) for doc in docs], fields),
+        'pagination': {'limit': limit, 'nextCursor': next_cursor, 'total': None, 'cacheHit': False},
+        'source': 'index',
+    })
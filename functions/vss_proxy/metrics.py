@@ -0,0 +1,121 @@
+import requests
+import os
+import threading
+import time
+# Keep firebase_admin and related imports if needed
+from firebase_functions import https_fn, scheduler_fn
+
+# Import helper functions from main (only if needed in this file)
+from common.instrumentation import annotate, instrumented
+from common.rate_limit import SingleFlight
+from common.vss import get_default_vss_base_url
+from common.auth_helper import verify_firebase_token
+from common.responses import error_response, json_response, vss_success_response
+from accounting import vss_request
+from scheduler import VssQueueTimeout, vss_scheduler
+from routing import ROUTE_PATH_ID_KEY
+from metrics_rollup import HISTORY_MAX_POINTS, ROLLUP_RESOLUTIONS, extract_series, read_history, record_sample
+
+# Live VSS metrics are cached per instance for METRICS_CACHE_TTL_SECONDS, and concurrent
+# misses share a single VSS call, so dashboards polling every few seconds cost VSS at
+# most one request per TTL per instance.
+METRICS_CACHE_TTL_SECONDS = float(os.environ.get('METRICS_CACHE_TTL_SECONDS', '5'))
+_metrics_cache = {}
+_metrics_cache_lock = threading.Lock()
+_metrics_single_flight = SingleFlight()
+
+
+def get_cached_vss_metrics(vss_api_url: str):
+    """Returns a successful VSS /metrics response, at most METRICS_CACHE_TTL_SECONDS old."""
+    with _metrics_cache_lock:
+        cached = _metrics_cache.get(vss_api_url)
+    if cached and time.monotonic() < cached[1]:
+        annotate(metricsCacheHit=True)
+        return cached[0]
+    annotate(metricsCacheHit=False)
+
+    def fetch():
+        vss_api_response = vss_request(None, 'get_metrics', 'GET', vss_api_url) # Unauthenticated, so not attributed to an organization
+        vss_api_response.raise_for_status()
+        with _metrics_cache_lock:
+            _metrics_cache[vss_api_url] = (vss_api_response, time.monotonic() + METRICS_CACHE_TTL_SECONDS)
+        return vss_api_response
+
+    return _metrics_single_flight.do(vss_api_url, fetch)
+
+
+@https_fn.on_request()
+@instrumented
+def get_metrics(req: https_fn.Request) -> https_fn.Response:
+    """
+    Cloud function to get system metrics from the VSS API.
+    Does NOT require Firebase authentication.
+    Each instance caches the VSS response for METRICS_CACHE_TTL_SECONDS (instances do not
+    share it); ?history=1m|5m|1h (&points=N) returns the Firestore rollups of the last N
+    intervals instead of live metrics.
+    """
+    history_resolution = req.args.get('history')
+    if history_resolution:
+        if history_resolution not in ROLLUP_RESOLUTIONS:
+            return error_response(f"history must be one of: {', '.join(ROLLUP_RESOLUTIONS)}", 400)
+        try:
+            points = int(req.args.get('points', '60'))
+        except ValueError:
+            return error_response("points must be an integer", 400)
+        points = max(1, min(points, HISTORY_MAX_POINTS))
+        try:
+            history = read_history(history_resolution, points)
+        except Exception as e:
+            print(f"Error reading VSS metrics history: {e}")
+            return error_response(f"Error reading VSS metrics history: {e}", 500)
+        return json_response({"status": "success", "data": {"resolution": history_resolution, "points": history}})
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    # No authentication needed for metrics, directly proceed to API call
+
+    vss_api_url = f"{vss_api_base_url}/metrics"
+    try:
+        vss_api_response = get_cached_vss_metrics(vss_api_url)
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API metrics: {e}")
+        return error_response(f"Error calling VSS API metrics: {e}", 500)
+
+
+@scheduler_fn.on_schedule(schedule="every 1 minutes")
+def sample_vss_metrics(event: scheduler_fn.ScheduledEvent) -> None:
+    """Samples VSS /metrics once a minute into the 1m/5m/1h rollups read by get_metrics?history=."""
+    try:
+        vss_api_url = f"{get_default_vss_base_url()}/metrics"
+        vss_api_response = get_cached_vss_metrics(vss_api_url)
+        series = extract_series(vss_api_response.content, vss_api_response.headers.get('Content-Type', ''))
+        record_sample(series)
+        print(f"METRICS.PY: Recorded VSS metrics sample with {len(series)} series.")
+    except Exception as e:
+        print(f"METRICS.PY: Error sampling VSS metrics: {e}")
+
+
+@https_fn.on_request()
+@instrumented
+def get_vss_queue_stats(req: https_fn.Request) -> https_fn.Response:
+    """
+    Returns the VSS scheduler's per-class limits, active and queued calls, and wait
+    times for the instance that serves the request. Only meaningful through the `api`
+    function: a standalone get_vss_queue_stats instance never proxies VSS calls.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+    stats = vss_scheduler.stats()
+    stats['scope'] = 'instance'
+    stats['routed'] = ROUTE_PATH_ID_KEY in req.environ
+    return json_response({"status": "success", "data": stats})
@@ -0,0 +1,191 @@
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timezone
+from common.vss import get_firestore_client
+
+# Time-bucketed rollups of VSS /metrics samples, written by the sample_vss_metrics
+# scheduled function and read by get_metrics?history=<resolution>.
+#
+#   vssMetricsRollups/{resolution}/buckets/{bucketStartEpoch}_{shard}_{part}
+#     {start, shard, part, count, sum: {series: ...}, min: {...}, max: {...}, expireAt}
+#
+# Each bucket is spread over documents like the usage counters in accounting.py: a
+# sample goes to one random shard (0..METRICS_ROLLUP_SHARDS-1), so overlapping samplers
+# do not contend on one document, and its series are split into parts of at most
+# ROLLUP_SERIES_PER_DOC. The writes are committed in batches that stay below
+# Firestore's 500-write limit (each field transform counts as a write). read_history
+# merges a bucket's documents back together.
+#
+# A series is any numeric value in the VSS response: flattened key paths for a JSON
+# body, or metric name plus labels for Prometheus text. At most
+# METRICS_ROLLUP_MAX_SERIES series are kept, the first ones in name order, so every
+# sample rolls up the same series whatever order VSS lists them in. Add a Firestore TTL policy on
+# `expireAt` (collection group `buckets`) to drop buckets after their retention.
+ROLLUP_RESOLUTIONS = {
+    '1m': {'seconds': 60, 'retention_seconds': 24 * 3600},
+    '5m': {'seconds': 300, 'retention_seconds': 7 * 24 * 3600},
+    '1h': {'seconds': 3600, 'retention_seconds': 90 * 24 * 3600},
+}
+ROLLUP_MAX_SERIES = int(os.environ.get('METRICS_ROLLUP_MAX_SERIES', '200'))
+HISTORY_MAX_POINTS = 500
+ROLLUP_SHARDS = int(os.environ.get('METRICS_ROLLUP_SHARDS', '4'))
+ROLLUP_SERIES_PER_DOC = 50
+BATCH_MAX_WRITES = 450
+
+
+def _series_key(name: str) -> str:
+    # Firestore map keys must not contain '.', '/', or backticks when used in paths.
+    return name.replace('.', '_').replace('/', '_').replace('`', '')[:200]
+
+
+def _flatten_json(value, prefix: str, out: dict) -> None:
+    if isinstance(value, bool):
+        return
+    if isinstance(value, (int, float)):
+        out[prefix or 'value'] = float(value)
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            _flatten_json(child, f"{prefix}__{key}" if prefix else str(key), out)
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            _flatten_json(child, f"{prefix}__{index}" if prefix else str(index), out)
+
+
+def _split_series_name(line: str):
+    """
+    Splits a Prometheus exposition line into (`name{labels}`, rest). The label block ends
+    at the first '}' outside a quoted label value, so values may contain spaces or braces.
+    """
+    brace = line.find('{')
+    space = line.find(' ')
+    if brace == -1 or (space != -1 and space < brace):
+        return (line[:space], line[space:]) if space != -1 else (line, '')
+    in_string = False
+    index = brace + 1
+    while index < len(line):
+        char = line[index]
+        if in_string:
+            if char == '\\':
+                index += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '}':
+            return line[:index + 1], line[index + 1:]
+        index += 1
+    return None, None
+
+
+def _parse_prometheus_text(text: str, out: dict) -> None:
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name, rest = _split_series_name(line)
+        # `name{labels} value [timestamp]`: the sample is the first token after the name.
+        tokens = rest.split() if name else None
+        if not tokens:
+            continue
+        try:
+            value = float(tokens[0])
+        except ValueError:
+            continue
+        if math.isfinite(value):
+            out[name] = value
+
+
+def extract_series(content: bytes, content_type: str) -> dict:
+    """Returns {series_name: value} for every numeric value in a VSS /metrics body."""
+    series = {}
+    text = content.decode('utf-8', errors='replace')
+    if 'json' in (content_type or '').lower():
+        try:
+            _flatten_json(json.loads(text), '', series)
+        except ValueError:
+            pass
+    else:
+        _parse_prometheus_text(text, series)
+    return {_series_key(name): value for name, value in sorted(series.items())[:ROLLUP_MAX_SERIES]}
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def record_sample(series: dict, sampled_at: float = None) -> None:
+    """Folds one sample into the current bucket of every resolution."""
+    if not series:
+        return
+    from firebase_admin import firestore
+    sampled_at = sampled_at or time.time()
+    db = get_firestore_client()
+    shard = random.randrange(ROLLUP_SHARDS)
+    parts = list(_chunks(list(series.items()), ROLLUP_SERIES_PER_DOC))
+    batch, batch_writes = db.batch(), 0
+    for resolution, config in ROLLUP_RESOLUTIONS.items():
+        bucket_start = int(sampled_at // config['seconds'] * config['seconds'])
+        buckets = db.collection('vssMetricsRollups').document(resolution).collection('buckets')
+        for part, part_series in enumerate(parts):
+            # The document write plus one Increment and three transforms per series.
+            writes = 2 + 3 * len(part_series)
+            if batch_writes and batch_writes + writes > BATCH_MAX_WRITES:
+                batch.commit()
+                batch, batch_writes = db.batch(), 0
+            batch.set(buckets.document(f"{bucket_start}_{shard}_{part}"), {
+                'start': datetime.fromtimestamp(bucket_start, timezone.utc),
+                'shard': shard,
+                'part': part,
+                'expireAt': datetime.fromtimestamp(bucket_start + config['retention_seconds'], timezone.utc),
+                'count': firestore.Increment(1),
+                'sum': {name: firestore.Increment(value) for name, value in part_series},
+                'min': {name: firestore.Minimum(value) for name, value in part_series},
+                'max': {name: firestore.Maximum(value) for name, value in part_series},
+            }, merge=True)
+            batch_writes += writes
+    batch.commit()
+
+
+def merge_bucket_docs(docs) -> list:
+    """Merges shard/part documents into one entry per bucket start, oldest first."""
+    buckets = {}
+    for doc in docs:
+        start = doc.get('start')
+        bucket = buckets.setdefault(start, {'counts': {}, 'sum': {}, 'min': {}, 'max': {}})
+        # Every part of a shard counts the same samples; count each shard once.
+        shard = doc.get('shard', 0)
+        bucket['counts'][shard] = max(bucket['counts'].get(shard, 0), doc.get('count') or 0)
+        for name, value in (doc.get('sum') or {}).items():
+            bucket['sum'][name] = bucket['sum'].get(name, 0.0) + value
+        for name, value in (doc.get('min') or {}).items():
+            bucket['min'][name] = min(bucket['min'].get(name, value), value)
+        for name, value in (doc.get('max') or {}).items():
+            bucket['max'][name] = max(bucket['max'].get(name, value), value)
+
+    history = []
+    for start in sorted(buckets, key=lambda value: (value is None, value)):
+        bucket = buckets[start]
+        count = sum(bucket['counts'].values())
+        history.append({
+            'start': start.isoformat() if start else None,
+            'samples': count,
+            'avg': {name: total / count for name, total in bucket['sum'].items()} if count else {},
+            'min': bucket['min'],
+            'max': bucket['max'],
+        })
+    return history
+
+
+def read_history(resolution: str, points: int) -> list:
+    """Returns the buckets of `resolution` from the last `points` intervals, oldest first, with per-series avg/min/max."""
+    seconds = ROLLUP_RESOLUTIONS[resolution]['seconds']
+    oldest_start = int(time.time() // seconds * seconds) - (points - 1) * seconds
+    docs = (get_firestore_client().collection('vssMetricsRollups').document(resolution)
+            .collection('buckets')
+            .where('start', '>=', datetime.fromtimestamp(oldest_start, timezone.utc))
+            .stream())
+    return merge_bucket_docs(doc.to_dict() for doc in docs)
@@ -0,0 +1,85 @@
+import requests
+
+from firebase_functions import https_fn
+
+from common.instrumentation import instrumented
+from common.auth_helper import verify_firebase_token
+from common.vss import get_default_vss_base_url
+from common.responses import error_response, vss_success_response
+from accounting import enforce_org_quota, vss_request
+from scheduler import VssQueueTimeout
+from routing import path_id
+
+@https_fn.on_request()
+@instrumented
+def list_models(request):
+    """
+    Cloud function to list available models from the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(request)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'list_models')
+    if quota_error:
+        return quota_error
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/models"
+    try:
+        vss_api_response = vss_request(org_key, 'list_models', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to list models: {e}")
+        return error_response(f"Error calling VSS API to list models: {e}", 500)
+
+@https_fn.on_request()
+@instrumented
+def get_model_details(request):
+    """
+    Cloud function to get details of a specific model from the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(request)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'get_model_details')
+    if quota_error:
+        return quota_error
+
+    # Extract model_id from the request URL or parameters
+    try:
+        model_id = path_id(request, 'get_model_details') or request.args.get('model_id')
+        if not model_id:
+            return error_response("Model ID is required", 400)
+    except Exception as e:
+        return error_response(f"Error extracting model ID: {e}", 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/models/{model_id}"
+    try:
+        vss_api_response = vss_request(org_key, 'get_model_details', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get model details for {model_id}: {e}")
+        return error_response(f"Error calling VSS API to get model details for {model_id}: {e}", 500)
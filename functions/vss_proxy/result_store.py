@@ -0,0 +1,192 @@
+import gzip
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from common.auth_helper import ensure_firebase_app
+from common.instrumentation import annotate, phase
+from common.rate_limit import SingleFlight
+from common.responses import SUCCESS_ENVELOPE_PREFIX, SUCCESS_ENVELOPE_SUFFIX
+
+# Completed summarization results kept in Cloud Storage (SUMMARY_RESULTS_BUCKET), for
+# get_summarization_job_result. With the bucket set, URL delivery is the default.
+#
+# The first call for a job asks VSS for the job status. Once the job is complete, the
+# VSS result body is streamed through gzip into summaries/{org}/{job_id}.json.gz with a
+# resumable upload, so the result is never held in function memory, and the call
+# answers with a V4 signed URL to that object. Later calls only check that the object
+# exists and sign a new URL; they never reach VSS. Until the job is complete, calls get
+# the VSS result inline and nothing is stored. The object is stored with
+# Content-Encoding: gzip, so browsers decompress it transparently and GCS decompresses
+# it for clients that do not accept gzip. delivery=inline calls for a stored result
+# stream the object (StoredResultBody) instead of asking VSS again.
+#
+# Signing follows the snapshot service (blob.generate_signed_url, v4, GET). Cloud
+# Functions credentials have no private key, so the URL is signed through the IAM
+# signBlob API as SERVICE_ACCOUNT_EMAIL (or the runtime service account). That account
+# needs the "Service Account Token Creator" role on itself.
+SUMMARY_RESULTS_BUCKET = os.environ.get('SUMMARY_RESULTS_BUCKET')
+SUMMARY_RESULTS_PREFIX = 'summaries/'
+SUMMARY_URL_EXPIRATION_MINUTES = int(os.environ.get('SUMMARY_URL_EXPIRATION_MINUTES', '15'))
+SUMMARY_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+SUMMARY_READ_BYTES = 256 * 1024
+SUMMARY_DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+SERVICE_ACCOUNT_EMAIL = os.environ.get("SERVICE_ACCOUNT_EMAIL")
+
+# Job states after which VSS's result no longer changes. Only these results are stored;
+# anything else (queued, processing, unknown) is returned inline, so a pending result is
+# never kept in place of the final one.
+SUMMARY_FINAL_STATUSES = ('completed', 'complete', 'succeeded', 'success', 'done', 'finished')
+
+_store_single_flight = SingleFlight()
+_credentials = None
+_credentials_lock = threading.Lock()
+
+
+class ResultNotFinal(Exception):
+    """VSS answered the result request with something other than a final 200 (e.g. 202)."""
+
+    def __init__(self, vss_api_response):
+        super().__init__(f"VSS returned status {vss_api_response.status_code} for the result")
+        self.vss_api_response = vss_api_response
+
+
+class StoredResultBody:
+    """
+    A stored result opened for reading, shaped like a streamed VSS response (status_code,
+    headers, raw.stream(), close()) so vss_passthrough_response can send it. The object
+    is read in SUMMARY_DOWNLOAD_CHUNK_BYTES ranges, decompressed on the way and wrapped
+    in the same {"status": "success", "data": ...} envelope as a result fetched from VSS.
+    """
+    status_code = 200
+
+    def __init__(self, blob):
+        self.headers = {'Content-Type': 'application/json'}
+        self.reader = blob.open('rb', chunk_size=SUMMARY_DOWNLOAD_CHUNK_BYTES, raw_download=True)
+        self.raw = self
+
+    def stream(self, chunk_size: int, decode_content: bool = True):
+        yield SUCCESS_ENVELOPE_PREFIX
+        with gzip.GzipFile(fileobj=self.reader, mode='rb') as decompressed:
+            while True:
+                chunk = decompressed.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield SUCCESS_ENVELOPE_SUFFIX
+
+    def close(self) -> None:
+        self.reader.close()
+
+
+def job_is_complete(status_response) -> bool:
+    """Whether a VSS job status response reports the job as finished."""
+    if status_response.status_code != 200:
+        return False
+    try:
+        body = status_response.json()
+    except ValueError:
+        return False
+    if not isinstance(body, dict):
+        return False
+    status = body.get('status') or body.get('state') or body.get('job_status')
+    return isinstance(status, str) and status.lower() in SUMMARY_FINAL_STATUSES
+
+
+def result_object_name(org_key: str, job_id: str) -> str:
+    safe_job_id = job_id.replace('/', '_')
+    return f"{SUMMARY_RESULTS_PREFIX}{org_key or 'anonymous'}/{safe_job_id}.json.gz"
+
+
+def get_result_blob(org_key: str, job_id: str):
+    ensure_firebase_app()
+    from firebase_admin import storage
+    return storage.bucket(SUMMARY_RESULTS_BUCKET).blob(result_object_name(org_key, job_id))
+
+
+def _signing_kwargs() -> dict:
+    """Extra generate_signed_url arguments for credentials that cannot sign locally."""
+    global _credentials
+    import google.auth
+    from google.auth.transport.requests import Request as AuthRequest
+    from google.oauth2 import service_account
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials, _ = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-platform'])
+        if isinstance(_credentials, service_account.Credentials):
+            return {}  # A service account key file (GOOGLE_APPLICATION_CREDENTIALS) signs locally.
+        if not _credentials.valid:
+            _credentials.refresh(AuthRequest())
+        return {
+            'service_account_email': SERVICE_ACCOUNT_EMAIL or _credentials.service_account_email,
+            'access_token': _credentials.token,
+        }
+
+
+def signed_result(blob) -> dict:
+    """The response data for a stored result: signed URL, its expiry and the object's size."""
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=SUMMARY_URL_EXPIRATION_MINUTES)
+    with phase('sign_url'):
+        url = blob.generate_signed_url(
+            version="v4",
+            expiration=timedelta(minutes=SUMMARY_URL_EXPIRATION_MINUTES),
+            method="GET",
+            **_signing_kwargs()
+        )
+    return {
+        'resultUrl': url,
+        'resultUrlExpiresAt': expires_at.isoformat(),
+        'contentType': 'application/json',
+        'contentEncoding': 'gzip',
+        'storedBytes': blob.size,
+    }
+
+
+def find_stored_result(org_key: str, job_id: str):
+    """Returns the stored result's blob (with metadata loaded), or None if it isn't stored yet."""
+    blob = get_result_blob(org_key, job_id)
+    with phase('gcs_lookup'):
+        from google.api_core.exceptions import NotFound
+        try:
+            blob.reload()
+        except NotFound:
+            return None
+    return blob
+
+
+def _write_result(blob, vss_api_response) -> None:
+    blob.content_encoding = 'gzip'
+    blob.cache_control = 'private, max-age=86400'
+    writer = blob.open('wb', chunk_size=SUMMARY_UPLOAD_CHUNK_BYTES, content_type='application/json')
+    try:
+        with gzip.GzipFile(fileobj=writer, mode='wb', compresslevel=6, mtime=0) as compressed:
+            for chunk in vss_api_response.raw.stream(SUMMARY_READ_BYTES, decode_content=True):
+                compressed.write(chunk)
+    except BaseException:
+        # Closing would finalize a truncated object, so finish the upload and delete it.
+        try:
+            writer.close()
+            blob.delete()
+        except Exception as e:
+            print(f"RESULT_STORE.PY: Could not discard partial result {blob.name}: {e}")
+        raise
+    finally:
+        vss_api_response.close()
+    writer.close()
+
+
+def store_result(org_key: str, job_id: str, fetch):
+    """
+    Streams the VSS response returned by `fetch()` (requested with stream=True, a final 200
+    for a completed job) into GCS. Concurrent calls for the same job on this
+    instance share one fetch. Returns the stored blob.
+    """
+    def run():
+        vss_api_response = fetch()
+        blob = get_result_blob(org_key, job_id)
+        with phase('gcs_store'):
+            _write_result(blob, vss_api_response)
+        blob.reload()
+        annotate(summaryResultStoredBytes=blob.size)
+        return blob
+
+    return _store_single_flight.do((org_key, job_id), run)
@@ -0,0 +1,52 @@
+from firebase_functions import https_fn
+from common.responses import error_response
+from routing import ROUTE_PATH_ID_KEY, endpoint_name, path_segments
+from files import ingest_file, list_files, get_file_details, delete_file, get_file_content
+from streams import create_stream, list_streams, get_stream_details, delete_stream
+from health import check_health
+from metrics import get_metrics, get_vss_queue_stats
+from models import list_models, get_model_details
+from summarization import create_summarization_job, get_summarization_job_status, get_summarization_job_result
+
+# Single HTTP entry point for the whole VSS proxy: /api/<function name>[/<id>] runs the
+# same handler as the standalone function (e.g. /api/list-streams or /api/list_streams is
+# list_streams, /api/get-stream-details/<id> is get_stream_details). Every endpoint is then served by the same warm instances, which share
+# the Firebase Admin app, the VSS base URL and metrics caches, the listing cache, the
+# pooled VSS session and the request scheduler. The standalone functions stay deployed,
+# so existing callers keep working. Scheduled functions are not routed.
+ROUTES = {
+    handler.__name__: handler
+    for handler in (
+        ingest_file, list_files, get_file_details, delete_file, get_file_content,
+        create_stream, list_streams, get_stream_details, delete_stream,
+        check_health, get_metrics, get_vss_queue_stats,
+        list_models, get_model_details,
+        create_summarization_job, get_summarization_job_status, get_summarization_job_result,
+    )
+}
+
+
+def resolve_route(path: str):
+    """
+    Returns (handler, path ID) for a path like /api/get-stream-details/<id>, matching the
+    endpoint on the first segment ('get-stream-details' or 'get_stream_details') after an
+    optional 'api' segment. The handler is None for unknown endpoints.
+    """
+    segments = path_segments(path)
+    if segments and segments[0] == 'api':
+        segments = segments[1:]
+    if not segments:
+        return None, None
+    return ROUTES.get(endpoint_name(segments[0])), '/'.join(segments[1:]) or None
+
+
+# The timeout matches the longest standalone function (ingest_file).
+@https_fn.on_request(timeout_sec=540)
+def api(req: https_fn.Request) -> https_fn.Response:
+    handler, route_path_id = resolve_route(req.path)
+    if handler is None:
+        return error_response(f"Unknown endpoint: {req.path}", 404)
+    # Handlers read the ID after the endpoint name from here (see routing.path_id).
+    req.environ[ROUTE_PATH_ID_KEY] = route_path_id
+    # Each handler is still @instrumented, so its log line carries its own name.
+    return handler(req)
@@ -0,0 +1,28 @@
+# Path parsing shared by the `api` router (router.py) and the handlers that take an ID
+# from the URL (get_stream_details, delete_stream, get_model_details).
+#
+# The router matches the endpoint on the first path segment (after an optional "api"
+# segment added by Hosting rewrites) and stores whatever follows it in the WSGI environ,
+# so /api/get-stream-details/<id> and /api/get_stream_details?stream_id=<id> both work.
+# Standalone functions keep their old behaviour: the last path segment is the ID unless
+# it is the endpoint's own name.
+ROUTE_PATH_ID_KEY = 'octavision.route_path_id'
+
+
+def path_segments(path: str) -> list:
+    return [segment for segment in path.split('/') if segment]
+
+
+def endpoint_name(segment: str) -> str:
+    """'get-stream-details' and 'get_stream_details' are both the get_stream_details endpoint."""
+    return segment.replace('-', '_')
+
+
+def path_id(req, endpoint: str):
+    """The ID given in the request path for `endpoint`, or None if there is none."""
+    if ROUTE_PATH_ID_KEY in req.environ:
+        return req.environ[ROUTE_PATH_ID_KEY]
+    segments = path_segments(req.path)
+    if not segments or endpoint_name(segments[-1]) == endpoint:
+        return None
+    return segments[-1]
@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import requests
+
+# Priority scheduling of VSS calls within an instance.
+#
+# Every call belongs to a traffic class. A call starts only when both the instance-wide
+# limit (VSS_MAX_CONCURRENCY) and its class limit have room; when several calls are
+# waiting, the free slot goes to the highest-priority class first (interactive, then
+# summarization, then bulk), FIFO within a class. Bulk uploads therefore can never take
+# more than VSS_BULK_CONCURRENCY slots, and interactive calls jump the queue.
+#
+# The scheduler is in-process. Each Cloud Function runs on its own instances, so the
+# limits and ordering only apply between calls that share an instance: a standalone
+# ingest_file never competes with a standalone list_streams. Deploy with
+# VSS_PROXY_ROUTER_ONLY=true (see main.py) to serve every endpoint from the `api`
+# function, so all traffic classes share one scheduler per instance. Queue depth and
+# wait times of the serving instance are exported by get_vss_queue_stats.
+PRIORITIES = {'interactive': 0, 'summarization': 1, 'bulk': 2}
+VSS_MAX_CONCURRENCY = int(os.environ.get('VSS_MAX_CONCURRENCY', '16'))
+CLASS_LIMITS = {
+    'interactive': int(os.environ.get('VSS_INTERACTIVE_CONCURRENCY', str(VSS_MAX_CONCURRENCY))),
+    'summarization': int(os.environ.get('VSS_SUMMARIZATION_CONCURRENCY', '2')),
+    'bulk': int(os.environ.get('VSS_BULK_CONCURRENCY', '2')),
+}
+VSS_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('VSS_QUEUE_TIMEOUT_SECONDS', '30'))
+OPERATION_CLASSES = {
+    'ingest_file': 'bulk',
+    'create_summarization_job': 'summarization',
+}
+SLOW_WAIT_LOG_SECONDS = 1.0
+WAIT_SAMPLES = 500
+
+
+class VssQueueTimeout(requests.exceptions.RequestException):
+    """Raised when a VSS call waited longer than the queue timeout for a slot."""
+
+
+def operation_class(operation: str) -> str:
+    return OPERATION_CLASSES.get(operation, 'interactive')
+
+
+class VssScheduler:
+    def __init__(self, max_concurrency: int, class_limits: dict):
+        self.max_concurrency = max_concurrency
+        self.class_limits = dict(class_limits)
+        self.condition = threading.Condition()
+        self.waiting = []  # heap of (priority, sequence, traffic_class)
+        self.sequence = itertools.count()
+        self.active = {name: 0 for name in class_limits}
+        self.completed = {name: 0 for name in class_limits}
+        self.timeouts = {name: 0 for name in class_limits}
+        self.waits = {name: deque(maxlen=WAIT_SAMPLES) for name in class_limits}
+
+    def _can_run(self, traffic_class: str) -> bool:
+        return (sum(self.active.values()) < self.max_concurrency
+                and self.active[traffic_class] < self.class_limits[traffic_class])
+
+    def _next_runnable(self):
+        """The waiting entry that should get the next free slot, or None."""
+        for entry in sorted(self.waiting):
+            if self._can_run(entry[2]):
+                return entry
+        return None
+
+    def acquire(self, traffic_class: str, timeout: float = VSS_QUEUE_TIMEOUT_SECONDS) -> float:
+        """Blocks until a slot is granted and returns the time spent waiting."""
+        entry = (PRIORITIES[traffic_class], next(self.sequence), traffic_class)
+        started = time.monotonic()
+        deadline = started + timeout
+        with self.condition:
+            heapq.heappush(self.waiting, entry)
+            while self._next_runnable() != entry:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.waiting.remove(entry)
+                    heapq.heapify(self.waiting)
+                    self.timeouts[traffic_class] += 1
+                    self.condition.notify_all()
+                    raise VssQueueTimeout(f"VSS queue timeout: no {traffic_class} slot within {timeout:g}s")
+                self.condition.wait(remaining)
+            self.waiting.remove(entry)
+            heapq.heapify(self.waiting)
+            self.active[traffic_class] += 1
+            waited = time.monotonic() - started
+            self.waits[traffic_class].append(waited)
+            # Another waiter may be runnable too (e.g. a lower class with its own free capacity).
+            self.condition.notify_all()
+        if waited >= SLOW_WAIT_LOG_SECONDS:
+            print(f"SCHEDULER.PY: {traffic_class} VSS call waited {waited:.2f}s for a slot.")
+        return waited
+
+    def release(self, traffic_class: str) -> None:
+        with self.condition:
+            self.active[traffic_class] -= 1
+            self.completed[traffic_class] += 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, traffic_class: str):
+        self.acquire(traffic_class)
+        try:
+            yield
+        finally:
+            self.release(traffic_class)
+
+    def stats(self) -> dict:
+        with self.condition:
+            queued = {name: 0 for name in self.class_limits}
+            for _, _, traffic_class in self.waiting:
+                queued[traffic_class] += 1
+            classes = {}
+            for name, limit in self.class_limits.items():
+                waits = sorted(self.waits[name])
+                classes[name] = {
+                    'limit': limit,
+                    'active': self.active[name],
+                    'queued': queued[name],
+                    'completed': self.completed[name],
+                    'timeouts': self.timeouts[name],
+                    'waitMsAvg': round(1000 * sum(waits) / len(waits), 1) if waits else None,
+                    'waitMsP95': round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else None,
+                    'waitMsMax': round(1000 * waits[-1], 1) if waits else None,
+                }
+            return {'maxConcurrency': self.max_concurrency, 'classes': classes}
+
+
+vss_scheduler = VssScheduler(VSS_MAX_CONCURRENCY, CLASS_LIMITS)
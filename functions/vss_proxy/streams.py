@@ -0,0 +1,200 @@
+import requests
+import os
+
+# Import helper functions from main
+from common.instrumentation import instrumented
+from common.auth_helper import verify_firebase_token
+from common.idempotency import idempotent
+from common.vss import get_default_vss_base_url
+from common.responses import error_response, is_json_body, vss_success_response
+from accounting import enforce_org_quota, vss_request
+from scheduler import VssQueueTimeout
+from routing import path_id
+from common.orgs import get_user_org_id
+from listing import invalidate_listing, list_vss_resource, parse_listing_params
+from metadata_index import index_created_stream, list_from_index, parse_index_query, remove_stream_from_index
+SERVICE_ACCOUNT_EMAIL = os.environ.get("SERVICE_ACCOUNT_EMAIL")
+from firebase_functions import https_fn
+
+@https_fn.on_request()
+@instrumented
+@idempotent('create_stream')
+def create_stream(req: https_fn.Request) -> https_fn.Response:
+    """
+    Cloud function to create a new stream in the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'create_stream')
+    if quota_error:
+        return quota_error
+
+    try:
+        request_data = req.get_json()
+        name = request_data.get('name')
+        description = request_data.get('description')
+        camera_id = request_data.get('camera_id') # Optional; links the stream to a camera in the metadata index
+
+        if not name:
+            return error_response("Stream name is required", 400)
+
+    except Exception as e:
+        return error_response(f"Invalid JSON input: {e}", 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+    vss_api_url = f"{vss_api_base_url}/streams"
+    payload = {'name': name, 'description': description}
+
+    try:
+        vss_api_response = vss_request(org_key, 'create_stream', 'POST', vss_api_url, json=payload)
+        vss_api_response.raise_for_status()
+        invalidate_listing(vss_api_url)
+        if camera_id and is_json_body(vss_api_response):
+            index_created_stream(vss_api_response.json(), decoded_token['uid'], camera_id, name)
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to create stream: {e}")
+        return error_response(f"Error calling VSS API to create stream: {e}", 500)
+
+@https_fn.on_request()
+@instrumented
+def list_streams(req: https_fn.Request) -> https_fn.Response:
+    """
+    Cloud function to list streams from the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'list_streams')
+    if quota_error:
+        return quota_error
+
+    listing_params, params_error = parse_listing_params(req)
+    if params_error:
+        return error_response(params_error, 400)
+
+    index_filters, filters_error = parse_index_query(req)
+    if filters_error:
+        return error_response(filters_error, 400)
+    if index_filters is not None:
+        org_id = get_user_org_id(decoded_token['uid'])
+        if not org_id:
+            return error_response("User does not belong to an organization", 403)
+        try:
+            return list_from_index('cameras', org_id, index_filters, listing_params)
+        except ValueError as e:
+            return error_response(str(e), 400)
+    
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/streams"
+    try:
+        return list_vss_resource(vss_api_url, listing_params, org_key, 'list_streams')
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to list streams: {e}")
+        return error_response(f"Error calling VSS API to list streams: {e}", 500)
+@https_fn.on_request()
+@instrumented
+def get_stream_details(req: https_fn.Request) -> https_fn.Response:
+    """
+    Cloud function to get details of a specific stream from the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'get_stream_details')
+    if quota_error:
+        return quota_error
+    
+    # Extract stream_id from the request URL or parameters
+    try:
+        stream_id = path_id(req, 'get_stream_details') or req.args.get('stream_id')
+        if not stream_id:
+            return error_response("Stream ID is required", 400)
+    except Exception as e:
+        return error_response(f"Error extracting stream ID: {e}", 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/streams/{stream_id}"
+    try:
+        vss_api_response = vss_request(org_key, 'get_stream_details', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get stream details for {stream_id}: {e}")
+        return error_response(f"Error calling VSS API to get stream details for {stream_id}: {e}", 500)
+@https_fn.on_request()
+@instrumented
+def delete_stream(req: https_fn.Request) -> https_fn.Response:
+    """
+    Cloud function to delete a stream in the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'delete_stream')
+    if quota_error:
+        return quota_error
+
+    # Extract stream_id from the request URL or parameters
+    try:
+        stream_id = path_id(req, 'delete_stream') or req.args.get('stream_id')
+        if not stream_id:
+            return error_response("Stream ID is required", 400)
+
+    except Exception as e:
+        return error_response(f"Error extracting stream ID: {e}", 400)
+
+    try:
+
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/streams/{stream_id}"
+    try:
+        vss_api_response = vss_request(org_key, 'delete_stream', 'DELETE', vss_api_url)
+        vss_api_response.raise_for_status()
+        invalidate_listing(f"{vss_api_base_url}/streams")
+        remove_stream_from_index(stream_id)
+        return vss_success_response(vss_api_response, fallback_data={"message": "Stream deleted successfully"})
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to delete stream {stream_id}: {e}")
+        return error_response(f"Error calling VSS API to delete stream {stream_id}: {e}", 500)
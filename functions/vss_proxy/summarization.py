@@ -0,0 +1,227 @@
+import requests
+
+from firebase_functions import https_fn
+from firebase_functions.https_fn import Request, Response
+# Import helper functions from main
+from common.instrumentation import annotate, instrumented
+from common.auth_helper import verify_firebase_token
+from common.idempotency import idempotent
+from common.vss import get_default_vss_base_url
+from common.responses import error_response, json_response, vss_passthrough_response, vss_success_response
+from accounting import enforce_org_quota, vss_request
+from scheduler import VssQueueTimeout
+from result_store import (SUMMARY_RESULTS_BUCKET, ResultNotFinal, StoredResultBody, find_stored_result,
+                          job_is_complete, signed_result, store_result)
+
+@https_fn.on_request()
+@instrumented
+@idempotent('create_summarization_job')
+def create_summarization_job(req: Request) -> Response:
+    """
+    Cloud function to create a summarization job in the VSS API.
+    Requires Firebase authentication.
+    """
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'create_summarization_job')
+    if quota_error:
+        return quota_error
+
+    try:
+        request_data = req.get_json(silent=True)
+        file_ids = request_data.get('file_ids')
+        model_id = request_data.get('model_id')
+        output_format = request_data.get('output_format', 'text') # Default to text
+
+        if not file_ids or not isinstance(file_ids, list) or not model_id:
+            return error_response("file_ids (list) and model_id are required", 400)
+
+    except Exception as e:
+        return error_response(f"Invalid JSON input: {e}", 400)
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+    
+    vss_api_url = f"{vss_api_base_url}/summarize"
+    payload = {
+        'file_ids': file_ids,
+        'model_id': model_id,
+        'output_format': output_format
+    }
+
+    try:
+        vss_api_response = vss_request(org_key, 'create_summarization_job', 'POST', vss_api_url, json=payload)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to create summarization job: {e}")
+        return error_response(f"Error calling VSS API to create summarization job: {e}", 500)
+    
+@https_fn.on_request()
+@instrumented
+def get_summarization_job_status(req: Request) -> Response:
+    """
+    Cloud function to get the status of a summarization job from the VSS API.
+    Requires Firebase authentication.
+    """
+
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'get_summarization_job_status')
+    if quota_error:
+        return quota_error
+    
+    # Extract job_id from the request URL or parameters
+    try:
+        job_id = req.args.get('job_id')
+        if not job_id:
+            return error_response("Job ID is required", 400)
+    except Exception as e:
+        return error_response(f"Error extracting Job ID: {e}", 400)
+
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    vss_api_url = f"{vss_api_base_url}/summarize/{job_id}"
+    try:
+        vss_api_response = vss_request(org_key, 'get_summarization_job_status', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get summarization job status for {job_id}: {e}")
+        return error_response(f"Error calling VSS API to get summarization job status for {job_id}: {e}", 500)
+    
+@https_fn.on_request()
+@instrumented
+def get_summarization_job_result(req: Request) -> Response:
+    """
+    Cloud function to get the result of a completed summarization job from the VSS API.
+    Requires Firebase authentication.
+
+    With SUMMARY_RESULTS_BUCKET set, a completed job's result is stored in GCS on the
+    first call and every call returns a signed URL to it (see result_store.py).
+    ?delivery=inline returns the result in the body instead, streamed from GCS once it is
+    stored. Without the bucket, results are always returned inline.
+    """
+    # Extract job_id from the request URL or parameters
+    decoded_token, error = verify_firebase_token(req)
+    if error:
+        return error_response(f"Authentication failed: {error}", 401)
+
+    org_key, quota_error = enforce_org_quota(decoded_token, 'get_summarization_job_result')
+    if quota_error:
+        return quota_error
+
+    try:
+        job_id = req.args.get('job_id')
+        if not job_id:
+            return error_response("Job ID is required", 400)
+    except Exception as e:
+        return error_response(f"Error extracting Job ID: {e}", 400)
+
+    delivery = req.args.get('delivery', 'url' if SUMMARY_RESULTS_BUCKET else 'inline')
+    if delivery not in ('inline', 'url'):
+        return error_response("delivery must be 'inline' or 'url'", 400)
+    if delivery == 'url' and not SUMMARY_RESULTS_BUCKET:
+        return error_response("Result URLs are not configured (SUMMARY_RESULTS_BUCKET is not set)", 503)
+
+    if delivery == 'inline' and SUMMARY_RESULTS_BUCKET:
+        stored_response = stored_inline_result(org_key, job_id)
+        if stored_response is not None:
+            return stored_response
+
+    try:
+        vss_api_base_url = get_default_vss_base_url()
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return error_response(f"VSS API configuration error: {e}", 503)
+
+    if delivery == 'url':
+        return stored_summarization_result(org_key, job_id, vss_api_base_url)
+    return inline_summarization_result(org_key, job_id, f"{vss_api_base_url}/summarize/{job_id}/result")
+
+
+def stored_inline_result(org_key: str, job_id: str):
+    """Streams an already stored result from GCS, or returns None if it is not stored."""
+    try:
+        blob = find_stored_result(org_key, job_id)
+    except Exception as e:
+        print(f"Error looking up stored summarization job result for {job_id}: {e}")
+        return None
+    annotate(summaryResultCacheHit=blob is not None)
+    if blob is None:
+        return None
+    return vss_passthrough_response(StoredResultBody(blob))
+
+
+def inline_summarization_result(org_key: str, job_id: str, vss_api_url: str) -> Response:
+    try:
+        vss_api_response = vss_request(org_key, 'get_summarization_job_result', 'GET', vss_api_url)
+        vss_api_response.raise_for_status()
+        return vss_success_response(vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get summarization job result for {job_id}: {e}")
+        return error_response(f"Error calling VSS API to get summarization job result for {job_id}: {e}", 500)
+
+
+def stored_summarization_result(org_key: str, job_id: str, vss_api_base_url: str) -> Response:
+    """
+    Serves a summarization result as a signed GCS URL, storing it from VSS on first use.
+    Results of jobs VSS does not report as complete are returned inline and not stored.
+    """
+    vss_api_url = f"{vss_api_base_url}/summarize/{job_id}/result"
+
+    def fetch():
+        vss_api_response = vss_request(org_key, 'get_summarization_job_result', 'GET', vss_api_url, stream=True)
+        if vss_api_response.status_code != 200:
+            # Read the body now so every caller sharing this fetch can use it, then free the slot.
+            vss_api_response.content
+            vss_api_response.close()
+            vss_api_response.raise_for_status()
+            raise ResultNotFinal(vss_api_response)
+        return vss_api_response
+
+    try:
+        blob = find_stored_result(org_key, job_id)
+        annotate(summaryResultCacheHit=blob is not None)
+        if blob is None:
+            status_response = vss_request(org_key, 'get_summarization_job_status', 'GET',
+                                          f"{vss_api_base_url}/summarize/{job_id}")
+            status_response.raise_for_status()
+            if not job_is_complete(status_response):
+                annotate(summaryResultStored=False)
+                return inline_summarization_result(org_key, job_id, vss_api_url)
+            blob = store_result(org_key, job_id, fetch)
+        return json_response({'status': 'success', 'data': signed_result(blob)})
+    except ResultNotFinal as e:
+        annotate(summaryResultStored=False)
+        return vss_success_response(e.vss_api_response)
+    except VssQueueTimeout as e:
+        print(f"Error calling VSS API: {e}")
+        return error_response(str(e), 503, headers={'Retry-After': '5'})
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling VSS API to get summarization job result for {job_id}: {e}")
+        return error_response(f"Error calling VSS API to get summarization job result for {job_id}: {e}", 500)
+    except Exception as e:
+        print(f"Error storing or signing summarization job result for {job_id}: {e}")
+        return error_response(f"Error delivering summarization job result for {job_id}: {e}", 500)
@@ -0,0 +1,179 @@
+import logging
+import os
+import shutil
+import subprocess
+import time
+
+# Force TCP for RTSP in OpenCV's FFmpeg backend (UDP loses packets behind NAT and makes
+# reads stall). Must be set before the first VideoCapture is opened.
+os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', 'rtsp_transport;tcp')
+
+import cv2
+from gating import thumbnail_from_frame, thumbnail_from_jpeg
+from instrumentation import phase
+
+logger = logging.getLogger(__name__)
+
+# Frame capture for /take-snapshot.
+#
+# "keyframe" mode runs ffmpeg with `-skip_frame nokey`, so only the first keyframe is
+# decoded and ffmpeg writes the JPEG itself; nothing in between is decoded. "decode" mode
+# is the original OpenCV path (decodes from the first frame the stream delivers and
+# re-encodes with cv2.imencode), now with open/read timeouts, and stays the default.
+# keyframe is opt-in, per request (capture_mode) or with SNAPSHOT_CAPTURE_MODE=keyframe,
+# and falls back to decode when the ffmpeg binary is missing.
+#
+# Every capture runs against a deadline (SNAPSHOT_DEADLINE_SECONDS by default). In
+# keyframe mode the ffmpeg process is killed at the deadline; in decode mode the OpenCV
+# open and read timeouts are derived from the remaining time. Either way the caller gets
+# CaptureTimeout and answers 504 instead of hanging on an unresponsive camera.
+#
+# An optional `gate(thumbnail) -> bool` (see gating.py) sees a small grayscale version of
+# the frame before it is encoded; returning True means "unchanged" and skips the encode.
+# If the gate fails, the frame is kept and the returned thumbnail is None.
+SNAPSHOT_DEADLINE_SECONDS = float(os.environ.get('SNAPSHOT_DEADLINE_SECONDS', '15'))
+SNAPSHOT_JPEG_QUALITY = int(os.environ.get('SNAPSHOT_JPEG_QUALITY', '90'))
+FFMPEG_BINARY = shutil.which(os.environ.get('FFMPEG_BINARY', 'ffmpeg'))
+CAPTURE_MODES = ('keyframe', 'decode')
+DEFAULT_CAPTURE_MODE = os.environ.get('SNAPSHOT_CAPTURE_MODE', 'decode')
+
+# JPEG start-of-frame markers that carry the image dimensions.
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class CaptureError(Exception):
+    """Capture failed; `stage` is 'open', 'read' or 'encode'."""
+
+    def __init__(self, message: str, stage: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+class CaptureTimeout(CaptureError):
+    """The camera did not deliver a frame before the deadline."""
+
+
+def jpeg_dimensions(jpeg: bytes):
+    """Returns (width, height) from a JPEG's SOF header without decoding it, or None."""
+    index = 2
+    while index + 9 < len(jpeg):
+        if jpeg[index] != 0xFF:
+            return None
+        marker = jpeg[index + 1]
+        segment_length = int.from_bytes(jpeg[index + 2:index + 4], 'big')
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(jpeg[index + 5:index + 7], 'big')
+            width = int.from_bytes(jpeg[index + 7:index + 9], 'big')
+            return width, height
+        index += 2 + segment_length
+    return None
+
+
+def _ffmpeg_keyframe_command(rtsp_url: str, timeout_seconds: float) -> list:
+    command = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error']
+    if rtsp_url.startswith(('rtsp://', 'rtsps://')):
+        # Socket I/O timeout in microseconds, so a stalled connection fails inside ffmpeg too.
+        command += ['-rtsp_transport', 'tcp', '-timeout', str(int(timeout_seconds * 1_000_000))]
+    # ffmpeg's -q:v scale is 2 (best) to 31 (worst); map the 0-100 quality roughly onto it.
+    qscale = max(2, min(31, round(31 - SNAPSHOT_JPEG_QUALITY * 29 / 100)))
+    command += ['-skip_frame', 'nokey', '-i', rtsp_url,
+                '-frames:v', '1', '-an', '-f', 'image2pipe', '-c:v', 'mjpeg', '-q:v', str(qscale), 'pipe:1']
+    return command
+
+
+def _run_gate(gate, make_thumbnail):
+    """
+    Returns (thumbnail, unchanged). Change detection is only an optimization, so if it
+    fails the frame is treated as changed (thumbnail None) and captured normally.
+    """
+    try:
+        with phase('gate'):
+            thumbnail = make_thumbnail()
+            return thumbnail, gate(thumbnail)
+    except Exception as e:
+        logger.warning(f"Snapshot Service: Change detection failed, keeping the frame: {e}")
+        return None, False
+
+
+def capture_keyframe(rtsp_url: str, deadline: float, gate=None):
+    """
+    Returns (jpeg_bytes, (width, height), thumbnail) for the stream's first keyframe.
+    jpeg_bytes is None when `gate` reported the frame as unchanged.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise CaptureTimeout("Snapshot deadline exceeded before capture started", 'open')
+    with phase('capture_keyframe'):
+        try:
+            result = subprocess.run(_ffmpeg_keyframe_command(rtsp_url, remaining), capture_output=True, timeout=remaining)
+        except subprocess.TimeoutExpired:
+            raise CaptureTimeout(f"No keyframe from the stream within {remaining:.1f}s", 'read')
+    if result.returncode != 0 or not result.stdout:
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()
+        logger.error(f"Snapshot Service: ffmpeg keyframe capture failed (exit {result.returncode}): {stderr[-500:]}")
+        raise CaptureError("Could not read a keyframe from the stream", 'read')
+    dimensions = jpeg_dimensions(result.stdout)
+    thumbnail = None
+    if gate is not None:
+        # ffmpeg has already encoded the JPEG; an unchanged frame still skips the upload.
+        thumbnail, unchanged = _run_gate(gate, lambda: thumbnail_from_jpeg(result.stdout))
+        if unchanged:
+            return None, dimensions, thumbnail
+    return result.stdout, dimensions, thumbnail
+
+
+def capture_decoded(rtsp_url: str, deadline: float, gate=None):
+    """
+    Returns (jpeg_bytes, (width, height), thumbnail) via OpenCV, bounded by the deadline.
+    jpeg_bytes is None when `gate` reported the frame as unchanged.
+    """
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise CaptureTimeout("Snapshot deadline exceeded before capture started", 'open')
+    cap = None
+    try:
+        with phase('capture_open'):
+            cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, remaining_ms,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, remaining_ms,
+            ])
+        if not cap.isOpened():
+            if time.monotonic() >= deadline:
+                raise CaptureTimeout("Timed out opening the video stream", 'open')
+            raise CaptureError("Could not open video stream", 'open')
+
+        with phase('capture_read'):
+            ret, frame = cap.read()
+        if not ret or frame is None:
+            if time.monotonic() >= deadline:
+                raise CaptureTimeout("Timed out reading a frame from the stream", 'read')
+            raise CaptureError("Could not read frame from stream", 'read')
+
+        height, width = frame.shape[:2]
+        thumbnail = None
+        if gate is not None:
+            thumbnail, unchanged = _run_gate(gate, lambda: thumbnail_from_frame(frame))
+            if unchanged:
+                return None, (width, height), thumbnail
+
+        with phase('encode'):
+            is_success, image_buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, SNAPSHOT_JPEG_QUALITY])
+        if not is_success:
+            raise CaptureError("Error encoding image to JPEG", 'encode')
+        return image_buffer.tobytes(), (width, height), thumbnail
+    finally:
+        if cap is not None and cap.isOpened():
+            cap.release()
+
+
+def capture_snapshot(rtsp_url: str, mode: str = None, deadline_seconds: float = None, gate=None):
+    """
+    Captures one JPEG frame from `rtsp_url`. Returns (jpeg_bytes, (width, height) or None,
+    thumbnail or None); jpeg_bytes may be None if `gate` said the frame is unchanged.
+    Raises CaptureTimeout when the deadline passes and CaptureError on other failures.
+    """
+    mode = mode or DEFAULT_CAPTURE_MODE
+    deadline = time.monotonic() + (deadline_seconds or SNAPSHOT_DEADLINE_SECONDS)
+    if mode == 'keyframe' and FFMPEG_BINARY:
+        return capture_keyframe(rtsp_url, deadline, gate)
+    return capture_decoded(rtsp_url, deadline, gate)
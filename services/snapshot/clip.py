@@ -0,0 +1,131 @@
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from capture import FFMPEG_BINARY, CaptureError, CaptureTimeout
+from instrumentation import phase
+
+logger = logging.getLogger(__name__)
+
+# Short clip capture for /capture-clip.
+#
+# ffmpeg reads the RTSP stream for the requested duration and writes a fragmented MP4
+# to stdout, which is copied in CLIP_READ_BYTES pieces into a GCS resumable upload
+# (blob.open('wb')) that sends CLIP_UPLOAD_CHUNK_BYTES per request. Memory use is about
+# one upload chunk however long the clip is, and nothing touches the local disk except
+# ffmpeg's log. By default the camera's video is copied without re-encoding ("copy");
+# "h264" re-encodes with libx264 for cameras whose codec VSS cannot ingest (e.g. MJPEG).
+#
+# ffmpeg is killed if it has not finished CLIP_CONNECT_TIMEOUT_SECONDS after the clip
+# should have ended; the caller then gets CaptureTimeout.
+CLIP_MAX_DURATION_SECONDS = float(os.environ.get('CLIP_MAX_DURATION_SECONDS', '60'))
+CLIP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('CLIP_CONNECT_TIMEOUT_SECONDS', '15'))
+# Resumable uploads need a multiple of 256 KiB per chunk.
+CLIP_UPLOAD_CHUNK_BYTES = int(os.environ.get('CLIP_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
+CLIP_READ_BYTES = 256 * 1024
+CLIP_ENCODINGS = ('copy', 'h264')
+CLIP_CONTENT_TYPE = 'video/mp4'
+
+_INPUT_VIDEO_RE = re.compile(r'Input #0.*?Stream #0:\d+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})', re.S)
+_PROGRESS_TIME_RE = re.compile(r'time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+
+
+def _ffmpeg_clip_command(rtsp_url: str, duration_seconds: float, encoding: str) -> list:
+    command = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'info']
+    if rtsp_url.startswith(('rtsp://', 'rtsps://')):
+        command += ['-rtsp_transport', 'tcp', '-timeout', str(int(CLIP_CONNECT_TIMEOUT_SECONDS * 1_000_000))]
+    command += ['-i', rtsp_url, '-t', f'{duration_seconds:g}', '-map', '0:v:0', '-an']
+    if encoding == 'h264':
+        command += ['-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p']
+    else:
+        command += ['-c:v', 'copy']
+    # Fragmented MP4 can be written to a pipe (a regular MP4 needs to seek back to write the index).
+    command += ['-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov+default_base_moof', 'pipe:1']
+    return command
+
+
+def _parse_ffmpeg_log(log: str) -> dict:
+    info = {'codec': None, 'resolution': None, 'durationSeconds': None}
+    match = _INPUT_VIDEO_RE.search(log)
+    if match:
+        info['codec'] = match.group(1)
+        info['resolution'] = f"{match.group(2)}x{match.group(3)}"
+    times = _PROGRESS_TIME_RE.findall(log)
+    if times:
+        hours, minutes, seconds = times[-1]
+        info['durationSeconds'] = round(int(hours) * 3600 + int(minutes) * 60 + float(seconds), 2)
+    return info
+
+
+def _discard_upload(writer, blob) -> None:
+    # IOBase closes a writer when it is garbage-collected, which would finalize a truncated
+    # clip, so close it now and delete whatever object that produced.
+    if writer is None:
+        return
+    try:
+        writer.close()
+        blob.delete()
+    except Exception as e:
+        logger.warning(f"Snapshot Service: Could not discard partial clip {blob.name}: {e}")
+
+
+def capture_clip(rtsp_url: str, duration_seconds: float, blob, encoding: str = 'copy') -> dict:
+    """
+    Records `duration_seconds` of `rtsp_url` into `blob` as MP4. Returns
+    {'sizeBytes', 'codec', 'resolution', 'durationSeconds'}. Raises CaptureTimeout if
+    ffmpeg overruns its deadline and CaptureError if it fails or produces no video; in
+    both cases the partial upload is discarded.
+    """
+    if not FFMPEG_BINARY:
+        raise CaptureError("Clip capture requires ffmpeg", 'open')
+
+    deadline_seconds = duration_seconds + CLIP_CONNECT_TIMEOUT_SECONDS
+    with tempfile.TemporaryFile() as log_file:
+        process = subprocess.Popen(_ffmpeg_clip_command(rtsp_url, duration_seconds, encoding),
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=log_file)
+        timed_out = threading.Event()
+
+        def kill_on_deadline():
+            timed_out.set()
+            process.kill()
+
+        watchdog = threading.Timer(deadline_seconds, kill_on_deadline)
+        watchdog.start()
+        size = 0
+        writer = None
+        try:
+            with phase('record_upload'):
+                writer = blob.open('wb', chunk_size=CLIP_UPLOAD_CHUNK_BYTES, content_type=CLIP_CONTENT_TYPE)
+                while True:
+                    chunk = process.stdout.read(CLIP_READ_BYTES)
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    size += len(chunk)
+                return_code = process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            _discard_upload(writer, blob)
+            raise
+        finally:
+            watchdog.cancel()
+            process.stdout.close()
+
+        log_file.seek(0)
+        log = log_file.read().decode('utf-8', errors='replace')
+
+    if timed_out.is_set():
+        _discard_upload(writer, blob)
+        raise CaptureTimeout(f"Clip did not finish within {deadline_seconds:g}s", 'read')
+    if return_code != 0 or size == 0:
+        logger.error(f"Snapshot Service: ffmpeg clip capture failed (exit {return_code}): {log.strip()[-500:]}")
+        _discard_upload(writer, blob)
+        raise CaptureError("Could not record a clip from the stream", 'read')
+
+    # Closing the writer uploads the last (partial) chunk and finalizes the object.
+    with phase('upload_finalize'):
+        writer.close()
+    return {'sizeBytes': size, **_parse_ffmpeg_log(log)}
@@ -0,0 +1,38 @@
+import logging
+import os
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Scene descriptions for /take-snapshot {"describe": true}.
+#
+# Once the snapshot is in GCS, this service asks the suggest_scene_description Cloud
+# Function (SCENE_DESCRIPTION_URL) to describe it by gcsObjectName, with the caller's own
+# Firebase ID token. The function reads the JPEG from the bucket itself, so the image is
+# not sent over the network a second time (as base64, a third larger) and the browser
+# no longer downloads the snapshot to upload it again. When change detection reuses an
+# earlier snapshot, its description is reused too, or requested the same way if that
+# snapshot was never described.
+SCENE_DESCRIPTION_URL = os.environ.get('SCENE_DESCRIPTION_URL')
+SCENE_DESCRIPTION_TIMEOUT_SECONDS = float(os.environ.get('SCENE_DESCRIPTION_TIMEOUT_SECONDS', '60'))
+
+_session = requests.Session()
+
+
+def describe_snapshot(authorization: str, gcs_object_name: str):
+    """Returns (sceneDescription, None) or (None, error message)."""
+    try:
+        response = _session.post(SCENE_DESCRIPTION_URL, json={'gcsObjectName': gcs_object_name},
+                                 headers={'Authorization': authorization}, timeout=SCENE_DESCRIPTION_TIMEOUT_SECONDS)
+        payload = response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Snapshot Service: Scene description request failed: {e}")
+        return None, f"Scene description request failed: {e}"
+    if not isinstance(payload, dict):
+        logger.warning(f"Snapshot Service: Scene description returned a non-object body (status {response.status_code})")
+        return None, f"Unexpected scene description response (status {response.status_code})"
+    if response.status_code != 200 or payload.get('status') != 'success':
+        message = payload.get('message') or f"status {response.status_code}"
+        logger.warning(f"Snapshot Service: Scene description failed: {message}")
+        return None, message
+    return payload.get('sceneDescription'), None
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+# Change-detection gating for /take-snapshot (opt-in with "skip_if_unchanged": true).
+#
+# Each captured frame is reduced to a small grayscale thumbnail and compared with the
+# thumbnail of the last snapshot the same user uploaded for that camera. If less than
+# SNAPSHOT_GATE_CHANGE_THRESHOLD of its pixels changed by more than
+# SNAPSHOT_GATE_PIXEL_DELTA gray levels, the previous gcsObjectName is returned and
+# nothing is encoded or uploaded. A reference older than SNAPSHOT_GATE_MAX_AGE_SECONDS
+# is never reused, so static cameras still get a fresh snapshot now and then.
+#
+# References live in process memory (shared by a worker's threads, not across workers
+# or instances), so the first snapshot a process takes for a camera is always uploaded.
+GATE_THUMBNAIL_WIDTH = 96
+GATE_PIXEL_DELTA = int(os.environ.get('SNAPSHOT_GATE_PIXEL_DELTA', '25'))
+GATE_CHANGE_THRESHOLD = float(os.environ.get('SNAPSHOT_GATE_CHANGE_THRESHOLD', '0.02'))
+GATE_MAX_AGE_SECONDS = float(os.environ.get('SNAPSHOT_GATE_MAX_AGE_SECONDS', '300'))
+GATE_MAX_CAMERAS = int(os.environ.get('SNAPSHOT_GATE_MAX_CAMERAS', '1000'))
+
+_references = OrderedDict()
+_references_lock = threading.Lock()
+
+
+def camera_key(uid: str, camera_id, rtsp_url: str) -> str:
+    """
+    The caller's uid plus camera_id if given, else a hash of the URL (so credentials in it
+    are not kept). Scoping by uid keeps one tenant from being handed another tenant's
+    snapshot for the same camera_id or URL.
+    """
+    camera = str(camera_id) if camera_id else hashlib.sha256(rtsp_url.encode()).hexdigest()
+    return f"user:{uid}:{camera}"
+
+
+def _resize(gray: np.ndarray) -> np.ndarray:
+    height, width = gray.shape[:2]
+    thumb_height = max(1, round(height * GATE_THUMBNAIL_WIDTH / width))
+    thumb = cv2.resize(gray, (GATE_THUMBNAIL_WIDTH, thumb_height), interpolation=cv2.INTER_AREA)
+    # A light blur keeps sensor noise and compression artefacts from counting as change.
+    return cv2.GaussianBlur(thumb, (3, 3), 0)
+
+
+def thumbnail_from_frame(frame: np.ndarray) -> np.ndarray:
+    return _resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+
+def thumbnail_from_jpeg(jpeg: bytes) -> np.ndarray:
+    # IMREAD_REDUCED_GRAYSCALE_8 lets libjpeg decode at 1/8 scale, far cheaper than a full decode.
+    gray = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        raise ValueError("Could not decode JPEG for change detection")
+    return _resize(gray)
+
+
+def change_ratio(previous: np.ndarray, current: np.ndarray) -> float:
+    """Fraction of thumbnail pixels whose gray level moved by more than GATE_PIXEL_DELTA."""
+    if previous.shape != current.shape:
+        return 1.0
+    changed = cv2.absdiff(previous, current) > GATE_PIXEL_DELTA
+    return float(np.count_nonzero(changed)) / changed.size
+
+
+def check_unchanged(key: str, thumbnail: np.ndarray):
+    """
+    Returns (reference, ratio). reference is the stored entry ({'gcsObjectName',
+    'resolution', ...}) when the frame has not changed enough to upload, else None.
+    """
+    with _references_lock:
+        reference = _references.get(key)
+        if reference is not None:
+            _references.move_to_end(key)
+    if reference is None or time.monotonic() - reference['stored_at'] > GATE_MAX_AGE_SECONDS:
+        return None, None
+    ratio = change_ratio(reference['thumbnail'], thumbnail)
+    return (reference if ratio < GATE_CHANGE_THRESHOLD else None), ratio
+
+
+def store_reference(key: str, thumbnail: np.ndarray, gcs_object_name: str, resolution: str) -> None:
+    with _references_lock:
+        _references[key] = {
+            'thumbnail': thumbnail,
+            'gcsObjectName': gcs_object_name,
+            'resolution': resolution,
+            'stored_at': time.monotonic(),
+        }
+        _references.move_to_end(key)
+        while len(_references) > GATE_MAX_CAMERAS:
+            _references.popitem(last=False)
+
+
+def remember_description(key: str, gcs_object_name: str, description: str) -> None:
+    """Attaches a scene description to the reference, if it still points at that snapshot."""
+    with _references_lock:
+        reference = _references.get(key)
+        if reference is not None and reference['gcsObjectName'] == gcs_object_name:
+            reference['sceneDescription'] = description
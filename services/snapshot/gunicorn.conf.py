@@ -0,0 +1,30 @@
+import os
+import shutil
+
+# Gunicorn configuration for the snapshot service (`gunicorn --config gunicorn.conf.py main:app`).
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Snapshots spend nearly all their time blocked on RTSP and GCS I/O, and OpenCV releases
+# the GIL while it opens, reads and encodes, so threads overlap well. Each worker process
+# serves up to `threads` requests at once; set Cloud Run's --concurrency to
+# workers * threads. See README.md for how the defaults were chosen and how to re-measure.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', '1'))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+
+# prometheus_client multi-process mode: every worker writes its metrics to files in this
+# directory and /metrics aggregates them. It must be set before the workers import
+# prometheus_client, and emptied on startup so stale files from old workers don't count.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+
+def on_starting(server):
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
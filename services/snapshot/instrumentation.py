@@ -0,0 +1,186 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+
+# Per-request latency instrumentation for the snapshot service. Emits the same
+# structured JSON log line as functions/common/instrumentation.py (handler, status,
+# durationMs, phasesMs, requestBytes, responseBytes, coldStart, extra attributes), so
+# both can be queried together in Cloud Logging. If opentelemetry is installed the
+# request and every phase also become spans. INSTRUMENTATION_ENABLED=false turns the
+# log lines and spans off; observers passed to init_app() (e.g. the Prometheus metrics)
+# still receive every request. Endpoints in UNTRACED_ENDPOINTS are not traced at all.
+#
+# The request is finalized when its response is closed, i.e. after a streamed body has
+# been sent, or in teardown if the view raised before producing a response. The trace
+# lives in a context variable, so thread-pool work submitted with submit_in_context()
+# (refresh batches) records its phases on the request too.
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() != 'false'
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+    _tracer = otel_trace.get_tracer('octavision.snapshot')
+except ImportError:
+    _tracer = None
+
+_current = contextvars.ContextVar('snapshot_request_trace', default=None)
+_cold_start = True
+_observers = []
+UNTRACED_ENDPOINTS = {'metrics_route'}
+
+
+class RequestTrace:
+    def __init__(self, handler: str, method: str, request_bytes, cold_start: bool):
+        self.handler = handler
+        self.method = method
+        self.request_bytes = request_bytes
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.attributes = {}
+        self.span = self.span_token = None
+        self.lock = threading.Lock()
+        self.finished = False
+
+
+@contextmanager
+def phase(name: str):
+    """Times a block as a phase of the current request; repeated phases accumulate."""
+    request_trace = _current.get()
+    if request_trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        if request_trace.span is not None:
+            with _tracer.start_as_current_span(name):
+                yield
+        else:
+            yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with request_trace.lock:
+            request_trace.phases[name] = request_trace.phases.get(name, 0.0) + elapsed_ms
+
+
+def annotate(**attributes) -> None:
+    """Adds attributes to the current request's log line (and span)."""
+    request_trace = _current.get()
+    if request_trace is None:
+        return
+    with request_trace.lock:
+        request_trace.attributes.update(attributes)
+    if request_trace.span is not None:
+        for key, value in attributes.items():
+            if isinstance(value, (bool, int, float, str)):
+                request_trace.span.set_attribute(key, value)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit() that runs `fn` in a copy of the caller's context, so its phases
+    and annotations count towards the current request."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _iterate_in_context(context, iterable):
+    """Yields from `iterable`, running each step inside `context`."""
+    iterator = iter(iterable)
+    try:
+        while True:
+            try:
+                chunk = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            context.run(close)
+
+
+def _start_request():
+    global _cold_start
+    if request.endpoint in UNTRACED_ENDPOINTS:
+        return
+    cold_start, _cold_start = _cold_start, False
+    request_trace = RequestTrace(request.endpoint or request.path, request.method, request.content_length, cold_start)
+    if _tracer is not None and INSTRUMENTATION_ENABLED:
+        request_trace.span = _tracer.start_span(request_trace.handler)
+        request_trace.span.set_attribute('coldStart', cold_start)
+        request_trace.span_token = otel_context.attach(otel_trace.set_span_in_context(request_trace.span))
+    g.trace = request_trace
+    g.trace_token = _current.set(request_trace)
+
+
+def _end_request(request_trace: RequestTrace, status: int, response_bytes) -> None:
+    with request_trace.lock:
+        if request_trace.finished:
+            return
+        request_trace.finished = True
+    total_ms = (time.perf_counter() - request_trace.started) * 1000
+    for observer in _observers:
+        try:
+            observer(request_trace.handler, status, total_ms, request_trace.phases)
+        except Exception as e:
+            print(f"Snapshot Service: request observer failed: {e}", flush=True)
+    if request_trace.span is not None:
+        request_trace.span.set_attribute('http.status_code', status)
+        request_trace.span.end()
+    if not INSTRUMENTATION_ENABLED:
+        return
+    entry = {
+        'severity': 'ERROR' if status >= 500 else 'INFO',
+        'message': f"{request_trace.handler} {status} {total_ms:.1f}ms",
+        'handler': request_trace.handler,
+        'method': request_trace.method,
+        'status': status,
+        'durationMs': round(total_ms, 2),
+        'phasesMs': {name: round(ms, 2) for name, ms in request_trace.phases.items()},
+        'requestBytes': request_trace.request_bytes,
+        'responseBytes': response_bytes,
+        'coldStart': request_trace.cold_start,
+    }
+    entry.update(request_trace.attributes)
+    print(json.dumps(entry, default=str), flush=True)
+
+
+def _finish_response(response):
+    request_trace = g.get('trace')
+    if request_trace is None:
+        return response
+    status = response.status_code
+    if response.is_streamed:
+        # The body is generated after teardown: keep timing it in the request's context.
+        response.response = _iterate_in_context(contextvars.copy_context(), response.response)
+        response_bytes = None
+    else:
+        response_bytes = response.calculate_content_length()
+    response.call_on_close(lambda: _end_request(request_trace, status, response_bytes))
+    g.trace_response_seen = True
+    return response
+
+
+def _teardown_request(error):
+    request_trace = g.get('trace')
+    if request_trace is None:
+        return
+    _current.reset(g.trace_token)
+    if request_trace.span_token is not None:
+        otel_context.detach(request_trace.span_token)
+    if not g.get('trace_response_seen'):
+        # after_request never ran (the view raised): log it as a failed request now.
+        if error is not None:
+            request_trace.attributes['error'] = repr(error)
+        _end_request(request_trace, 500, None)
+
+
+def init_app(app, observers=()) -> None:
+    """observers are called as observer(handler, status, total_ms, phases_ms) once each response is done."""
+    _observers.extend(observers)
+    app.before_request(_start_request)
+    app.after_request(_finish_response)
+    app.teardown_request(_teardown_request)
@@ -1,22 +1,33 @@
 
 import cv2
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import firebase_admin
 from firebase_admin import credentials, auth
 from google.cloud import storage
 from google.auth import exceptions as auth_exceptions # Renamed to avoid conflict
+from google.auth.transport import requests as google_auth_requests
+from google.oauth2 import id_token as google_id_token
 import os
 import base64
 import numpy as np
 import datetime
 import logging
+import threading
+from instrumentation import annotate, init_app as init_instrumentation, phase
+from metrics import observe_request, record_camera_error, record_gate_decision, render_metrics
+from gating import camera_key, check_unchanged, remember_description, store_reference
+from capture import CAPTURE_MODES, DEFAULT_CAPTURE_MODE, CaptureError, CaptureTimeout, capture_snapshot
+from refresher import refresh_thumbnails
+from describe import SCENE_DESCRIPTION_URL, describe_snapshot
+from clip import CLIP_CONTENT_TYPE, CLIP_ENCODINGS, CLIP_MAX_DURATION_SECONDS, capture_clip
 
 # --- Logging Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+init_instrumentation(app, observers=[observe_request])
 
 # --- CORS Configuration ---
 # Get allowed origins from environment variable
@@ -41,6 +52,7 @@ logger.info(f"Snapshot Service: Flask-CORS initializing to allow origins: {allow
 CORS(app,
      resources={
          r"/take-snapshot": {"origins": allowed_origins_list},
+         r"/capture-clip": {"origins": allowed_origins_list},
          r"/retrieve-snapshot": {"origins": allowed_origins_list}
      },
      methods=["GET", "POST", "OPTIONS"],
@@ -84,6 +96,22 @@ else:
     logger.info(f"Snapshot Service: Configured to use GCS Bucket: {STORAGE_BUCKET_NAME}")
 
 
+# One GCS client per process, shared by all request threads (its HTTP session and
+# credentials are reused instead of being rebuilt for every snapshot).
+_storage_client = None
+_storage_client_lock = threading.Lock()
+
+
+def get_storage_client():
+    global _storage_client
+    if _storage_client is None:
+        with _storage_client_lock:
+            if _storage_client is None:
+                # For Cloud Run, storage.Client() without arguments will use ADC.
+                _storage_client = storage.Client()
+    return _storage_client
+
+
 def verify_token_from_headers(req_headers):
     """Helper to verify Firebase ID token from request headers."""
     auth_header = req_headers.get('Authorization')
@@ -98,7 +126,8 @@ def verify_token_from_headers(req_headers):
 
     try:
         logger.debug("Snapshot Service: verify_token - Attempting to verify ID token...")
-        decoded_token = auth.verify_id_token(id_token)
+        with phase('auth'):
+            decoded_token = auth.verify_id_token(id_token)
         logger.info(f"Snapshot Service: Token verified successfully for UID: {decoded_token.get('uid')}")
         return decoded_token, None
     except auth_exceptions.FirebaseError as e: # Catch specific Firebase auth errors
@@ -108,6 +137,22 @@ def verify_token_from_headers(req_headers):
         logger.error(f"Snapshot Service: General error verifying token: {e}", exc_info=True)
         return None, f"Token verification failed: {str(e)}"
 
+def parse_flag(value):
+    """
+    Returns (flag, error) for an optional boolean field. JSON booleans are taken as is and
+    "true"/"false"/"1"/"0" strings are parsed, so "false" never turns a paid option on.
+    """
+    if value is None:
+        return False, None
+    if isinstance(value, bool):
+        return value, None
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value), None
+    if isinstance(value, str) and value.strip().lower() in ('true', '1', 'false', '0', ''):
+        return value.strip().lower() in ('true', '1'), None
+    return None, f"must be a boolean, got {value!r}"
+
+
 @app.route('/take-snapshot', methods=['POST', 'OPTIONS'])
 def take_snapshot_route():
     logger.info(f"Snapshot Service: Received request to /take-snapshot, method: {request.method}")
@@ -131,41 +176,77 @@ def take_snapshot_route():
             return jsonify({'status': 'error', 'message': 'Invalid JSON payload'}), 400
 
         rtsp_url = data.get('rtsp_url')
+        camera_id = data.get('camera_id') # Optional; keys change detection and is logged with capture errors
         if not rtsp_url:
             logger.error("Snapshot Service: /take-snapshot - No RTSP URL provided in payload.")
             return jsonify({'status': 'error', 'message': 'No RTSP URL provided'}), 400
         
         logger.info(f"Snapshot Service: /take-snapshot - Processing RTSP URL: {rtsp_url} for user UID: {decoded_token.get('uid') if decoded_token else 'Unknown'}")
 
-        cap = None
+        capture_mode = data.get('capture_mode') or DEFAULT_CAPTURE_MODE
+        if capture_mode not in CAPTURE_MODES:
+            return jsonify({'status': 'error', 'message': f"capture_mode must be one of: {', '.join(CAPTURE_MODES)}"}), 400
+
+        # Opt-in scene description (see describe.py), returned with the snapshot.
+        describe, flag_error = parse_flag(data.get('describe'))
+        if flag_error:
+            return jsonify({'status': 'error', 'message': f'describe {flag_error}'}), 400
+        if describe and not SCENE_DESCRIPTION_URL:
+            return jsonify({'status': 'error', 'message': 'Scene description is not configured on this service.'}), 503
+        authorization = request.headers.get('Authorization')
+
+        # Opt-in change detection (see gating.py): reuse the last snapshot if the scene has not changed.
+        skip_if_unchanged, flag_error = parse_flag(data.get('skip_if_unchanged'))
+        if flag_error:
+            return jsonify({'status': 'error', 'message': f'skip_if_unchanged {flag_error}'}), 400
+        gate_key = camera_key(decoded_token['uid'], camera_id, rtsp_url) if skip_if_unchanged else None
+        gate_result = {}
+
+        def gate(thumbnail):
+            gate_result['reference'], gate_result['changeRatio'] = check_unchanged(gate_key, thumbnail)
+            return gate_result['reference'] is not None
+
         try:
-            logger.info(f"Snapshot Service: /take-snapshot - Attempting to open video capture for {rtsp_url}")
-            cap = cv2.VideoCapture(rtsp_url)
-            if not cap.isOpened():
-                logger.error(f"Snapshot Service: /take-snapshot - Could not open video stream for {rtsp_url}")
-                return jsonify({'status': 'error', 'message': f'Could not open video stream for {rtsp_url}'}), 500
-            logger.info(f"Snapshot Service: /take-snapshot - Video stream opened for {rtsp_url}")
-
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                logger.error(f"Snapshot Service: /take-snapshot - Could not read frame from stream {rtsp_url}")
-                return jsonify({'status': 'error', 'message': f'Could not read frame from stream {rtsp_url}'}), 500
-            logger.info(f"Snapshot Service: /take-snapshot - Frame read successfully from {rtsp_url}")
-
-            height, width, _ = frame.shape
-            resolution_str = f"{width}x{height}"
+            logger.info(f"Snapshot Service: /take-snapshot - Capturing a frame from {rtsp_url} (mode: {capture_mode})")
+            try:
+                image_bytes, dimensions, thumbnail = capture_snapshot(rtsp_url, capture_mode, gate=gate if skip_if_unchanged else None)
+            except CaptureTimeout as e:
+                logger.error(f"Snapshot Service: /take-snapshot - Capture timed out for {rtsp_url}: {e}")
+                record_camera_error(camera_id, 'timeout')
+                return jsonify({'status': 'error', 'message': f'Timed out capturing from {rtsp_url}: {e}'}), 504
+            except CaptureError as e:
+                logger.error(f"Snapshot Service: /take-snapshot - Capture failed at {e.stage} for {rtsp_url}: {e}")
+                record_camera_error(camera_id, e.stage)
+                return jsonify({'status': 'error', 'message': f'{e} ({rtsp_url})'}), 500
+
+            resolution_str = f"{dimensions[0]}x{dimensions[1]}" if dimensions else None
             logger.info(f"Snapshot Service: /take-snapshot - Captured frame resolution: {resolution_str}")
 
-            # Encode frame to JPEG bytes
-            is_success, image_buffer_bytes = cv2.imencode('.jpg', frame)
-            if not is_success:
-                logger.error("Snapshot Service: /take-snapshot - Error encoding image to JPEG")
-                return jsonify({'status': 'error', 'message': 'Error encoding image to JPEG'}), 500
-
-            # Initialize GCS client
-            # For Cloud Run, storage.Client() without arguments will use ADC.
-            storage_client = storage.Client()
-            bucket = storage_client.bucket(STORAGE_BUCKET_NAME)
+            if image_bytes is None:
+                reference = gate_result['reference']
+                logger.info(f"Snapshot Service: /take-snapshot - Scene unchanged (change ratio {gate_result['changeRatio']:.4f}); reusing {reference['gcsObjectName']}")
+                annotate(unchanged=True, changeRatio=gate_result['changeRatio'], captureMode=capture_mode)
+                record_gate_decision(True)
+                response_body = {
+                    'status': 'success',
+                    'gcsObjectName': reference['gcsObjectName'],
+                    'resolution': reference['resolution'],
+                    'unchanged': True,
+                    'changeRatio': gate_result['changeRatio']
+                }
+                if describe:
+                    description = reference.get('sceneDescription')
+                    if description is None:
+                        with phase('describe'):
+                            description, describe_error = describe_snapshot(authorization, reference['gcsObjectName'])
+                        if description is not None:
+                            remember_description(gate_key, reference['gcsObjectName'], description)
+                        else:
+                            response_body['sceneDescriptionError'] = describe_error
+                    response_body['sceneDescription'] = description
+                return jsonify(response_body), 200
+
+            bucket = get_storage_client().bucket(STORAGE_BUCKET_NAME)
             
             # Generate a unique filename for GCS
             timestamp = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
@@ -173,33 +254,113 @@ def take_snapshot_route():
             gcs_filename = f"snapshots/snap_{user_uid_part}_{timestamp}.jpg" # Example path
             
             blob = bucket.blob(gcs_filename)
-            
+
             # Upload the image bytes
-            blob.upload_from_string(image_buffer_bytes.tobytes(), content_type='image/jpeg')
+            with phase('upload'):
+                blob.upload_from_string(image_bytes, content_type='image/jpeg')
+            annotate(resolution=resolution_str, snapshotBytes=len(image_bytes), captureMode=capture_mode)
             logger.info(f"Snapshot Service: /take-snapshot - Successfully uploaded {gcs_filename} to bucket {STORAGE_BUCKET_NAME}.")
 
-            return jsonify({
+            response_body = {
                 'status': 'success',
                 'gcsObjectName': gcs_filename, # Return the GCS object name
                 'resolution': resolution_str
-            }), 200
+            }
+            if skip_if_unchanged:
+                if thumbnail is not None:
+                    store_reference(gate_key, thumbnail, gcs_filename, resolution_str)
+                record_gate_decision(False)
+                response_body['unchanged'] = False
+                response_body['changeRatio'] = gate_result.get('changeRatio')
+            if describe:
+                # Described from GCS by object name, so the JPEG is not sent again.
+                with phase('describe'):
+                    description, describe_error = describe_snapshot(authorization, gcs_filename)
+                response_body['sceneDescription'] = description
+                if description is None:
+                    response_body['sceneDescriptionError'] = describe_error
+                elif skip_if_unchanged:
+                    remember_description(gate_key, gcs_filename, description)
+            return jsonify(response_body), 200
 
         except cv2.error as e:
             logger.error(f"Snapshot Service: /take-snapshot - OpenCV Error: {e}", exc_info=True)
+            record_camera_error(camera_id, 'opencv')
             return jsonify({'status': 'error', 'message': f'OpenCV error processing video stream: {str(e)}'}), 500
         except Exception as e:
             logger.error(f"Snapshot Service: /take-snapshot - An unexpected error occurred: {e}", exc_info=True)
+            record_camera_error(camera_id, 'unexpected')
             return jsonify({'status': 'error', 'message': f'An unexpected error occurred: {str(e)}'}), 500
-        finally:
-            if cap is not None and cap.isOpened():
-                cap.release()
-                logger.info(f"Snapshot Service: /take-snapshot - Released video capture for {rtsp_url}")
     
     # If not POST, Flask-CORS should handle OPTIONS, or it's an unhandled method
     # For robustness, you might return a 405 Method Not Allowed if it's not OPTIONS handled by CORS
     return jsonify(status="error", message="Unsupported HTTP method for this endpoint"), 405
 
 
+@app.route('/capture-clip', methods=['POST', 'OPTIONS'])
+def capture_clip_route():
+    logger.info(f"Snapshot Service: Received request to /capture-clip, method: {request.method}")
+
+    if request.method == 'OPTIONS':
+        return app.make_default_options_response()
+    decoded_token, token_error = verify_token_from_headers(request.headers)
+    if token_error:
+        logger.error(f"Snapshot Service: /capture-clip - Authentication failed: {token_error}")
+        return jsonify({'status': 'error', 'message': f'Authentication failed: {token_error}'}), 401
+
+    if not STORAGE_BUCKET_NAME:
+        logger.error("Snapshot Service: /capture-clip - STORAGE_BUCKET not configured.")
+        return jsonify({'status': 'error', 'message': 'Server configuration error: Storage bucket not set.'}), 500
+
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'status': 'error', 'message': 'Invalid JSON payload'}), 400
+    rtsp_url = data.get('rtsp_url')
+    camera_id = data.get('camera_id')
+    if not rtsp_url:
+        return jsonify({'status': 'error', 'message': 'No RTSP URL provided'}), 400
+    duration = data.get('duration_seconds', 10)
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)) or not 0 < duration <= CLIP_MAX_DURATION_SECONDS:
+        return jsonify({'status': 'error', 'message': f"'duration_seconds' must be a number between 0 and {CLIP_MAX_DURATION_SECONDS:g}"}), 400
+    encoding = data.get('encoding') or 'copy'
+    if encoding not in CLIP_ENCODINGS:
+        return jsonify({'status': 'error', 'message': f"encoding must be one of: {', '.join(CLIP_ENCODINGS)}"}), 400
+
+    timestamp = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    gcs_filename = f"clips/clip_{decoded_token.get('uid', 'unknown_user')}_{timestamp}.mp4"
+    logger.info(f"Snapshot Service: /capture-clip - Recording {duration}s ({encoding}) from {rtsp_url} into {gcs_filename}")
+    try:
+        blob = get_storage_client().bucket(STORAGE_BUCKET_NAME).blob(gcs_filename)
+        if camera_id:
+            blob.metadata = {'cameraId': str(camera_id)}
+        clip_info = capture_clip(rtsp_url, float(duration), blob, encoding)
+    except CaptureTimeout as e:
+        logger.error(f"Snapshot Service: /capture-clip - Clip timed out for {rtsp_url}: {e}")
+        record_camera_error(camera_id, 'timeout')
+        return jsonify({'status': 'error', 'message': f'Timed out recording from {rtsp_url}: {e}'}), 504
+    except CaptureError as e:
+        logger.error(f"Snapshot Service: /capture-clip - Clip failed at {e.stage} for {rtsp_url}: {e}")
+        record_camera_error(camera_id, e.stage)
+        return jsonify({'status': 'error', 'message': f'{e} ({rtsp_url})'}), 500
+    except Exception as e:
+        logger.error(f"Snapshot Service: /capture-clip - An unexpected error occurred: {e}", exc_info=True)
+        record_camera_error(camera_id, 'unexpected')
+        return jsonify({'status': 'error', 'message': f'An unexpected error occurred: {str(e)}'}), 500
+
+    annotate(clipBytes=clip_info['sizeBytes'], clipSeconds=clip_info['durationSeconds'], clipEncoding=encoding)
+    logger.info(f"Snapshot Service: /capture-clip - Uploaded {gcs_filename} ({clip_info['sizeBytes']} bytes)")
+    return jsonify({
+        'status': 'success',
+        'gcsObjectName': gcs_filename,
+        'contentType': CLIP_CONTENT_TYPE,
+        'requestedDurationSeconds': duration,
+        'encoding': encoding,
+        **clip_info,
+        # Form fields for the VSS proxy's ingest_file, which takes the clip bytes as "file".
+        'vssIngest': {'filename': gcs_filename.rsplit('/', 1)[-1], 'purpose': 'vision', 'media_type': 'video'}
+    }), 200
+
+
 @app.route('/retrieve-snapshot', methods=['POST', 'OPTIONS'])
 def retrieve_snapshot_route():
     logger.info(f"Snapshot Service: Received request to /retrieve-snapshot, method: {request.method}")
@@ -229,23 +390,24 @@ def retrieve_snapshot_route():
 
         logger.info(f"Snapshot Service: /retrieve-snapshot - Attempting to generate signed URL for: {gcs_object_name}")
         try:
-            # Initialize GCS client. On Cloud Run, this uses ADC.
-            storage_client = storage.Client()
-            bucket = storage_client.bucket(STORAGE_BUCKET_NAME)
+            bucket = get_storage_client().bucket(STORAGE_BUCKET_NAME)
             blob = bucket.blob(gcs_object_name)
 
-            if not blob.exists():
+            with phase('gcs_exists'):
+                blob_exists = blob.exists()
+            if not blob_exists:
                 logger.warning(f"Snapshot Service: /retrieve-snapshot - GCS object {gcs_object_name} not found in bucket {STORAGE_BUCKET_NAME}.")
                 return jsonify({'status': 'error', 'message': 'Snapshot object not found'}), 404
 
             # Generate a v4 signed URL.
             # The service account running this Cloud Run instance needs
             # "Service Account Token Creator" role on itself to sign the URL.
-            signed_url = blob.generate_signed_url(
-                version="v4",
-                expiration=datetime.timedelta(minutes=15), # Example: 15 minutes expiration
-                method="GET",
-            )
+            with phase('sign_url'):
+                signed_url = blob.generate_signed_url(
+                    version="v4",
+                    expiration=datetime.timedelta(minutes=15), # Example: 15 minutes expiration
+                    method="GET",
+                )
             logger.info(f"Snapshot Service: /retrieve-snapshot - Successfully generated signed URL for {gcs_object_name}")
             return jsonify({'status': 'success', 'signedUrl': signed_url}), 200
         except auth_exceptions.RefreshError as e: # Specifically catch auth RefreshError
@@ -262,6 +424,81 @@ def retrieve_snapshot_route():
     return jsonify(status="error", message="Unsupported HTTP method for this endpoint"), 405
 
 
+# /refresh-thumbnails is called by Cloud Scheduler with an OIDC token for one of
+# REFRESH_INVOKER_EMAILS (comma-separated service accounts), minted for REFRESH_AUDIENCE
+# (defaults to https://<request host>, i.e. the Cloud Run service URL). REFRESH_TOKEN,
+# if set, is accepted as a shared bearer secret instead, for the local cron stand-in
+# (scripts/refresh_cron.py).
+REFRESH_INVOKER_EMAILS = {email.strip() for email in os.environ.get('REFRESH_INVOKER_EMAILS', '').split(',') if email.strip()}
+REFRESH_AUDIENCE = os.environ.get('REFRESH_AUDIENCE')
+REFRESH_TOKEN = os.environ.get('REFRESH_TOKEN')
+# Runs in this process are serialized; an overlapping trigger gets 409.
+_refresh_lock = threading.Lock()
+
+
+def verify_scheduler_request(req):
+    """Returns None if the caller may trigger a refresh, else an error message."""
+    auth_header = req.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return "Authorization header missing or malformed"
+    token = auth_header.split('Bearer ', 1)[1]
+    if REFRESH_TOKEN and token == REFRESH_TOKEN:
+        return None
+    if not REFRESH_INVOKER_EMAILS:
+        return "No scheduler identity configured (REFRESH_INVOKER_EMAILS)"
+    try:
+        with phase('auth'):
+            claims = google_id_token.verify_oauth2_token(
+                token, google_auth_requests.Request(), audience=REFRESH_AUDIENCE or f"https://{req.host}")
+    except ValueError as e:
+        return f"Invalid scheduler token: {e}"
+    if not claims.get('email_verified') or claims.get('email') not in REFRESH_INVOKER_EMAILS:
+        return f"Caller {claims.get('email')} is not allowed to refresh thumbnails"
+    return None
+
+
+@app.route('/refresh-thumbnails', methods=['POST'])
+def refresh_thumbnails_route():
+    auth_error = verify_scheduler_request(request)
+    if auth_error:
+        logger.warning(f"Snapshot Service: /refresh-thumbnails - Authentication failed: {auth_error}")
+        return jsonify({'status': 'error', 'message': f'Authentication failed: {auth_error}'}), 401
+    if not STORAGE_BUCKET_NAME:
+        logger.error("Snapshot Service: /refresh-thumbnails - STORAGE_BUCKET not configured.")
+        return jsonify({'status': 'error', 'message': 'Server configuration error: Storage bucket not set.'}), 500
+
+    data = request.get_json(silent=True) or {}
+    max_cameras = data.get('limit')
+    if max_cameras is not None and (not isinstance(max_cameras, int) or max_cameras <= 0):
+        return jsonify({'status': 'error', 'message': "'limit' must be a positive integer"}), 400
+
+    if not _refresh_lock.acquire(blocking=False):
+        return jsonify({'status': 'error', 'message': 'A thumbnail refresh is already running'}), 409
+    try:
+        summary = refresh_thumbnails(get_storage_client().bucket(STORAGE_BUCKET_NAME),
+                                     start_after=data.get('start_after'), max_cameras=max_cameras)
+    except Exception as e:
+        logger.error(f"Snapshot Service: /refresh-thumbnails - Refresh failed: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Thumbnail refresh failed: {str(e)}'}), 500
+    finally:
+        _refresh_lock.release()
+    annotate(refreshProcessed=summary['processed'], refreshUpdated=summary['updated'],
+             refreshUnchanged=summary['unchanged'], refreshFailed=summary['failed'], refreshComplete=summary['complete'])
+    return jsonify({'status': 'success', **summary}), 200
+
+
+# METRICS_TOKEN, if set, must be sent as "Authorization: Bearer <token>" to read /metrics.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+    body, content_type = render_metrics()
+    return Response(body, mimetype=content_type)
+
+
 if __name__ == '__main__':
     # PORT environment variable is automatically set by Cloud Run.
     port = int(os.environ.get('PORT', 8080))
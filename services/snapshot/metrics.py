@@ -0,0 +1,71 @@
+import logging
+import os
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics for the snapshot service, served at /metrics.
+#
+# Under gunicorn every worker is a separate process, so the metrics are written to
+# PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and /metrics aggregates all
+# workers. Without that variable (e.g. `python main.py`) the in-process registry is used.
+#
+# Phase timings come from the instrumentation phases (capture_keyframe, capture_open,
+# capture_read, gate, encode, upload, record_upload, upload_finalize, gcs_exists,
+# sign_url, auth, describe, firestore_read, refresh_batch, firestore_write) and are labelled by
+# route and outcome (success, client_error, error).
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUESTS = Counter(
+    'snapshot_requests_total', 'Requests handled, by route and outcome.', ['route', 'outcome'])
+REQUEST_SECONDS = Histogram(
+    'snapshot_request_seconds', 'Total request latency.', ['route', 'outcome'], buckets=LATENCY_BUCKETS)
+PHASE_SECONDS = Histogram(
+    'snapshot_phase_seconds', 'Latency of each request phase.', ['route', 'phase', 'outcome'], buckets=LATENCY_BUCKETS)
+# camera_id comes from the request body, so it is logged rather than used as a label:
+# every distinct value would add series to each worker's multiprocess file.
+CAMERA_ERRORS = Counter(
+    'snapshot_camera_errors_total', 'Capture failures by stage.', ['stage'])
+GATE_DECISIONS = Counter(
+    'snapshot_gate_decisions_total', 'Change-detection results for skip_if_unchanged requests.', ['decision'])
+REFRESH_RESULTS = Counter(
+    'snapshot_refresh_results_total', 'Per-camera results of /refresh-thumbnails runs.', ['result'])
+
+
+def outcome_for_status(status: int) -> str:
+    if status >= 500:
+        return 'error'
+    if status >= 400:
+        return 'client_error'
+    return 'success'
+
+
+def observe_request(route: str, status: int, total_ms: float, phases_ms: dict) -> None:
+    outcome = outcome_for_status(status)
+    REQUESTS.labels(route, outcome).inc()
+    REQUEST_SECONDS.labels(route, outcome).observe(total_ms / 1000)
+    for phase_name, phase_ms in phases_ms.items():
+        PHASE_SECONDS.labels(route, phase_name, outcome).observe(phase_ms / 1000)
+
+
+def record_camera_error(camera_id, stage: str) -> None:
+    CAMERA_ERRORS.labels(stage).inc()
+    if camera_id:
+        logger.info(f"Snapshot Service: Capture failed at {stage} for camera {camera_id}")
+
+
+def record_gate_decision(unchanged: bool) -> None:
+    GATE_DECISIONS.labels('unchanged' if unchanged else 'uploaded').inc()
+
+
+def record_refresh_result(result: str) -> None:
+    REFRESH_RESULTS.labels(result).inc()
+
+
+def render_metrics():
+    """Returns (body, content_type) for the /metrics response."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,176 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from firebase_admin import firestore
+from capture import CaptureError, CaptureTimeout, capture_snapshot
+from gating import check_unchanged, store_reference, thumbnail_from_jpeg
+from instrumentation import phase, submit_in_context
+from metrics import record_camera_error, record_refresh_result
+
+logger = logging.getLogger(__name__)
+
+# Background thumbnail refresh for dashboards (POST /refresh-thumbnails, see main.py).
+#
+# Walks the Firestore `cameras` collection in document-id order, REFRESH_BATCH_SIZE
+# cameras per query, and captures each batch with at most REFRESH_CONCURRENCY cameras in
+# flight. Every camera's frame overwrites the stable object snapshots/latest/{cameraId}.jpg
+# (with LATEST_SNAPSHOT_CACHE_CONTROL), and the camera document gets
+# latestSnapshotGcsObjectName / latestSnapshotResolution / latestSnapshotAt. Frames that
+# have not changed since the last refresh (gating.py) are not uploaded again.
+#
+# A run stops starting new batches once REFRESH_TIME_BUDGET_SECONDS have passed and
+# returns the last camera id as nextCursor. The cursor is also saved in
+# REFRESH_STATE_DOCUMENT, so the next scheduled run continues from there instead of
+# starting over (a caller can pass start_after to choose the starting point itself).
+REFRESH_BATCH_SIZE = int(os.environ.get('REFRESH_BATCH_SIZE', '50'))
+REFRESH_CONCURRENCY = int(os.environ.get('REFRESH_CONCURRENCY', '4'))
+REFRESH_CAPTURE_DEADLINE_SECONDS = float(os.environ.get('REFRESH_CAPTURE_DEADLINE_SECONDS', '10'))
+REFRESH_TIME_BUDGET_SECONDS = float(os.environ.get('REFRESH_TIME_BUDGET_SECONDS', '240'))
+REFRESH_STATE_DOCUMENT = os.environ.get('REFRESH_STATE_DOCUMENT', 'serviceState/snapshotRefresh')
+LATEST_SNAPSHOT_PREFIX = 'snapshots/latest/'
+LATEST_SNAPSHOT_CACHE_CONTROL = os.environ.get('LATEST_SNAPSHOT_CACHE_CONTROL', 'private, max-age=300')
+
+_CAMERA_FIELDS = ['url', 'rtspUsername', 'rtspPassword']
+
+
+def latest_object_name(camera_id: str) -> str:
+    return f"{LATEST_SNAPSHOT_PREFIX}{camera_id}.jpg"
+
+
+def camera_stream_url(camera: dict):
+    """The camera's RTSP URL with rtspUsername/rtspPassword filled in, or None without a URL."""
+    url = camera.get('url')
+    if not url:
+        return None
+    username = camera.get('rtspUsername')
+    scheme, separator, rest = url.partition('://')
+    if not username or not separator or '@' in rest.split('/', 1)[0]:
+        return url
+    credentials = quote(username, safe='')
+    if camera.get('rtspPassword'):
+        credentials += ':' + quote(camera['rtspPassword'], safe='')
+    return f"{scheme}://{credentials}@{rest}"
+
+
+def refresh_camera(bucket, camera_id: str, camera: dict) -> dict:
+    """Captures one camera and overwrites its latest thumbnail. Returns a result dict."""
+    rtsp_url = camera_stream_url(camera)
+    if not rtsp_url:
+        return {'cameraId': camera_id, 'result': 'skipped'}
+
+    gate_key = f"latest:{camera_id}"
+    try:
+        image_bytes, dimensions, thumbnail = capture_snapshot(
+            rtsp_url, deadline_seconds=REFRESH_CAPTURE_DEADLINE_SECONDS,
+            gate=lambda thumb: check_unchanged(gate_key, thumb)[0] is not None)
+    except CaptureTimeout as e:
+        logger.warning(f"Snapshot Service: refresh - Camera {camera_id} timed out: {e}")
+        record_camera_error(camera_id, 'timeout')
+        return {'cameraId': camera_id, 'result': 'failed', 'error': 'timeout'}
+    except CaptureError as e:
+        logger.warning(f"Snapshot Service: refresh - Camera {camera_id} failed at {e.stage}: {e}")
+        record_camera_error(camera_id, e.stage)
+        return {'cameraId': camera_id, 'result': 'failed', 'error': e.stage}
+    except Exception as e:
+        logger.error(f"Snapshot Service: refresh - Unexpected error for camera {camera_id}: {e}", exc_info=True)
+        record_camera_error(camera_id, 'unexpected')
+        return {'cameraId': camera_id, 'result': 'failed', 'error': 'unexpected'}
+
+    resolution = f"{dimensions[0]}x{dimensions[1]}" if dimensions else None
+    if image_bytes is None:
+        return {'cameraId': camera_id, 'result': 'unchanged', 'resolution': resolution}
+
+    object_name = latest_object_name(camera_id)
+    try:
+        blob = bucket.blob(object_name)
+        blob.cache_control = LATEST_SNAPSHOT_CACHE_CONTROL
+        blob.upload_from_string(image_bytes, content_type='image/jpeg')
+    except Exception as e:
+        logger.error(f"Snapshot Service: refresh - Upload of {object_name} failed: {e}", exc_info=True)
+        return {'cameraId': camera_id, 'result': 'failed', 'error': 'upload'}
+    try:
+        if thumbnail is None:
+            thumbnail = thumbnail_from_jpeg(image_bytes)
+        store_reference(gate_key, thumbnail, object_name, resolution)
+    except Exception as e:
+        # The thumbnail is already updated; the next run just compares against nothing.
+        logger.warning(f"Snapshot Service: refresh - Change detection reference for camera {camera_id} not stored: {e}")
+    return {'cameraId': camera_id, 'result': 'updated', 'gcsObjectName': object_name, 'resolution': resolution}
+
+
+def _record_batch(db, results: list) -> None:
+    batch = db.batch()
+    writes = 0
+    for result in results:
+        if result['result'] != 'updated':
+            continue
+        batch.update(db.collection('cameras').document(result['cameraId']), {
+            'latestSnapshotGcsObjectName': result['gcsObjectName'],
+            'latestSnapshotResolution': result['resolution'],
+            'latestSnapshotAt': firestore.SERVER_TIMESTAMP,
+        })
+        writes += 1
+    if writes:
+        try:
+            batch.commit()
+        except Exception as e:
+            # e.g. a camera deleted mid-run; the thumbnails are uploaded, only the fields are stale.
+            logger.error(f"Snapshot Service: refresh - Could not record latest snapshots on cameras: {e}", exc_info=True)
+
+
+def refresh_thumbnails(bucket, start_after: str = None, max_cameras: int = None) -> dict:
+    """Refreshes the latest thumbnail of every camera (see the module comment)."""
+    db = firestore.client()
+    state_ref = db.document(REFRESH_STATE_DOCUMENT)
+    started = time.monotonic()
+    counts = {'updated': 0, 'unchanged': 0, 'failed': 0, 'skipped': 0}
+    cursor = start_after
+    if cursor is None:
+        state = state_ref.get()
+        cursor = (state.to_dict() or {}).get('cursor') if state.exists else None
+    processed = 0
+    complete = False
+
+    with ThreadPoolExecutor(max_workers=REFRESH_CONCURRENCY, thread_name_prefix='refresh') as pool:
+        while True:
+            limit = REFRESH_BATCH_SIZE if max_cameras is None else min(REFRESH_BATCH_SIZE, max_cameras - processed)
+            if limit <= 0:
+                break
+            query = (db.collection('cameras').select(_CAMERA_FIELDS)
+                     .order_by(firestore.FieldPath.document_id()).limit(limit))
+            if cursor:
+                query = query.start_after({firestore.FieldPath.document_id(): db.collection('cameras').document(cursor)})
+            with phase('firestore_read'):
+                docs = list(query.stream())
+            if not docs:
+                complete = True
+                break
+
+            with phase('refresh_batch'):
+                futures = [submit_in_context(pool, refresh_camera, bucket, doc.id, doc.to_dict() or {}) for doc in docs]
+                results = [future.result() for future in futures]
+            with phase('firestore_write'):
+                _record_batch(db, results)
+
+            for result in results:
+                counts[result['result']] += 1
+                record_refresh_result(result['result'])
+            processed += len(docs)
+            cursor = docs[-1].id
+            if len(docs) < limit:
+                complete = True
+                break
+            if time.monotonic() - started > REFRESH_TIME_BUDGET_SECONDS:
+                logger.warning(f"Snapshot Service: refresh - Time budget exhausted after {processed} cameras; next run resumes after {cursor}")
+                break
+
+    state_ref.set({'cursor': None if complete else cursor, 'updatedAt': firestore.SERVER_TIMESTAMP}, merge=True)
+    logger.info(f"Snapshot Service: refresh - Processed {processed} cameras in {time.monotonic() - started:.1f}s: {counts}")
+    return {
+        'processed': processed,
+        **counts,
+        'complete': complete,
+        'nextCursor': None if complete else cursor,
+    }
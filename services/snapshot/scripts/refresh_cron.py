@@ -0,0 +1,69 @@
+"""
+Local stand-in for the Cloud Scheduler job that triggers /refresh-thumbnails.
+
+Every --interval seconds it POSTs to the snapshot service with the shared REFRESH_TOKEN
+and, if the run stopped early (time budget or --limit), keeps calling with the returned
+nextCursor until the whole cameras collection has been refreshed. --once runs a single
+pass and exits, which also suits a plain crontab entry.
+
+Usage:
+    REFRESH_TOKEN=dev-secret python scripts/refresh_cron.py --url http://localhost:8080 --interval 300
+"""
+import argparse
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+
+def trigger(url: str, token: str, start_after, limit, timeout: float) -> dict:
+    body = {}
+    if start_after:
+        body['start_after'] = start_after
+    if limit:
+        body['limit'] = limit
+    req = urllib.request.Request(
+        f"{url.rstrip('/')}/refresh-thumbnails", data=json.dumps(body).encode(), method='POST',
+        headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'}
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def refresh_pass(url: str, token: str, limit, timeout: float) -> None:
+    cursor = ''  # An empty start_after starts from the first camera instead of the saved cursor.
+    while True:
+        summary = trigger(url, token, cursor, limit, timeout)
+        print(f"{time.strftime('%H:%M:%S')} processed={summary['processed']} updated={summary['updated']} "
+              f"unchanged={summary['unchanged']} failed={summary['failed']} complete={summary['complete']}")
+        if summary['complete'] or not summary.get('nextCursor'):
+            return
+        cursor = summary['nextCursor']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--token', default=os.environ.get('REFRESH_TOKEN'), help='Defaults to $REFRESH_TOKEN')
+    parser.add_argument('--interval', type=float, default=300.0, help='Seconds between passes')
+    parser.add_argument('--limit', type=int, default=None, help='Cameras per call')
+    parser.add_argument('--timeout', type=float, default=600.0)
+    parser.add_argument('--once', action='store_true')
+    args = parser.parse_args()
+    if not args.token:
+        parser.error('--token or REFRESH_TOKEN is required')
+
+    while True:
+        started = time.monotonic()
+        try:
+            refresh_pass(args.url, args.token, args.limit, args.timeout)
+        except (urllib.error.URLError, TimeoutError) as e:
+            print(f"{time.strftime('%H:%M:%S')} refresh failed: {e}")
+        if args.once:
+            return
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == '__main__':
+    main()
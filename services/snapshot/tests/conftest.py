@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The service imports its modules by bare name (`gating`, `capture`), as in the container.
+# Appended rather than prepended: when run together with functions/tests, the proxy's
+# `metrics` module must not be shadowed by the service's.
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if SERVICE_DIR not in sys.path:
+    sys.path.append(SERVICE_DIR)
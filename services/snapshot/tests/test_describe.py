@@ -0,0 +1,51 @@
+import pytest
+import requests
+
+import describe
+from describe import describe_snapshot
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+
+@pytest.fixture
+def post(monkeypatch):
+    calls = []
+
+    def respond_with(status_code, payload):
+        def fake_post(url, json, headers, timeout):
+            calls.append((json, headers))
+            if isinstance(payload, requests.RequestException):
+                raise payload
+            return FakeResponse(status_code, payload)
+        monkeypatch.setattr(describe._session, 'post', fake_post)
+        return calls
+    return respond_with
+
+
+def test_snapshot_is_described_by_object_name(post):
+    calls = post(200, {'status': 'success', 'sceneDescription': 'A parking lot.'})
+    assert describe_snapshot('Bearer token', 'snapshots/snap_u_1.jpg') == ('A parking lot.', None)
+    assert calls == [({'gcsObjectName': 'snapshots/snap_u_1.jpg'}, {'Authorization': 'Bearer token'})]
+
+
+@pytest.mark.parametrize('status_code, payload', [
+    (200, ['not', 'an', 'object']),
+    (502, 'Bad Gateway'),
+    (403, {'status': 'error', 'message': 'Forbidden'}),
+    (200, ValueError("not JSON")),
+    (None, requests.ConnectionError("refused")),
+])
+def test_failures_return_an_error_message(post, status_code, payload):
+    post(status_code, payload)
+    description, error = describe_snapshot('Bearer token', 'snapshots/snap_u_1.jpg')
+    assert description is None
+    assert error
@@ -112,14 +112,16 @@ const CamerasPage: NextPage = () => {
       const fetchedCamerasPromises = querySnapshot.docs.map(async (docSnapshot) => {
         const data = docSnapshot.data();
         let imageUrlToDisplay: string | undefined = undefined;
+        // Prefer the thumbnail kept fresh by the snapshot service's /refresh-thumbnails job.
+        const thumbnailObjectName = data.latestSnapshotGcsObjectName || data.snapshotGcsObjectName;
 
-        if (data.snapshotGcsObjectName && process.env.NEXT_PUBLIC_RETRIEVE_SNAPSHOT_URL) {
+        if (thumbnailObjectName && process.env.NEXT_PUBLIC_RETRIEVE_SNAPSHOT_URL) {
           const auth = getAuth();
           const user = auth.currentUser;
           if (user) {
             const idToken = await user.getIdToken();
             try {
-              console.log(`Frontend: Attempting to call /retrieve-snapshot for camera list item: ${data.snapshotGcsObjectName}`);
+              console.log(`Frontend: Attempting to call /retrieve-snapshot for camera list item: ${thumbnailObjectName}`);
               const retrieveSnapshotServiceUrl = process.env.NEXT_PUBLIC_RETRIEVE_SNAPSHOT_URL;
               if (!retrieveSnapshotServiceUrl) {
                 console.error("Frontend Error: NEXT_PUBLIC_RETRIEVE_SNAPSHOT_URL is not set.");
@@ -129,7 +131,7 @@ const CamerasPage: NextPage = () => {
               const response = await fetch(retrieveSnapshotServiceUrl, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${idToken}` },
-                body: JSON.stringify({ gcsObjectName: data.snapshotGcsObjectName }),
+                body: JSON.stringify({ gcsObjectName: thumbnailObjectName }),
               });
 
               if (response.ok) {
@@ -137,14 +139,14 @@ const CamerasPage: NextPage = () => {
                 if (resData.status === 'success' && resData.signedUrl) {
                   imageUrlToDisplay = resData.signedUrl;
                 } else {
-                  console.warn(`Failed to retrieve signed URL for ${data.snapshotGcsObjectName} in list (API success but no URL): ${resData.message || 'Unknown error'}`);
+                  console.warn(`Failed to retrieve signed URL for ${thumbnailObjectName} in list (API success but no URL): ${resData.message || 'Unknown error'}`);
                 }
               } else {
                 const errorText = await response.text();
-                console.warn(`Failed to retrieve image for ${data.snapshotGcsObjectName} in list (API error): ${response.status} - ${errorText}`);
+                console.warn(`Failed to retrieve image for ${thumbnailObjectName} in list (API error): ${response.status} - ${errorText}`);
               }
             } catch (e: any) {
-              console.warn(`Error fetching signed URL for ${data.snapshotGcsObjectName} in list:`, e.message);
+              console.warn(`Error fetching signed URL for ${thumbnailObjectName} in list:`, e.message);
             }
           }
         }
@@ -895,73 +897,54 @@ const CamerasPage: NextPage = () => {
   };
 
   const handleGenerateSceneDescription = async () => {
-    if (!displayableSnapshotUrl) {
+    if (!snapshotGcsObjectName) {
       toast({ variant: "destructive", title: "Snapshot Missing", description: "Please wait for the snapshot to load or ensure a valid snapshot was taken."});
       return;
     }
     setIsGeneratingDescription(true);
     try {
-      console.log("Frontend: Fetching image from GCS URL for AI Description:", displayableSnapshotUrl);
-      const imageResponse = await fetch(displayableSnapshotUrl);
-      if (!imageResponse.ok) {
-        let errorDetails = `Failed to fetch image for AI description from GCS (status: ${imageResponse.status}).`;
-        try { const errorJson = await imageResponse.json(); errorDetails = errorJson.message || errorJson.error || errorDetails; }
-        catch (e) { /* ignore if not json */ }
-        throw new Error(errorDetails);
+      const auth = getAuth(); const user = auth.currentUser;
+      if (!user) { throw new Error("User not authenticated for AI description generation."); }
+      const idToken = await user.getIdToken();
+
+      const suggestSceneDescUrl = process.env.NEXT_PUBLIC_SUGGEST_SCENE_DESCRIPTION_URL;
+      if (!suggestSceneDescUrl) {
+          console.error("Frontend Error: NEXT_PUBLIC_SUGGEST_SCENE_DESCRIPTION_URL is not set.");
+          throw new Error("Suggest scene description service URL is not configured.");
       }
-      const imageBlob = await imageResponse.blob();
-      const reader = new FileReader();
-      reader.onloadend = async () => {
-          const base64data = reader.result as string; // This is 'data:image/jpeg;base64,ENCODED_STRING'
-          try {
-            const auth = getAuth(); const user = auth.currentUser;
-            if (!user) { throw new Error("User not authenticated for AI description generation."); }
-            const idToken = await user.getIdToken();
 
-            const suggestSceneDescUrl = process.env.NEXT_PUBLIC_SUGGEST_SCENE_DESCRIPTION_URL;
-            if (!suggestSceneDescUrl) { 
-                console.error("Frontend Error: NEXT_PUBLIC_SUGGEST_SCENE_DESCRIPTION_URL is not set.");
-                throw new Error("Suggest scene description service URL is not configured."); 
-            }
-            
-            console.log(`Frontend: Calling suggest_scene_description at ${suggestSceneDescUrl}`);
-            const aiResponse = await fetch(suggestSceneDescUrl, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${idToken}` },
-                body: JSON.stringify({ imageData: base64data.split(',')[1] }), // Send only base64 part
-            });
+      // The function reads the snapshot from Cloud Storage itself, so the image is not downloaded and re-uploaded here.
+      console.log(`Frontend: Calling suggest_scene_description at ${suggestSceneDescUrl} for ${snapshotGcsObjectName}`);
+      const aiResponse = await fetch(suggestSceneDescUrl, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${idToken}` },
+          body: JSON.stringify({ gcsObjectName: snapshotGcsObjectName }),
+      });
 
-            if (!aiResponse.ok) {
-                const errorData = await aiResponse.json();
-                throw new Error(errorData.message || `AI Scene Description service failed (${aiResponse.status})`);
-            }
-            const aiDescriptionResponse = await aiResponse.json();
-            console.log("Frontend: AI Description Response received:", JSON.stringify(aiDescriptionResponse, null, 2));
-
-            const description = aiDescriptionResponse?.sceneDescription; // Corrected to uppercase 'S'
-            
-            if (aiDescriptionResponse.status === 'success' && typeof description === 'string' && description.trim() !== '') {
-              console.log("Frontend: Attempting to set sceneDescription with:", description);
-              formStep2.setValue('sceneDescription', description);
-              formStep2.trigger('sceneDescription'); // Trigger re-render/validation
-              console.log("Frontend: Value of sceneDescription after setValue:", formStep2.getValues('sceneDescription'));
-            } else {
-              const descErrorMsg = aiDescriptionResponse.message || description || "AI failed to generate a valid description or returned an error.";
-              console.error("Frontend: AI Description error or malformed response:", descErrorMsg, aiDescriptionResponse);
-              toast({ variant: "destructive", title: "AI Description Failed", description: descErrorMsg });
-            }
-          } catch (aiError: any) {
-             console.error("Frontend: Error calling AI description service:", aiError);
-             toast({ variant: "destructive", title: "AI Description Error", description: aiError.message || "Failed to get AI description." });
-          } finally {
-            setIsGeneratingDescription(false);
-          }
-      };
-      reader.readAsDataURL(imageBlob);
-    } catch (fetchError: any) {
-        console.error("Error fetching image from GCS for description generation:", fetchError);
-        toast({ variant: "destructive", title: "Image Fetch Error for AI", description: fetchError.message || "Could not fetch snapshot for AI analysis. Check GCS bucket CORS settings." });
-        setIsGeneratingDescription(false);
+      if (!aiResponse.ok) {
+          const errorData = await aiResponse.json();
+          throw new Error(errorData.message || `AI Scene Description service failed (${aiResponse.status})`);
+      }
+      const aiDescriptionResponse = await aiResponse.json();
+      console.log("Frontend: AI Description Response received:", JSON.stringify(aiDescriptionResponse, null, 2));
+
+      const description = aiDescriptionResponse?.sceneDescription; // Corrected to uppercase 'S'
+
+      if (aiDescriptionResponse.status === 'success' && typeof description === 'string' && description.trim() !== '') {
+        console.log("Frontend: Attempting to set sceneDescription with:", description);
+        formStep2.setValue('sceneDescription', description);
+        formStep2.trigger('sceneDescription'); // Trigger re-render/validation
+        console.log("Frontend: Value of sceneDescription after setValue:", formStep2.getValues('sceneDescription'));
+      } else {
+        const descErrorMsg = aiDescriptionResponse.message || description || "AI failed to generate a valid description or returned an error.";
+        console.error("Frontend: AI Description error or malformed response:", descErrorMsg, aiDescriptionResponse);
+        toast({ variant: "destructive", title: "AI Description Failed", description: descErrorMsg });
+      }
+    } catch (aiError: any) {
+       console.error("Frontend: Error calling AI description service:", aiError);
+       toast({ variant: "destructive", title: "AI Description Error", description: aiError.message || "Failed to get AI description." });
+    } finally {
+      setIsGeneratingDescription(false);
     }
   };
   